@@ -0,0 +1,298 @@
+"""In-process caches used by the Chroma connector."""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+class CollectionCache:
+    """Thread-safe LRU cache of collection handles with a time-to-live.
+
+    Handles are keyed by (tenant, database, name). The TTL bounds how long a
+    handle can outlive a change made outside this server (e.g. a collection
+    deleted or renamed by another client); changes made through the connector
+    invalidate or update entries directly.
+    """
+
+    def __init__(self, max_size: int = 128, ttl: Optional[float] = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached handle for ``key`` or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            handle, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return handle
+
+    def put(self, key: Hashable, handle: Any):
+        """Store ``handle`` under ``key``, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (handle, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop ``key`` from the cache if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every cached handle."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def normalize_query_text(text: str) -> str:
+    """Collapse whitespace so trivially different spellings share a cache entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache from (embedding function, query text) to vector.
+
+    Bounded by an approximate memory budget rather than an entry count, since
+    vector size depends on the embedding model.
+    """
+
+    # Rough per-entry bookkeeping cost (key tuple, OrderedDict node, array header)
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """Return the cached vector for ``key`` or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, vector: np.ndarray):
+        """Store ``vector`` under ``key``, evicting least recently used entries over budget."""
+        size = vector.nbytes + len(str(key)) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (vector, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the in-memory size of a query/get result in bytes."""
+    if value is None or isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 16
+    if isinstance(value, str):
+        return len(value) + 50
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 100
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items()) + 64
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 56
+    return 64
+
+
+class ResultCache:
+    """LRU cache of query/get results invalidated by per-collection write generations.
+
+    Every write through the connector bumps the collection's generation and
+    drops its entries, so a cached result is never served after a write made
+    through this server. The TTL bounds staleness from writes made elsewhere.
+    Caching is opt-in per collection.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = 300.0,
+                 enabled_collections: Optional[List[str]] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._by_collection: Dict[Hashable, set] = {}
+        self._generations: Dict[Hashable, int] = {}
+        enabled = set(enabled_collections or [])
+        self._enable_all = "*" in enabled
+        self._enabled_names = enabled - {"*"}
+        self._disabled: set = set()
+        self._enabled: set = set()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def is_enabled(self, collection_key: tuple) -> bool:
+        """Whether results for this collection (keyed by (tenant, database, name)) are cached."""
+        if self.max_bytes <= 0 or collection_key in self._disabled:
+            return False
+        return (self._enable_all or collection_key in self._enabled
+                or collection_key[-1] in self._enabled_names)
+
+    def set_enabled(self, collection_key: tuple, enabled: bool):
+        """Turn caching on or off for one collection."""
+        with self._lock:
+            if enabled:
+                self._enabled.add(collection_key)
+                self._disabled.discard(collection_key)
+            else:
+                self._enabled.discard(collection_key)
+                self._disabled.add(collection_key)
+                self._drop_collection(collection_key)
+
+    def entry_key(self, collection_key: tuple, operation: str, params: Dict[str, Any]) -> tuple:
+        """Build the cache key for a read at the collection's current generation.
+
+        Take the key before running the read: if a write lands meanwhile, the
+        result is stored under the old generation and can never be served.
+        """
+        canonical = json.dumps([operation, params], sort_keys=True, default=str)
+        with self._lock:
+            return (collection_key, self._generations.get(collection_key, 0), canonical)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Return the cached result for ``key`` or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, size, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: tuple, result: Any):
+        """Store ``result``, evicting least recently used entries over the byte budget."""
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+        collection_key, generation, _ = key
+        with self._lock:
+            if generation != self._generations.get(collection_key, 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.monotonic())
+            self._by_collection.setdefault(collection_key, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def bump(self, collection_key: tuple):
+        """Record a write to a collection, invalidating its cached results."""
+        with self._lock:
+            self._generations[collection_key] = self._generations.get(collection_key, 0) + 1
+            self._drop_collection(collection_key)
+
+    def _drop_collection(self, collection_key: tuple):
+        keys = self._by_collection.pop(collection_key, set())
+        for key in keys:
+            if key in self._entries:
+                _, size, _ = self._entries.pop(key)
+                self._bytes -= size
+                self.invalidations += 1
+
+    def _remove(self, key: tuple):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._by_collection.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "enabled_collections": sorted(
+                    ["*"] if self._enable_all else
+                    list(self._enabled_names) + [key[-1] for key in self._enabled]
+                ),
+            }
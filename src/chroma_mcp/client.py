@@ -3,6 +3,8 @@
 import chromadb
 from typing import Dict, List, Any, Optional
 
+from .encoding import check_dimension, decode_embeddings, stored_dimension
+
 class ChromaMCP:
     """
     A simple client wrapper for Chroma DB functionality.
@@ -24,6 +26,8 @@ class ChromaMCP:
             self.client = chromadb.EphemeralClient()
         self._client_type = client_type
         self._path = path
+        # Stored embedding dimension per collection id, so stores skip the lookup
+        self._dimensions: Dict[Any, int] = {}
     
     def close(self):
         """
@@ -46,6 +50,8 @@ class ChromaMCP:
                 - documents: List of text documents to add
                 - metadatas: Optional list of metadata dictionaries (one per document)
                 - ids: Optional list of document IDs
+                - embeddings: Optional precomputed embeddings (float lists,
+                  base64 float32 strings, or a {"dtype", "shape", "data"} block)
         
         Returns:
             Dictionary with status information
@@ -54,6 +60,7 @@ class ChromaMCP:
         documents = data.get("documents", [])
         metadatas = data.get("metadatas")
         ids = data.get("ids")
+        embeddings = data.get("embeddings")
         
         if not collection_name:
             raise ValueError("collection_name is required")
@@ -67,12 +74,23 @@ class ChromaMCP:
         # Get or create collection
         collection = self.client.get_or_create_collection(collection_name)
         
+        # Precomputed embeddings skip the embedding model entirely
+        if embeddings is not None:
+            embeddings = decode_embeddings(embeddings, len(documents))
+            dimension = self._dimensions.get(collection.id)
+            if dimension is None:
+                dimension = stored_dimension(collection)
+            check_dimension(embeddings, dimension, collection_name)
+        
         # Add documents
         collection.add(
             documents=documents,
             metadatas=metadatas,
-            ids=ids
+            ids=ids,
+            embeddings=embeddings
         )
+        if embeddings is not None:
+            self._dimensions[collection.id] = embeddings.shape[1]
         
         return {
             "status": "success",
@@ -0,0 +1,173 @@
+"""Process-wide registry of shared embedding function instances."""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from chromadb.api import EmbeddingFunction
+from chromadb.api.types import Documents, Embeddings
+from chromadb.utils.embedding_functions import (
+    CohereEmbeddingFunction,
+    JinaEmbeddingFunction,
+    OpenAIEmbeddingFunction,
+    RoboflowEmbeddingFunction,
+    VoyageAIEmbeddingFunction,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SharedDefaultEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Default (all-MiniLM-L6-v2 ONNX) embedding function that keeps its model loaded.
+
+    Chroma's DefaultEmbeddingFunction constructs a new ONNX wrapper, and so
+    reloads the model, on every call. This keeps one wrapper for the life of
+    the process while persisting the same ``default`` configuration, so
+    collections created with it stay interchangeable with stock clients.
+    """
+
+    def __init__(self) -> None:
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import (
+                        ONNXMiniLM_L6_V2,
+                    )
+                    self._model = ONNXMiniLM_L6_V2()
+        return self._model
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self._load()(input)
+
+    @staticmethod
+    def name() -> str:
+        return "default"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "SharedDefaultEmbeddingFunction":
+        return SharedDefaultEmbeddingFunction()
+
+
+# Known embedding functions mapping
+KNOWN_EMBEDDING_FUNCTIONS: Dict[str, type] = {
+    "default": SharedDefaultEmbeddingFunction,
+    "cohere": CohereEmbeddingFunction,
+    "openai": OpenAIEmbeddingFunction,
+    "jina": JinaEmbeddingFunction,
+    "voyageai": VoyageAIEmbeddingFunction,
+    "roboflow": RoboflowEmbeddingFunction,
+}
+
+
+def embedding_function_key(embedding_function: EmbeddingFunction) -> tuple:
+    """Identity of an embedding function for caching: its name plus configuration."""
+    try:
+        config = json.dumps(embedding_function.get_config(), sort_keys=True, default=str)
+        return (embedding_function.name(), config)
+    except Exception:
+        # Legacy functions without name()/get_config() are only equal to themselves
+        return ("instance", id(embedding_function))
+
+
+def embed_queries(embedding_function: EmbeddingFunction, texts: List[str]) -> Embeddings:
+    """Embed query texts, using the function's query-specific path when it has one."""
+    embed_query = getattr(embedding_function, "embed_query", None)
+    if embed_query is not None:
+        return embed_query(input=texts)
+    return embedding_function(texts)
+
+
+def _configured_embedding_function(collection) -> Optional[Dict[str, Any]]:
+    """Return the embedding function entry persisted in a collection's configuration."""
+    try:
+        config = collection.configuration_json or {}
+    except Exception:
+        return None
+    entry = config.get("embedding_function")
+    return entry if isinstance(entry, dict) else None
+
+
+class EmbeddingFunctionRegistry:
+    """Builds each known embedding function once and shares it across collections."""
+
+    def __init__(self, known: Optional[Dict[str, type]] = None):
+        self._known = KNOWN_EMBEDDING_FUNCTIONS if known is None else known
+        self._instances: Dict[str, EmbeddingFunction] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        """Return the names of the embedding functions this registry can build."""
+        return list(self._known)
+
+    def get(self, name: Optional[str]) -> Optional[EmbeddingFunction]:
+        """Return the shared instance for ``name``, building it on first use.
+
+        Returns None for unknown names, matching Chroma's own fallback of
+        using the collection's default embedding function.
+        """
+        if name not in self._known:
+            return None
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._known[name]()
+                self._instances[name] = instance
+            return instance
+
+    def share(self, collection) -> Optional[EmbeddingFunction]:
+        """Point a collection handle at the shared instance of its embedding function.
+
+        Only swaps when the collection was persisted with a known function
+        whose configuration matches the shared instance; anything else keeps
+        the handle's own embedding function. Returns the function in use.
+        """
+        entry = _configured_embedding_function(collection)
+        name = entry.get("name") if entry else None
+        if name not in self._known:
+            return collection._embedding_function
+        try:
+            shared = self.get(name)
+            if (shared.get_config() or {}) != (entry.get("config") or {}):
+                return collection._embedding_function
+        except Exception as e:
+            # e.g. API-backed functions without their key configured
+            logger.debug(f"Not sharing embedding function '{name}': {str(e)}")
+            return collection._embedding_function
+        collection._embedding_function = shared
+        return shared
+
+    def warm(self, names: List[str]) -> Dict[str, float]:
+        """Load and test-embed each named function, returning load time in ms per name."""
+        timings = {}
+        for name in names:
+            if name not in self._known:
+                raise ValueError(
+                    f"Unknown embedding function '{name}'. Options: {', '.join(self._known)}"
+                )
+            start = time.perf_counter()
+            embedding_function = self.get(name)
+            vectors = embedding_function(["warm-up"])
+            if len(vectors) != 1 or len(vectors[0]) == 0:
+                raise RuntimeError(
+                    f"Embedding function '{name}' returned an empty warm-up embedding"
+                )
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(f"Warmed embedding function '{name}' in {timings[name]} ms")
+        return timings
+
+
+_registry = EmbeddingFunctionRegistry()
+
+
+def get_embedding_registry() -> EmbeddingFunctionRegistry:
+    """Return the process-wide embedding function registry."""
+    return _registry
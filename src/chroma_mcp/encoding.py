@@ -0,0 +1,271 @@
+"""Wire encodings for embeddings passed to and returned from tools."""
+
+import base64
+import binascii
+import json
+import threading
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+# Embeddings may be sent as JSON float lists, one base64 string per vector,
+# or a single binary block: {"dtype": "float32", "shape": [n, d], "data": "<base64>"}.
+# Binary data is always little-endian.
+EmbeddingsInput = Union[List[List[float]], List[str], str, Dict[str, Any]]
+
+_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+
+def _check_dtype(dtype: str):
+    if dtype not in _DTYPES:
+        raise ValueError(
+            f"Unsupported embedding dtype '{dtype}', expected one of: {', '.join(_DTYPES)}"
+        )
+
+
+def _decode_base64(data: str, dtype: str = "float32") -> np.ndarray:
+    _check_dtype(dtype)
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 embedding data: {str(e)}") from e
+    itemsize = np.dtype(_DTYPES[dtype]).itemsize
+    if len(raw) % itemsize:
+        raise ValueError(
+            f"Embedding data length {len(raw)} is not a multiple of {itemsize} bytes ({dtype})"
+        )
+    return np.frombuffer(raw, dtype=_DTYPES[dtype]).astype(np.float32)
+
+
+def decode_embeddings(value: Optional[EmbeddingsInput], count: int) -> Optional[np.ndarray]:
+    """Decode embeddings in any accepted wire format to a (count, dim) float32 array."""
+    if value is None:
+        return None
+
+    if isinstance(value, dict):
+        data = value.get("data")
+        if not isinstance(data, str):
+            raise ValueError("Binary embeddings must provide base64 'data'")
+        flat = _decode_base64(data, value.get("dtype", "float32"))
+        shape = value.get("shape")
+        if shape:
+            matrix = flat.reshape(shape)
+        else:
+            matrix = flat.reshape(count, -1) if count else flat.reshape(0, 0)
+    elif isinstance(value, str):
+        flat = _decode_base64(value)
+        if not count or flat.size % count:
+            raise ValueError(
+                f"Embedding block of {flat.size} floats cannot be split into {count} vectors"
+            )
+        matrix = flat.reshape(count, -1)
+    elif value and all(isinstance(v, str) for v in value):
+        vectors = [_decode_base64(v) for v in value]
+        if len({v.size for v in vectors}) > 1:
+            raise ValueError("All embeddings must have the same dimension")
+        matrix = np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+    else:
+        try:
+            matrix = np.asarray(value, dtype=np.float32)
+        except ValueError as e:
+            raise ValueError("All embeddings must have the same dimension") from e
+
+    if matrix.ndim != 2:
+        raise ValueError(
+            f"Embeddings must be a 2-dimensional list of vectors, got shape {list(matrix.shape)}"
+        )
+    if matrix.shape[0] != count:
+        raise ValueError(
+            f"Number of embeddings ({matrix.shape[0]}) must match number of documents ({count})"
+        )
+    if not np.isfinite(matrix).all():
+        raise ValueError("Embeddings must not contain NaN or infinite values")
+    return matrix
+
+
+def encode_embeddings(embeddings: Any, dtype: str = "float32") -> Dict[str, Any]:
+    """Encode a matrix of vectors as a {"dtype", "shape", "data"} block of little-endian base64."""
+    _check_dtype(dtype)
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.size == 0:
+        matrix = matrix.reshape(0, 0)
+    data = base64.b64encode(matrix.astype(_DTYPES[dtype]).tobytes()).decode("ascii")
+    return {"dtype": dtype, "shape": list(matrix.shape), "data": data}
+
+
+def encode_vector(vector: Any, dtype: str = "float32") -> str:
+    """Encode one vector as a little-endian base64 string."""
+    _check_dtype(dtype)
+    return base64.b64encode(np.asarray(vector, dtype=_DTYPES[dtype]).tobytes()).decode("ascii")
+
+
+def encode_result_embeddings(result: Dict[str, Any], nested: bool,
+                             dtype: str = "float32") -> Dict[str, Any]:
+    """Return a copy of a query/get result with its embeddings as binary blocks.
+
+    Get results carry one block; query results carry one block per query.
+    """
+    if result.get("embeddings") is None:
+        return result
+    embeddings = result["embeddings"]
+    if nested:
+        encoded = [encode_embeddings(rows, dtype) for rows in embeddings]
+    else:
+        encoded = encode_embeddings(embeddings, dtype)
+    return {**result, "embeddings": encoded}
+
+
+def check_dimension(embeddings: np.ndarray, expected: Optional[int], collection_name: str):
+    """Raise if ``embeddings`` do not match the dimension already stored in a collection."""
+    if expected is not None and embeddings.shape[1] != expected:
+        raise ValueError(
+            f"Embedding dimension {embeddings.shape[1]} does not match collection "
+            f"'{collection_name}' dimension {expected}"
+        )
+
+
+def stored_dimension(collection) -> Optional[int]:
+    """Return the dimension of vectors stored in a collection, or None if it is empty."""
+    sample = collection.get(limit=1, include=["embeddings"])
+    embeddings = sample.get("embeddings")
+    if embeddings is None or len(embeddings) == 0:
+        return None
+    return len(embeddings[0])
+
+
+class ResponseFormat(str, Enum):
+    """Shapes a query/get result can be returned in."""
+    COLUMNAR = "columnar"  # Chroma's own parallel lists, unchanged
+    RECORDS = "records"    # one object per hit
+    COMPACT = "compact"    # records without nulls, with projected metadata and truncated documents
+
+
+# Result column -> record field, in output order
+_RECORD_FIELDS = [
+    ("documents", "document"),
+    ("metadatas", "metadata"),
+    ("distances", "distance"),
+    ("embeddings", "embedding"),
+    ("uris", "uri"),
+    ("data", "data"),
+]
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert numpy values inside a result to plain Python types."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+def payload_size(value: Any) -> int:
+    """Size in bytes of ``value`` serialized as compact JSON."""
+    return len(json.dumps(to_jsonable(value), separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _records(result: Dict[str, Any], ids: List[str], row: Optional[int], compact: bool,
+             metadata_keys: Optional[List[str]], max_chars: Optional[int],
+             dtype: str) -> List[Dict[str, Any]]:
+    columns = []
+    for column, field in _RECORD_FIELDS:
+        values = result.get(column)
+        if values is not None:
+            columns.append((field, values if row is None else values[row]))
+
+    records = []
+    for i, doc_id in enumerate(ids):
+        record = {"id": doc_id}
+        for field, values in columns:
+            if field == "embedding":
+                value = encode_vector(values[i], dtype)
+            else:
+                value = to_jsonable(values[i])
+            if compact:
+                if value is None:
+                    continue
+                if field == "metadata" and metadata_keys is not None:
+                    value = {k: value[k] for k in metadata_keys if k in value}
+                elif field == "document" and max_chars is not None and len(value) > max_chars:
+                    value = value[:max_chars] + "…"
+            record[field] = value
+        records.append(record)
+    return records
+
+
+def format_result(
+    result: Dict[str, Any],
+    response_format: ResponseFormat,
+    nested: bool,
+    metadata_keys: Optional[List[str]] = None,
+    max_chars: Optional[int] = None,
+    embedding_dtype: str = "float32",
+) -> Dict[str, Any]:
+    """Reshape a Chroma query (``nested=True``) or get result into ``response_format``.
+
+    Embeddings become binary blocks (columnar) or one base64 string per
+    record. ``metadata_keys`` and ``max_chars`` only apply to the compact format.
+    """
+    response_format = ResponseFormat(response_format)
+    if response_format == ResponseFormat.COLUMNAR:
+        return encode_result_embeddings(result, nested, embedding_dtype)
+    _check_dtype(embedding_dtype)
+    compact = response_format == ResponseFormat.COMPACT
+    if max_chars is not None and max_chars < 0:
+        raise ValueError("max_chars must be non-negative")
+
+    if nested:
+        results = [
+            _records(result, ids, row, compact, metadata_keys, max_chars, embedding_dtype)
+            for row, ids in enumerate(result["ids"])
+        ]
+    else:
+        results = _records(result, result["ids"], None, compact, metadata_keys, max_chars,
+                           embedding_dtype)
+    return {"format": response_format.value, "results": results}
+
+
+class PayloadStats:
+    """Running totals of bytes saved by non-columnar response formats.
+
+    Measuring serializes both payloads, so only one response in ``every``
+    is measured; 0 disables measuring.
+    """
+
+    def __init__(self, every: int = 1):
+        self._lock = threading.Lock()
+        self.every = every
+        self.formatted_responses = 0
+        self.responses = 0
+        self.original_bytes = 0
+        self.formatted_bytes = 0
+
+    def sample(self) -> bool:
+        """Count a formatted response and return whether to measure it."""
+        with self._lock:
+            self.formatted_responses += 1
+            return self.every > 0 and (self.formatted_responses - 1) % self.every == 0
+
+    def record(self, original: int, formatted: int):
+        with self._lock:
+            self.responses += 1
+            self.original_bytes += original
+            self.formatted_bytes += formatted
+
+    def stats(self) -> Dict[str, Any]:
+        """Return response counts and byte totals over the measured responses."""
+        with self._lock:
+            return {
+                "formatted_responses": self.formatted_responses,
+                "measure_every": self.every,
+                "responses": self.responses,
+                "original_bytes": self.original_bytes,
+                "formatted_bytes": self.formatted_bytes,
+                "bytes_saved": self.original_bytes - self.formatted_bytes,
+            }
@@ -0,0 +1,133 @@
+"""Bounded worker pool for running blocking Chroma calls off the event loop."""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .logpipeline import log_event
+
+logger = logging.getLogger(__name__)
+
+
+class ServerBusyError(Exception):
+    """Raised when a tool call is rejected because the executor queue is full."""
+
+
+def parse_tool_limits(value: Optional[str]) -> Dict[str, int]:
+    """Parse a 'tool=N,tool2=M' string into a per-tool concurrency map."""
+    limits: Dict[str, int] = {}
+    if not value:
+        return limits
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, limit = item.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid tool concurrency entry '{item}', expected 'tool_name=N'")
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(f"Concurrency limit for '{name.strip()}' must be at least 1")
+        limits[name.strip()] = limit
+    return limits
+
+
+def threadsafe_progress(ctx) -> Callable[[float, Optional[float]], None]:
+    """Return a progress callback that worker threads can call to report through ``ctx``.
+
+    Must be created on the event loop thread. Reports are scheduled without
+    waiting, so a slow client never stalls the worker.
+    """
+    loop = asyncio.get_running_loop()
+
+    def report(progress: float, total: Optional[float] = None):
+        asyncio.run_coroutine_threadsafe(ctx.report_progress(progress, total), loop)
+
+    return report
+
+
+class ToolExecutor:
+    """Runs synchronous connector calls on a thread pool with admission control.
+
+    Calls beyond ``max_workers`` wait in the pool queue; once ``queue_depth``
+    calls are already waiting, new calls are rejected with ServerBusyError
+    instead of piling up. ``tool_limits`` caps how many calls of a given tool
+    may run at once, so e.g. bulk writes cannot starve concurrent reads.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        tool_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.queue_depth = queue_depth
+        self.tool_limits = dict(tool_limits or {})
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix="chroma-mcp")
+        # Semaphores are bound to the loop that created them
+        self._limiters: Dict[str, tuple] = {}
+        self._inflight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _limiter(self, tool_name: str) -> Optional[asyncio.Semaphore]:
+        limit = self.tool_limits.get(tool_name)
+        if not limit:
+            return None
+        loop = asyncio.get_running_loop()
+        entry = self._limiters.get(tool_name)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Semaphore(limit))
+            self._limiters[tool_name] = entry
+        return entry[1]
+
+    async def run(self, tool_name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the worker pool and await its result."""
+        if self.queue_depth is not None and self._inflight >= self.max_workers + self.queue_depth:
+            self._rejected += 1
+            logger.warning(f"Rejecting {tool_name}: {self._inflight} calls already in flight")
+            raise ServerBusyError(
+                f"Server busy: too many concurrent requests, retry {tool_name} later"
+            )
+
+        self._inflight += 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            call = functools.partial(fn, *args, **kwargs)
+            limiter = self._limiter(tool_name)
+            loop = asyncio.get_running_loop()
+            if limiter is None:
+                result = await loop.run_in_executor(self._pool, call)
+            else:
+                async with limiter:
+                    result = await loop.run_in_executor(self._pool, call)
+            status = "ok"
+            return result
+        finally:
+            self._inflight -= 1
+            self._completed += 1
+            log_event(logger, "tool_call", tool=tool_name, status=status,
+                      duration_ms=round((time.perf_counter() - started) * 1000, 2))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current pool utilization counters."""
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._inflight,
+            "queued": max(0, self._inflight - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "tool_limits": dict(self.tool_limits),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads."""
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,253 @@
+"""Per-session thought graph: branch roots, branch membership and revisions."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Thought metadata kept per node; bodies are never stored in the graph
+_NODE_FIELDS = ("thought_number", "timestamp", "branch_id", "branch_from_thought", "is_revision",
+                "revises_thought")
+
+
+def _order(node: Dict[str, Any]):
+    return (node.get("thought_number") or 0, node.get("timestamp") or 0)
+
+
+class SessionGraph:
+    """Adjacency structure of one session's thoughts, built from metadata only."""
+
+    def __init__(self, session_id: str, nodes: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.session_id = session_id
+        self.nodes: Dict[str, Dict[str, Any]] = nodes or {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, document_id: str, metadata: Dict[str, Any]):
+        """Add or replace the node for one thought."""
+        self.nodes[document_id] = {
+            k: metadata[k] for k in _NODE_FIELDS if metadata.get(k) is not None
+        }
+
+    def main_line(self) -> List[str]:
+        """Ids of non-branch thoughts in history order."""
+        main = [(node_id, node) for node_id, node in self.nodes.items()
+                if not node.get("branch_id")]
+        return [node_id for node_id, _ in sorted(main, key=lambda item: _order(item[1]))]
+
+    def branches(self, from_thought: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Branches with their root thought number and member ids.
+
+        With ``from_thought``, only branches rooted at that thought are returned.
+        """
+        branches: Dict[str, Dict[str, Any]] = {}
+        for node_id, node in self.nodes.items():
+            branch_id = node.get("branch_id")
+            if not branch_id:
+                continue
+            if from_thought is not None and node.get("branch_from_thought") != from_thought:
+                continue
+            branch = branches.setdefault(branch_id, {
+                "branch_id": branch_id,
+                "branch_from_thought": node.get("branch_from_thought"),
+                "thoughts": [],
+            })
+            branch["thoughts"].append(node_id)
+        for branch in branches.values():
+            branch["thoughts"].sort(
+                key=lambda node_id: self.nodes[node_id].get("thought_number") or 0
+            )
+        return list(branches.values())
+
+    def revisions(self) -> List[Dict[str, Any]]:
+        """Which thought each revision revises, in history order."""
+        revised = [(node_id, node) for node_id, node in self.nodes.items()
+                   if node.get("is_revision")]
+        return [
+            {"document_id": node_id, "thought_number": node.get("thought_number"),
+             "revises_thought": node.get("revises_thought"), "branch_id": node.get("branch_id")}
+            for node_id, node in sorted(revised, key=lambda item: _order(item[1]))
+        ]
+
+
+class ThoughtGraphStore:
+    """LRU of session graphs in memory, persisted as one JSONL sidecar log per session.
+
+    A sidecar starts with a header line naming the session, followed by one
+    line per node. Recorded thoughts are appended, so each write costs only
+    its own nodes; a log with superseded lines is compacted when loaded.
+    Graphs are loaded from the sidecar or rebuilt from thought metadata on a
+    miss. Callers pass the session's known thought count so a graph that
+    missed writes (e.g. from another process) is rebuilt rather than served.
+    """
+
+    def __init__(self, max_sessions: int = 256, sidecar_dir: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self.sidecar_dir = Path(sidecar_dir) if sidecar_dir else None
+        self._graphs: "OrderedDict[str, SessionGraph]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+        self.rebuilds = 0
+
+    def _path(self, session_id: str) -> Optional[Path]:
+        if self.sidecar_dir is None:
+            return None
+        # Session ids are caller-supplied, so never use them as file names directly
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        return self.sidecar_dir / f"{digest}.jsonl"
+
+    @staticmethod
+    def _line(document_id: str, node: Dict[str, Any]) -> str:
+        return json.dumps({"id": document_id, "node": node}, separators=(",", ":")) + "\n"
+
+    def _persist(self, graph: SessionGraph):
+        """Write the whole graph as a compact log, replacing any previous one."""
+        path = self._path(graph.session_id)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps({"session_id": graph.session_id}, separators=(",", ":")) + "\n")
+                f.writelines(self._line(node_id, node) for node_id, node in graph.nodes.items())
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(
+                f"Could not persist thought graph for session {graph.session_id}: {str(e)}"
+            )
+
+    def _append(self, graph: SessionGraph, document_ids: List[str]):
+        """Append the nodes for ``document_ids`` to the graph's log."""
+        path = self._path(graph.session_id)
+        if path is None:
+            return
+        if not path.exists():
+            self._persist(graph)
+            return
+        try:
+            with open(path, "a") as f:
+                f.writelines(self._line(node_id, graph.nodes[node_id]) for node_id in document_ids)
+        except OSError as e:
+            logger.warning(
+                f"Could not persist thought graph for session {graph.session_id}: {str(e)}"
+            )
+
+    def _load(self, session_id: str) -> Optional[SessionGraph]:
+        path = self._path(session_id)
+        if path is None or not path.exists():
+            return None
+        graph = SessionGraph(session_id)
+        lines = 0
+        torn = False
+        try:
+            with open(path) as f:
+                if json.loads(f.readline())["session_id"] != session_id:
+                    return None
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A write torn by a crash; compacting drops it before anything is appended
+                        torn = True
+                        break
+                    graph.nodes[record["id"]] = record["node"]
+                    lines += 1
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable thought graph for session {session_id}: {str(e)}")
+            return None
+        if torn or lines != len(graph):
+            self._persist(graph)
+        return graph
+
+    def _remember(self, graph: SessionGraph):
+        self._graphs[graph.session_id] = graph
+        self._graphs.move_to_end(graph.session_id)
+        while len(self._graphs) > self.max_sessions:
+            self._graphs.popitem(last=False)
+
+    def get(self, session_id: str, expected_count: Optional[int],
+            load_metadata: Callable[[str], Iterable[tuple]]) -> SessionGraph:
+        """Return the session's graph, rebuilt from ``(document_id, metadata)`` pairs if stale."""
+        with self._lock:
+            graph = self._graphs.get(session_id)
+            if graph is not None and (expected_count is None or len(graph) == expected_count):
+                self._graphs.move_to_end(session_id)
+                self.hits += 1
+                return graph
+            graph = self._load(session_id)
+            if graph is not None and (expected_count is None or len(graph) == expected_count):
+                self.loads += 1
+                self._remember(graph)
+                return graph
+
+            graph = SessionGraph(session_id)
+            for document_id, metadata in load_metadata(session_id):
+                graph.add(document_id, metadata)
+            self.rebuilds += 1
+            self._remember(graph)
+            self._persist(graph)
+            return graph
+
+    def record(self, thoughts: Iterable[tuple]):
+        """Add newly stored ``(document_id, thought, metadata)`` tuples to graphs already known."""
+        touched: Dict[str, SessionGraph] = {}
+        added: Dict[str, List[str]] = {}
+        with self._lock:
+            for document_id, _, metadata in thoughts:
+                session_id = metadata["session_id"]
+                graph = touched.get(session_id)
+                if graph is None:
+                    graph = self._graphs.get(session_id)
+                if graph is None:
+                    graph = self._load(session_id)
+                if graph is None:
+                    # Built from stored metadata on first read
+                    continue
+                graph.add(document_id, metadata)
+                touched[session_id] = graph
+                added.setdefault(session_id, []).append(document_id)
+            for session_id, graph in touched.items():
+                self._remember(graph)
+                self._append(graph, added[session_id])
+
+    def invalidate(self, session_ids: Iterable[str]):
+        """Forget graphs whose thoughts changed outside ``record``."""
+        with self._lock:
+            for session_id in session_ids:
+                self._graphs.pop(session_id, None)
+                path = self._path(session_id)
+                if path is not None:
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def clear(self):
+        """Forget every graph, including persisted sidecars."""
+        with self._lock:
+            self._graphs.clear()
+            if self.sidecar_dir is not None and self.sidecar_dir.exists():
+                for path in self.sidecar_dir.glob("*.jsonl"):
+                    path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache occupancy and how graphs were obtained."""
+        with self._lock:
+            return {
+                "sessions": len(self._graphs),
+                "max_sessions": self.max_sessions,
+                "sidecar_dir": str(self.sidecar_dir) if self.sidecar_dir else None,
+                "hits": self.hits,
+                "sidecar_loads": self.loads,
+                "rebuilds": self.rebuilds,
+            }
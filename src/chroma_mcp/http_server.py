@@ -10,9 +10,9 @@ import threading
 import traceback
 from typing import Dict, List, Any, Optional, Callable, Union
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Request, HTTPException
 from pydantic import BaseModel
-from starlette.responses import JSONResponse
+from starlette.responses import Response
 from starlette.middleware.cors import CORSMiddleware
 
 # Configure basic logging first
@@ -30,37 +30,17 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 
 sys.excepthook = handle_exception
 
-# Import all chroma tools from server
-from .server import (
-    chroma_list_collections,
-    chroma_create_collection,
-    chroma_peek_collection,
-    chroma_get_collection_info,
-    chroma_get_collection_count,
-    chroma_modify_collection,
-    chroma_delete_collection,
-    chroma_add_documents,
-    chroma_query_documents,
-    chroma_get_documents,
-    chroma_update_documents,
-    chroma_delete_documents,
-    chroma_sequential_thinking,
-    chroma_get_similar_sessions,
-    chroma_get_thought_history,
-    chroma_get_thought_branches,
-    chroma_continue_thought_chain,
-    get_chroma_client  # Import function to get Chroma client
-)
+from . import logpipeline
+from .serialization import ENCODERS, ResponseSerializer
+from .server import ChromaMCPServer, ChromaSettings, create_parser
 
-# Configure logging
+# Configure logging: JSON lines written by a background thread, never blocking requests
 logger = logging.getLogger("chroma-mcp-http")
 log_dir = os.path.join(os.getcwd(), "logs")
 os.makedirs(log_dir, exist_ok=True)
 log_file = os.path.join(log_dir, "chroma-mcp-http.log")
 
-handler = logging.FileHandler(log_file)
-handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
-logger.addHandler(handler)
+logpipeline.install(logger, log_file, queue_size=int(os.getenv("MCP_LOG_QUEUE_SIZE", "10000")))
 logger.setLevel(logging.INFO)
 
 # Create FastAPI app
@@ -82,100 +62,184 @@ class JsonRpcRequest(BaseModel):
     params: Optional[Dict[str, Any]] = {}
     id: Union[str, int, None] = None
 
-# Tool method mapping
-TOOL_METHODS = {
-    "chroma_list_collections": chroma_list_collections,
-    "chroma_create_collection": chroma_create_collection,
-    "chroma_peek_collection": chroma_peek_collection,
-    "chroma_get_collection_info": chroma_get_collection_info,
-    "chroma_get_collection_count": chroma_get_collection_count,
-    "chroma_modify_collection": chroma_modify_collection,
-    "chroma_delete_collection": chroma_delete_collection,
-    "chroma_add_documents": chroma_add_documents,
-    "chroma_query_documents": chroma_query_documents,
-    "chroma_get_documents": chroma_get_documents,
-    "chroma_update_documents": chroma_update_documents,
-    "chroma_delete_documents": chroma_delete_documents,
-    "chroma_sequential_thinking": chroma_sequential_thinking,
-    "chroma_get_similar_sessions": chroma_get_similar_sessions,
-    "chroma_get_thought_history": chroma_get_thought_history,
-    "chroma_get_thought_branches": chroma_get_thought_branches,
-    "chroma_continue_thought_chain": chroma_continue_thought_chain,
-}
+# Tools that only read; consecutive reads in a batch run concurrently.
+# Any other method is a write and runs alone, after the calls before it.
+READ_METHODS = frozenset({
+    "chroma_list_collections",
+    "chroma_peek_collection",
+    "chroma_get_collection_info",
+    "chroma_get_collection_count",
+    "chroma_query_documents",
+    "chroma_query_collections",
+    "chroma_get_documents",
+    "chroma_get_similar_sessions",
+    "chroma_get_thought_history",
+    "chroma_get_thought_branches",
+    "chroma_get_thought_graph",
+    "chroma_continue_thought_chain",
+    "chroma_get_server_stats",
+})
+
+# Gateway state, set by init_server()
+_server: Optional[ChromaMCPServer] = None
+_batch_concurrency = 8
+_max_batch_size = 100
+_serializer = ResponseSerializer()
+
+
+class _GatewayContext:
+    """Stands in for the MCP request context when tools are called over plain JSON-RPC."""
+
+    async def debug(self, message: str, **extra: Any):
+        logger.debug(message)
+
+    async def info(self, message: str, **extra: Any):
+        logger.info(message)
+
+    async def warning(self, message: str, **extra: Any):
+        logger.warning(message)
+
+    async def error(self, message: str, **extra: Any):
+        logger.error(message)
+
+    async def report_progress(self, progress: float, total: Optional[float] = None, message: Optional[str] = None):
+        pass
+
+
+def init_server(settings: ChromaSettings, batch_concurrency: int = 8, max_batch_size: int = 100,
+                serializer: Optional[ResponseSerializer] = None) -> ChromaMCPServer:
+    """Create the Chroma MCP server whose tools the gateway dispatches to."""
+    global _server, _batch_concurrency, _max_batch_size, _serializer
+    if _server is not None:
+        _server.close()
+    _server = ChromaMCPServer(settings)
+    _batch_concurrency = max(1, batch_concurrency)
+    _max_batch_size = max(1, max_batch_size)
+    _serializer = serializer or ResponseSerializer()
+    return _server
+
+
+def get_server() -> ChromaMCPServer:
+    """Return the gateway's server, creating it from environment defaults on first use."""
+    if _server is None:
+        init_server(ChromaSettings(create_parser().parse_args([])))
+    return _server
+
+
+def _error(code: int, message: str, req_id: Any = None) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": req_id}
+
+
+def _is_notification(body: Any) -> bool:
+    return isinstance(body, dict) and "id" not in body and isinstance(body.get("method"), str)
+
+
+def _parse_call(body: Any) -> Union[JsonRpcRequest, Dict[str, Any]]:
+    """Validate one request object, returning the request or its error response."""
+    req_id = body.get("id") if isinstance(body, dict) else None
+    if not isinstance(body, dict):
+        return _error(-32600, "Invalid Request: Expected a JSON object")
+    if body.get("jsonrpc") != "2.0":
+        return _error(-32600, "Invalid Request: Expected JSON-RPC 2.0", req_id)
+    try:
+        call = JsonRpcRequest(**body)
+    except Exception as e:
+        return _error(-32600, f"Invalid Request: {str(e)}", req_id)
+    if _server._tool_manager.get_tool(call.method) is None:
+        logger.error(f"Method not found: {call.method}")
+        return _error(-32601, f"Method not found: {call.method}", req_id)
+    return call
+
+
+async def _execute(call: JsonRpcRequest) -> Dict[str, Any]:
+    """Run one validated call and build its response."""
+    try:
+        logpipeline.log_event(logger, "rpc_call", method=call.method, id=call.id, params=call.params)
+        tool = _server._tool_manager.get_tool(call.method)
+        result = await tool.run(call.params or {}, context=_GatewayContext())
+        return {"jsonrpc": "2.0", "result": result, "id": call.id}
+    except Exception as e:
+        logger.error(f"Error executing {call.method}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return _error(-32603, f"Internal error: {str(e)}", call.id)
+
+
+async def _dispatch(bodies: List[Any]) -> List[Optional[Dict[str, Any]]]:
+    """Run a batch, returning one response per request object in request order.
+
+    Consecutive reads run concurrently, at most ``_batch_concurrency`` at a
+    time. A write waits for every earlier call and finishes before any later
+    one starts, so calls behave as if run one after another.
+    """
+    calls = [_parse_call(body) for body in bodies]
+    responses: List[Optional[Dict[str, Any]]] = [
+        None if isinstance(call, JsonRpcRequest) else call for call in calls
+    ]
+    limit = asyncio.Semaphore(_batch_concurrency)
+
+    async def run_read(position: int, call: JsonRpcRequest):
+        async with limit:
+            responses[position] = await _execute(call)
+
+    reads: List[asyncio.Task] = []
+    for position, call in enumerate(calls):
+        if not isinstance(call, JsonRpcRequest):
+            continue
+        if call.method in READ_METHODS:
+            reads.append(asyncio.create_task(run_read(position, call)))
+            continue
+        if reads:
+            await asyncio.gather(*reads)
+            reads = []
+        responses[position] = await _execute(call)
+    if reads:
+        await asyncio.gather(*reads)
+
+    # Notifications (requests without an id) get no response, even on error
+    return [response for body, response in zip(bodies, responses, strict=True)
+            if not _is_notification(body)]
+
 
 @app.post("/")
 async def json_rpc_endpoint(request: Request):
-    """Handle JSON-RPC requests for Chroma MCP tools."""
+    """Handle a JSON-RPC request or batch of requests for Chroma MCP tools."""
     try:
-        # Parse the request body
         try:
             body = await request.json()
-            jsonrpc = body.get("jsonrpc")
-            method = body.get("method")
-            params = body.get("params", {})
-            req_id = body.get("id")
         except Exception as e:
             logger.error(f"Error parsing request: {str(e)}")
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32700, "message": "Parse error: Invalid JSON"},
-                "id": None
-            })
-        
-        # Validate JSON-RPC version
-        if jsonrpc != "2.0":
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32600, "message": "Invalid Request: Expected JSON-RPC 2.0"},
-                "id": req_id
-            })
-        
-        # Check if method exists
-        if method not in TOOL_METHODS:
-            logger.error(f"Method not found: {method}")
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32601, "message": f"Method not found: {method}"},
-                "id": req_id
-            })
-        
-        # Get the tool function
-        tool_fn = TOOL_METHODS[method]
-        
-        # Execute the tool function
-        logger.info(f"Executing method: {method} with params: {params}")
-        result = await tool_fn(**params)
-        
-        # Return the result
-        return JSONResponse({
-            "jsonrpc": "2.0",
-            "result": result,
-            "id": req_id
-        })
-    
+            return _serializer.response(_error(-32700, "Parse error: Invalid JSON"))
+
+        get_server()
+        if isinstance(body, list):
+            if not body:
+                return _serializer.response(_error(-32600, "Invalid Request: Empty batch"))
+            if len(body) > _max_batch_size:
+                return _serializer.response(_error(-32600, f"Invalid Request: Batch exceeds {_max_batch_size} requests"))
+            responses = await _dispatch(body)
+            return _serializer.response(responses) if responses else Response(status_code=204)
+
+        responses = await _dispatch([body])
+        return _serializer.response(responses[0]) if responses else Response(status_code=204)
+
     except Exception as e:
         # Log the error
         logger.error(f"Error in JSON-RPC request: {str(e)}")
         logger.error(traceback.format_exc())
-        
+
         # Return error response
-        return JSONResponse({
-            "jsonrpc": "2.0",
-            "error": {"code": -32603, "message": f"Internal error: {str(e)}"},
-            "id": None
-        })
+        return _serializer.response(_error(-32603, f"Internal error: {str(e)}"))
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     try:
-        # Try to get Chroma client and list collections
-        client = get_chroma_client()
-        collections = client.list_collections()
+        # Try to list collections through the connector
+        collections = get_server().connector.list_collections()
         return {"status": "healthy", "collections_count": len(collections)}
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}") from e
 
 def run_http_server(host: str = "0.0.0.0", port: int = 10550):
     """Run the HTTP server for Chroma MCP."""
@@ -189,14 +253,31 @@ def run_in_thread(host: str = "0.0.0.0", port: int = 10550):
     return thread
 
 if __name__ == "__main__":
-    # Initialize Chroma client
-    get_chroma_client()
-    
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(description="Chroma MCP HTTP Server")
-    parser.add_argument("--host", default="0.0.0.0", help="Host to bind server to")
-    parser.add_argument("--port", type=int, default=10550, help="Port to bind server to")
+    # Parse command line arguments; Chroma client flags are shared with the MCP server
+    parser = create_parser()
+    parser.description = "Chroma MCP HTTP Server"
+    parser.set_defaults(http_host=os.getenv("MCP_HTTP_HOST", "0.0.0.0"),
+                        http_port=int(os.getenv("MCP_HTTP_PORT", "10550")))
+    parser.add_argument("--batch-concurrency", type=int,
+                        default=int(os.getenv("MCP_HTTP_BATCH_CONCURRENCY", "8")),
+                        help="Reads from one JSON-RPC batch run at the same time (default: 8)")
+    parser.add_argument("--max-batch-size", type=int,
+                        default=int(os.getenv("MCP_HTTP_MAX_BATCH_SIZE", "100")),
+                        help="Largest accepted JSON-RPC batch (default: 100)")
+    parser.add_argument("--json-encoder", choices=ENCODERS,
+                        default=os.getenv("MCP_JSON_ENCODER", "auto"),
+                        help="Response encoder: orjson if installed (auto), orjson, or the standard library json")
+    parser.add_argument("--stream-threshold-kb", type=int,
+                        default=int(os.getenv("MCP_HTTP_STREAM_THRESHOLD_KB", "1024")),
+                        help="Responses of at least this many KB are streamed in chunks (default: 1024)")
     args = parser.parse_args()
-    
+
+    logpipeline.install(logger, log_file, queue_size=args.log_queue_size)
+    logpipeline.configure_sampling(args.log_sample)
+
+    # Initialize Chroma client
+    serializer = ResponseSerializer(args.json_encoder, stream_threshold=args.stream_threshold_kb * 1024)
+    init_server(ChromaSettings(args), args.batch_concurrency, args.max_batch_size, serializer)
+
     # Run the server
-    run_http_server(args.host, args.port)
\ No newline at end of file
+    run_http_server(args.http_host, args.http_port)
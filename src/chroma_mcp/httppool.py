@@ -0,0 +1,153 @@
+"""Tuned, instrumented HTTP connection pool for the http and cloud Chroma clients."""
+
+import gzip
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import chromadb
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _pooled_server(client):
+    """Return the client's server API if it exposes the httpx session this module replaces.
+
+    ``_server._session`` and ``_server._settings`` are chromadb internals;
+    returns None when this chromadb version lacks them.
+    """
+    server = getattr(client, "_server", None)
+    if isinstance(getattr(server, "_session", None), httpx.Client) and hasattr(server, "_settings"):
+        return server
+    return None
+
+
+class PooledTransport(httpx.BaseTransport):
+    """Wraps a transport to gzip large request bodies and count requests.
+
+    Bodies of at least ``compress_min_bytes`` are sent with
+    ``Content-Encoding: gzip``; 0 disables compression. The Chroma server,
+    or a proxy in front of it, must accept compressed requests.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, compress_min_bytes: int = 0):
+        self._transport = transport
+        self.compress_min_bytes = compress_min_bytes
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.compressed_requests = 0
+        self.compressed_bytes_saved = 0
+
+    def _compress(self, request: httpx.Request) -> httpx.Request:
+        body = request.read()
+        if len(body) < self.compress_min_bytes or "content-encoding" in request.headers:
+            return request
+        compressed = gzip.compress(body, compresslevel=5)
+        if len(compressed) >= len(body):
+            return request
+        headers = request.headers.copy()
+        headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(compressed))
+        with self._lock:
+            self.compressed_requests += 1
+            self.compressed_bytes_saved += len(body) - len(compressed)
+        return httpx.Request(request.method, request.url, headers=headers, content=compressed,
+                             extensions=request.extensions)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.compress_min_bytes:
+            request = self._compress(request)
+        with self._lock:
+            self.requests += 1
+        return self._transport.handle_request(request)
+
+    def close(self):
+        self._transport.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return open, idle and busy connection counts plus request counters."""
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(pool.connections) if pool is not None else []
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "connections": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "requests": self.requests,
+            "compressed_requests": self.compressed_requests,
+            "compressed_bytes_saved": self.compressed_bytes_saved,
+        }
+
+
+def configure_client(client, max_connections: Optional[int] = None,
+                     max_keepalive: Optional[int] = None,
+                     keepalive_expiry: Optional[float] = None, http2: bool = False,
+                     connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                     compress_min_bytes: int = 0) -> Optional[PooledTransport]:
+    """Replace a Chroma HTTP client's session with one using the given pool, protocol and timeouts.
+
+    Unset limits keep httpx's defaults. Returns the transport, whose ``stats``
+    report pool utilization, or None when the client keeps chromadb's stock
+    pool because its session cannot be replaced.
+    """
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError as e:
+            raise ValueError("HTTP/2 requires the h2 package: pip install 'httpx[http2]'") from e
+
+    server = _pooled_server(client)
+    if server is None:
+        logger.warning(f"chromadb {chromadb.__version__} has no replaceable HTTP session; "
+                       "keeping its stock connection pool and ignoring the pool options")
+        return None
+    previous = server._session
+    limits = {"max_connections": max_connections, "max_keepalive_connections": max_keepalive,
+              "keepalive_expiry": keepalive_expiry}
+    verify = server._settings.chroma_server_ssl_verify
+    transport = PooledTransport(
+        httpx.HTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(**{k: v for k, v in limits.items() if v is not None}),
+            verify=True if verify is None else verify,
+        ),
+        compress_min_bytes,
+    )
+    server._session = httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        headers=previous.headers,
+    )
+    previous.close()
+    return transport
+
+
+def warm_connections(client, count: int, timeout: Optional[float] = None):
+    """Open ``count`` pooled connections by sending that many heartbeats at once.
+
+    Each heartbeat holds its connection until all have their response
+    headers, so none can reuse another's connection and every connection
+    (including its TLS handshake) is established before serving traffic.
+    """
+    server = _pooled_server(client)
+    if count <= 1 or server is None:
+        client.heartbeat()
+        return
+    session = server._session
+    barrier = threading.Barrier(count, timeout=timeout or 10)
+
+    def hold(response: httpx.Response):
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+
+    session.event_hooks["response"].append(hold)
+    try:
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="chroma-mcp-warm") as pool:
+            list(pool.map(lambda _: client.heartbeat(), range(count)))
+    finally:
+        session.event_hooks["response"].remove(hold)
+    logger.info(f"Warmed {count} HTTP connections")
@@ -0,0 +1,242 @@
+"""Non-blocking structured logging.
+
+Records are queued and written as JSON lines by a background thread.
+"""
+
+import atexit
+import datetime
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .serialization import dumps_text
+
+# Strings in payload summaries are cut to this many characters
+SUMMARY_CHARS = 200
+
+# Lists longer than this are summarized by their length only
+SUMMARY_ITEMS = 5
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message"}
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """Parse an 'event=rate,event2=rate' string into per-event sampling rates between 0 and 1."""
+    rates: Dict[str, float] = {}
+    if not value:
+        return rates
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, rate = item.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid log sampling entry '{item}', expected 'event=rate'")
+        rate = float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Sampling rate for '{name.strip()}' must be between 0 and 1")
+        rates[name.strip()] = rate
+    return rates
+
+
+def summarize(value: Any, max_chars: int = SUMMARY_CHARS) -> Any:
+    """Size-capped stand-in for a payload: long strings are cut, long lists become their length."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}…(+{len(value) - max_chars} chars)"
+    if isinstance(value, np.ndarray):
+        return {"shape": list(value.shape), "dtype": str(value.dtype)}
+    if isinstance(value, dict):
+        return {str(k): summarize(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) > SUMMARY_ITEMS:
+            return {"items": len(value)}
+        return [summarize(v, max_chars) for v in value]
+    return summarize(str(value), max_chars)
+
+
+class EventSampler:
+    """Keeps every n-th record of each sampled event; others use the '*' rate (default 1)."""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self.rates = dict(rates or {})
+        # Unlocked counters: a lost increment only shifts which record is kept
+        self._seen: Dict[str, int] = {}
+        self._kept: Dict[str, int] = {}
+
+    def keep(self, event: str) -> bool:
+        rate = self.rates.get(event, self.rates.get("*", 1.0))
+        seen = self._seen[event] = self._seen.get(event, 0) + 1
+        if rate >= 1:
+            keep = True
+        elif rate <= 0:
+            keep = False
+        else:
+            keep = (seen - 1) % round(1 / rate) == 0
+        if keep:
+            self._kept[event] = self._kept.get(event, 0) + 1
+        return keep
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rates": dict(self.rates),
+            "events": {
+                event: {"seen": seen, "kept": self._kept.get(event, 0)}
+                for event, seen in self._seen.items()
+            },
+        }
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, logger, message and structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created,
+                                                  datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RESERVED)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return dumps_text(entry)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never blocks.
+
+    Records arriving while the queue is full are counted and dropped.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, since args may change after the call returns
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """A bounded record queue drained into ``handler`` by a writer thread."""
+
+    # Queued by stop() to end the writer thread once everything before it is written
+    _SENTINEL = object()
+
+    def __init__(self, handler: logging.Handler, queue_size: int = 10000):
+        self.queue_size = queue_size
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self.handler = DroppingQueueHandler(self.queue)
+        self.target = handler
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._drain, name="chroma-mcp-log-writer",
+                                        daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            record = self.queue.get()
+            if record is self._SENTINEL:
+                return
+            if record.levelno >= self.target.level:
+                self.target.handle(record)
+
+    def stop(self):
+        """Write out queued records and stop the writer thread."""
+        if self._thread is not None:
+            # Block for the sentinel: it must get in even when the queue is full
+            self.queue.put(self._SENTINEL)
+            self._thread.join()
+            self._thread = None
+        self.target.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.queue.qsize(), "queue_size": self.queue_size,
+                "dropped": self.handler.dropped}
+
+
+_pipelines: Dict[str, LogPipeline] = {}
+_lock = threading.Lock()
+_sampler = EventSampler()
+
+
+def install(logger: logging.Logger, path: str, queue_size: int = 10000) -> LogPipeline:
+    """Route ``logger`` through a queue to a JSON-lines file at ``path``.
+
+    Any earlier pipeline installed for ``logger`` is replaced.
+    """
+    handler = logging.FileHandler(path)
+    handler.setFormatter(JsonLineFormatter())
+    pipeline = LogPipeline(handler, queue_size)
+    with _lock:
+        previous = _pipelines.get(logger.name)
+        if previous is not None:
+            logger.removeHandler(previous.handler)
+            previous.stop()
+        logger.addHandler(pipeline.handler)
+        _pipelines[logger.name] = pipeline
+        pipeline.start()
+    return pipeline
+
+
+def configure_sampling(rates: Dict[str, float]):
+    """Replace the per-event sampling rates used by ``log_event``."""
+    global _sampler
+    _sampler = EventSampler(rates)
+
+
+def log_event(logger: logging.Logger, event: str, message: Optional[str] = None,
+              level: int = logging.INFO, **fields: Any):
+    """Log a structured event, summarizing ``fields``.
+
+    Events below WARNING are subject to sampling, and nothing is summarized
+    for records that are sampled out or below the logger's level.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if level < logging.WARNING and not _sampler.keep(event):
+        return
+    summary = {k: summarize(v) for k, v in fields.items() if k not in _RESERVED}
+    logger.log(level, message or event, extra={"event": event, **summary})
+
+
+def stats() -> Dict[str, Any]:
+    """Queue depth and drop counts per pipeline, plus sampling counters."""
+    with _lock:
+        pipelines = {name: pipeline.stats() for name, pipeline in _pipelines.items()}
+    return {"pipelines": pipelines, "sampling": _sampler.stats()}
+
+
+def shutdown():
+    """Flush and stop every pipeline."""
+    with _lock:
+        for pipeline in _pipelines.values():
+            pipeline.stop()
+        _pipelines.clear()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,94 @@
+"""Opaque cursor tokens for paging through chroma_get_documents."""
+
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Rows re-read before the cursor position to find the last returned id again.
+# Up to this many deletions before the cursor are tolerated; beyond that, or when
+# the last returned row itself is deleted, the cursor is rejected.
+CURSOR_OVERLAP = 32
+
+# Result fields that hold one entry per row
+_ROW_FIELDS = ("ids", "documents", "metadatas", "embeddings", "uris", "data")
+
+
+def filter_fingerprint(collection_name: str, where: Optional[Dict],
+                       where_document: Optional[Dict]) -> str:
+    """Short hash tying a cursor to the collection and filters it was issued for."""
+    canonical = json.dumps([collection_name, where, where_document], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, last_id: str, fingerprint: str) -> str:
+    """Pack a page position into an opaque URL-safe token."""
+    payload = json.dumps({"o": offset, "id": last_id, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str, fingerprint: str) -> Tuple[int, str]:
+    """Unpack a cursor, checking it belongs to the same collection and filters."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        offset, last_id, issued_for = int(payload["o"]), str(payload["id"]), payload["f"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if issued_for != fingerprint:
+        raise ValueError("Cursor was issued for a different collection or filter")
+    return offset, last_id
+
+
+def _slice(result: Dict[str, Any], start: int, stop: int) -> Dict[str, Any]:
+    page = dict(result)
+    for field in _ROW_FIELDS:
+        if result.get(field) is not None:
+            page[field] = result[field][start:stop]
+    return page
+
+
+def read_page(
+    read: Callable[[int, int], Dict[str, Any]],
+    limit: int,
+    offset: int = 0,
+    last_id: Optional[str] = None,
+) -> Tuple[Dict[str, Any], Optional[Tuple[int, str]]]:
+    """Read one page after ``last_id`` and return it with the next cursor position.
+
+    ``read(limit, offset)`` performs the underlying get. Chroma only exposes
+    offset paging (ids cannot be range-filtered), so each page still costs
+    O(offset) on the server. The page re-reads up to CURSOR_OVERLAP rows
+    before ``offset`` and resumes right after ``last_id``: rows deleted
+    before the cursor shift it back instead of causing skips, and rows
+    appended during a scan are picked up at the end. If ``last_id`` is not
+    in that window the position is lost and ValueError is raised rather than
+    silently skipping rows. One extra row is read to tell whether another
+    page follows. Returns (page, None) on the last page.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1 when paging")
+    start = max(0, offset - CURSOR_OVERLAP) if last_id is not None else offset
+    requested = (offset - start) + limit + 1
+    window = read(requested, start)
+    ids = window["ids"]
+
+    begin = offset - start
+    if last_id is not None and offset > 0:
+        # Search backwards from the expected position; ids are unique per collection
+        for i in range(min(begin, len(ids)) - 1, -1, -1):
+            if ids[i] == last_id:
+                begin = i + 1
+                break
+        else:
+            raise ValueError(
+                f"Cursor position lost: the last returned document was deleted or more than "
+                f"{CURSOR_OVERLAP} documents before it were deleted; "
+                "restart the scan without a cursor"
+            )
+
+    stop = min(begin + limit, len(ids))
+    page = _slice(window, begin, stop)
+    if stop >= len(ids):
+        return page, None
+    return page, (start + stop, ids[stop - 1])
@@ -0,0 +1,222 @@
+"""Read routing across Chroma read replicas with heartbeat health checks."""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import chromadb
+import httpx
+from chromadb.errors import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Set once the missing per-request heartbeat timeout has been logged
+_warned_untimed_heartbeat = False
+
+
+def parse_hosts(value: str, default_port: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+    """Split a 'primary,replica1:8001,[::1]:8002,...' host list into (host, port) pairs.
+
+    The first pair is the primary. IPv6 addresses keep their brackets, which
+    Chroma needs to build the URL.
+
+    """
+    hosts = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if "://" in item:
+            # URLs carry their own port, which Chroma parses
+            hosts.append((item, default_port))
+        elif item.startswith('['):
+            address, _, rest = item.partition(']')
+            if not rest:
+                hosts.append((f"{address}]", default_port))
+            elif rest[0] == ':' and rest[1:].isdigit():
+                hosts.append((f"{address}]", rest[1:]))
+            else:
+                raise ValueError(f"Invalid host '{item}': expected [address] or [address]:port")
+        elif item.count(':') > 1:
+            # A bare IPv6 address, which cannot carry a port
+            hosts.append((f"[{item}]", default_port))
+        else:
+            host, sep, port = item.rpartition(':')
+            if sep and port.isdigit():
+                hosts.append((host, port))
+            else:
+                hosts.append((item, default_port))
+    if not hosts:
+        raise ValueError("No Chroma host given")
+    return hosts
+
+
+def heartbeat(client, timeout: Optional[float]):
+    """Heartbeat a Chroma client, giving up after ``timeout`` seconds on HTTP clients.
+
+    The timeout needs ``_server._make_request``, a chromadb internal; without
+    it the public heartbeat is sent with the client's own timeout.
+    """
+    global _warned_untimed_heartbeat
+    server = getattr(client, "_server", None)
+    if timeout is None:
+        return client.heartbeat()
+    if not callable(getattr(server, "_make_request", None)):
+        if not _warned_untimed_heartbeat:
+            _warned_untimed_heartbeat = True
+            logger.warning(f"chromadb {chromadb.__version__} cannot time out a single request; "
+                           "replica heartbeats use the client's own timeout")
+        return client.heartbeat()
+    return server._make_request("get", "/heartbeat", timeout=timeout)
+
+
+class _Replica:
+    def __init__(self, name: str, connect: Callable[[], Any]):
+        self.name = name
+        self.connect = connect
+        self.client = None
+        self.healthy = False
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+
+
+class ReplicaRouter:
+    """Sends reads to the healthy replica with the fewest requests in flight.
+
+    Replicas are heartbeated every ``heartbeat_interval`` seconds; one that
+    fails a heartbeat or a read with a connection error is skipped until a
+    heartbeat succeeds again. A heartbeat gives up after ``heartbeat_timeout``
+    seconds (default: the heartbeat interval). Reads fall back to the primary
+    when no replica is healthy, the replica is unreachable, or it does not
+    have the collection yet.
+
+    Replicas can lag the primary, so reads of a collection this process
+    wrote go to the primary for ``read_after_write`` seconds after the write.
+    """
+
+    def __init__(self, replicas: Dict[str, Callable[[], Any]], heartbeat_interval: float = 5.0,
+                 heartbeat_timeout: Optional[float] = None, read_after_write: float = 5.0):
+        self._replicas = [_Replica(name, connect) for name, connect in replicas.items()]
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = (heartbeat_timeout if heartbeat_timeout is not None
+                                  else heartbeat_interval)
+        self.read_after_write = read_after_write
+        self._lock = threading.Lock()
+        self._next = 0
+        self.fallbacks = 0
+        self.reads_after_write = 0
+        # Collection key -> monotonic time of this process's last write to it
+        self._writes: Dict[Hashable, float] = {}
+        self._stop = threading.Event()
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="chroma-mcp-replica-health",
+                                        daemon=True)
+        self._thread.start()
+
+    def check(self):
+        """Heartbeat every replica, connecting to any that has no client yet."""
+        for replica in self._replicas:
+            try:
+                if replica.client is None:
+                    replica.client = replica.connect()
+                heartbeat(replica.client, self.heartbeat_timeout)
+                healthy = True
+            except Exception as e:
+                healthy = False
+                if replica.healthy:
+                    logger.warning(f"Replica {replica.name} failed its heartbeat: {str(e)}")
+            if healthy and not replica.healthy:
+                logger.info(f"Replica {replica.name} is healthy")
+            replica.healthy = healthy
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            self.check()
+
+    def _pick(self) -> Optional[_Replica]:
+        with self._lock:
+            healthy = [r for r in self._replicas if r.healthy and r.client is not None]
+            if not healthy:
+                return None
+            # Rotate the starting point so equally loaded replicas take turns
+            self._next = (self._next + 1) % len(healthy)
+            rotated = healthy[self._next:] + healthy[:self._next]
+            replica = min(rotated, key=lambda r: r.outstanding)
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    def record_write(self, key: Hashable):
+        """Note a write to a collection, pinning its reads to the primary.
+
+        Reads stay on the primary for ``read_after_write`` seconds.
+        """
+        if self.read_after_write <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes[key] = now
+            if len(self._writes) > 1024:
+                self._writes = {k: t for k, t in self._writes.items()
+                                if now - t < self.read_after_write}
+
+    def _written_recently(self, key: Optional[Hashable]) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            written = self._writes.get(key)
+        return written is not None and time.monotonic() - written < self.read_after_write
+
+    def run(self, read: Callable[[str, Any], Any], fallback: Callable[[], Any],
+            key: Optional[Hashable] = None) -> Any:
+        """Call ``read(replica_name, client)`` on the chosen replica, else ``fallback()``.
+
+        ``key`` names the collection read, so reads just after a write to it go to the primary.
+        """
+        if self._written_recently(key):
+            self.reads_after_write += 1
+            return fallback()
+        replica = self._pick()
+        if replica is None:
+            self.fallbacks += 1
+            return fallback()
+        try:
+            return read(replica.name, replica.client)
+        except httpx.TransportError as e:
+            replica.healthy = False
+            replica.failures += 1
+            logger.warning(f"Read from replica {replica.name} failed, using the primary: {str(e)}")
+        except NotFoundError:
+            # Replicas can lag the primary, e.g. just after a collection is created
+            pass
+        finally:
+            with self._lock:
+                replica.outstanding -= 1
+        self.fallbacks += 1
+        return fallback()
+
+    @property
+    def names(self) -> List[str]:
+        return [replica.name for replica in self._replicas]
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Health, load and request counters per replica."""
+        with self._lock:
+            return {
+                "replicas": [
+                    {"host": r.name, "healthy": r.healthy, "outstanding": r.outstanding,
+                     "requests": r.requests, "failures": r.failures}
+                    for r in self._replicas
+                ],
+                "primary_fallbacks": self.fallbacks,
+                "primary_reads_after_write": self.reads_after_write,
+                "heartbeat_interval": self.heartbeat_interval,
+                "heartbeat_timeout": self.heartbeat_timeout,
+                "read_after_write": self.read_after_write,
+            }
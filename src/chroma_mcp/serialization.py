@@ -0,0 +1,147 @@
+"""JSON serialization for HTTP responses, with an optional orjson fast path."""
+
+import itertools
+import json
+from typing import Any, Iterator
+
+import numpy as np
+from starlette.responses import Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup, installed with the "fast" extra
+    orjson = None
+
+ENCODERS = ("auto", "orjson", "json")
+
+# Responses that encode to at least this many bytes are streamed in chunks
+DEFAULT_STREAM_THRESHOLD = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Containers nested up to this deep are encoded piece by piece when streaming
+# (e.g. result dict -> per-query lists -> rows), anything deeper in one call
+STREAM_DEPTH = 3
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+_STDLIB_ENCODER = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+class ResponseSerializer:
+    """Encodes results as compact JSON, using orjson when available.
+
+    NumPy arrays and scalars are encoded natively. ``response`` builds small
+    bodies in one piece and streams anything over ``stream_threshold`` bytes
+    in ``chunk_size`` chunks, so large results are never held as one string.
+    """
+
+    def __init__(self, encoder: str = "auto", stream_threshold: int = DEFAULT_STREAM_THRESHOLD,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if encoder not in ENCODERS:
+            raise ValueError(
+                f"Unknown JSON encoder '{encoder}', expected one of: {', '.join(ENCODERS)}"
+            )
+        if encoder == "orjson" and orjson is None:
+            raise ValueError(
+                "orjson is not installed; install chroma-mcp[fast] or use the json encoder"
+            )
+        self.use_orjson = orjson is not None and encoder != "json"
+        self.stream_threshold = stream_threshold
+        self.chunk_size = max(1, chunk_size)
+
+    @property
+    def encoder(self) -> str:
+        return "orjson" if self.use_orjson else "json"
+
+    def _orjson(self, value: Any):
+        try:
+            return orjson.dumps(value, default=_default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder handles them
+            return None
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode ``value`` to UTF-8 JSON bytes."""
+        if self.use_orjson:
+            data = self._orjson(value)
+            if data is not None:
+                return data
+        return _STDLIB_ENCODER.encode(value).encode("utf-8")
+
+    def _iter_orjson(self, value: Any, depth: int = 0) -> Iterator[bytes]:
+        """Encode ``value`` in pieces, descending into dicts and lists up to STREAM_DEPTH.
+
+        Lists are encoded in slices sized from the previous slice to come out
+        near ``chunk_size`` bytes, so only one slice is held at a time.
+        """
+        if depth < STREAM_DEPTH and isinstance(value, dict):
+            yield b"{"
+            for i, (key, item) in enumerate(value.items()):
+                # Encode the key as orjson would inside the dict, e.g. non-string keys
+                yield (b"," if i else b"") + self.dumps({key: 0})[1:-3] + b":"
+                yield from self._iter_orjson(item, depth + 1)
+            yield b"}"
+        elif (depth < STREAM_DEPTH and isinstance(value, (list, tuple, np.ndarray))
+              and len(value) > 0):
+            yield b"["
+            if len(value) == 1:
+                yield from self._iter_orjson(value[0], depth + 1)
+            else:
+                start, step = 0, 1
+                while start < len(value):
+                    piece = self.dumps(value[start:start + step])[1:-1]
+                    yield (b"," if start else b"") + piece
+                    start += step
+                    step = max(1, int(step * self.chunk_size / max(1, len(piece))))
+            yield b"]"
+        else:
+            yield self.dumps(value)
+
+    def iter_encode(self, value: Any) -> Iterator[bytes]:
+        """Encode ``value`` as a sequence of chunks of roughly ``chunk_size`` bytes.
+
+        Both encoders produce the body incrementally, so a large result is
+        never encoded into one buffer.
+        """
+        if self.use_orjson:
+            pieces = self._iter_orjson(value)
+        else:
+            pieces = (piece.encode("utf-8") for piece in _STDLIB_ENCODER.iterencode(value))
+
+        buffered, size = [], 0
+        for piece in pieces:
+            buffered.append(piece)
+            size += len(piece)
+            if size >= self.chunk_size:
+                yield b"".join(buffered)
+                buffered, size = [], 0
+        if buffered:
+            yield b"".join(buffered)
+
+    def response(self, content: Any, status_code: int = 200) -> Response:
+        """Build an HTTP response, streaming it if the body reaches ``stream_threshold`` bytes."""
+        chunks = self.iter_encode(content)
+        head, size = [], 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= self.stream_threshold:
+                return StreamingResponse(itertools.chain(head, chunks), status_code=status_code,
+                                         media_type="application/json")
+        return Response(b"".join(head), status_code=status_code, media_type="application/json")
+
+
+_default_serializer = ResponseSerializer()
+
+
+def dumps_text(value: Any) -> str:
+    """Encode ``value`` as compact JSON text with the default serializer."""
+    return _default_serializer.dumps(value).decode("utf-8")
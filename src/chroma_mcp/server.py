@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any, Annotated
+from typing import Dict, List, Optional, Any, Annotated, Callable, Literal
 from enum import Enum
 import chromadb
 from mcp.server.fastmcp import Context, FastMCP
@@ -7,11 +7,17 @@ import os
 from dotenv import load_dotenv
 import argparse
 from chromadb.config import Settings
+from chromadb.errors import NotFoundError
 import ssl
 import uuid
 import time
+import hashlib
 import json
 import logging
+import threading
+from collections import deque
+import heapq
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing_extensions import TypedDict
 
@@ -19,37 +25,54 @@ from chromadb.api.collection_configuration import (
     CreateCollectionConfiguration, CreateHNSWConfiguration, UpdateHNSWConfiguration, UpdateCollectionConfiguration
     )
 from chromadb.api import EmbeddingFunction
-from chromadb.utils.embedding_functions import (
-    DefaultEmbeddingFunction,
-    CohereEmbeddingFunction,
-    OpenAIEmbeddingFunction,
-    JinaEmbeddingFunction,
-    VoyageAIEmbeddingFunction,
-    RoboflowEmbeddingFunction,
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+import numpy as np
+
+from .cache import CollectionCache, EmbeddingCache, ResultCache, normalize_query_text
+from .encoding import (
+    EmbeddingsInput,
+    PayloadStats,
+    ResponseFormat,
+    check_dimension,
+    decode_embeddings,
+    encode_embeddings,
+    format_result,
+    payload_size,
+    stored_dimension,
 )
+from .embeddings import KNOWN_EMBEDDING_FUNCTIONS, embed_queries, embedding_function_key, get_embedding_registry
+from .sessions import SESSION_INDEX_COLLECTION, THOUGHTS_COLLECTION, SessionIndex
+from .graph import ThoughtGraphStore
+from .writebehind import WriteBehindBuffer
+from .pagination import decode_cursor, encode_cursor, filter_fingerprint, read_page
+from .executor import ToolExecutor, parse_tool_limits, threadsafe_progress
+from . import logpipeline
+from .topology import ProcessTopology
+from .httppool import configure_client, warm_connections
+from .routing import ReplicaRouter, parse_hosts
 
 # Set up dual logging for MCP protocol compliance
 # File logging for debugging, but keep stdout/stderr available for MCP protocol
 log_dir = Path("/tmp")
 log_file = log_dir / "chroma-mcp.log"
 
-# Create logger with dual handlers: file + null handler to avoid stdout interference
+# Create package logger with dual handlers: file + null handler to avoid stdout interference.
+# Module loggers (chroma_mcp.server, chroma_mcp.executor, ...) propagate into it.
+package_logger = logging.getLogger("chroma_mcp")
+package_logger.setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
-# File handler for debugging
-file_handler = logging.FileHandler(str(log_file))
-file_handler.setLevel(logging.INFO)
-file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+# File logging goes through a bounded queue drained by a background thread, written as
+# JSON lines, so tool calls never wait on disk; main() re-applies the command line settings
+logpipeline.install(package_logger, str(log_file), queue_size=int(os.getenv('MCP_LOG_QUEUE_SIZE', '10000')))
+logpipeline.configure_sampling(logpipeline.parse_sample_rates(os.getenv('MCP_LOG_SAMPLE')))
 
 # Add NullHandler to prevent any accidental console output
 null_handler = logging.NullHandler()
-logger.addHandler(null_handler)
+package_logger.addHandler(null_handler)
 
 # Prevent logging from interfering with MCP protocol stdout/stderr
-logger.propagate = False
+package_logger.propagate = False
 
 # CRITICAL: Ensure root logger doesn't interfere with FastMCP stdout/stderr
 root_logger = logging.getLogger()
@@ -100,6 +123,38 @@ class ChromaSettings:
         self.api_key = args.api_key
         self.ssl = args.ssl
         self.dotenv_path = args.dotenv_path
+        self.executor_workers = args.executor_workers
+        self.executor_queue_depth = args.executor_queue_depth
+        self.tool_concurrency = args.tool_concurrency
+        self.collection_cache_size = args.collection_cache_size
+        self.collection_cache_ttl = args.collection_cache_ttl
+        self.query_embedding_cache_mb = args.query_embedding_cache_mb
+        self.result_cache_mb = args.result_cache_mb
+        self.result_cache_ttl = args.result_cache_ttl
+        self.result_cache_collections = [name.strip() for name in (args.result_cache_collections or '').split(',') if name.strip()]
+        self.payload_stats_every = args.payload_stats_every
+        self.embedding_workers = args.embedding_workers
+        self.warm_embeddings = [name.strip() for name in (args.warm_embeddings or '').split(',') if name.strip()]
+        self.fanout_workers = args.fanout_workers
+        self.fanout_timeout = args.fanout_timeout
+        self.thought_write_behind = args.thought_write_behind
+        self.thought_batch_size = args.thought_batch_size
+        self.thought_flush_ms = args.thought_flush_ms
+        self.thought_graph_cache_size = args.thought_graph_cache_size
+        self.thought_graph_dir = args.thought_graph_dir
+        self.readers = args.readers
+        self.reader_max_staleness = args.reader_max_staleness
+        self.stateless_http = args.stateless_http
+        self.client_max_connections = args.client_max_connections
+        self.client_max_keepalive = args.client_max_keepalive
+        self.client_keepalive_expiry = args.client_keepalive_expiry
+        self.client_http2 = args.client_http2
+        self.client_connect_timeout = args.client_connect_timeout
+        self.client_read_timeout = args.client_read_timeout
+        self.client_compress_min_kb = args.client_compress_min_kb
+        self.client_warm_connections = args.client_warm_connections
+        self.replica_heartbeat_interval = args.replica_heartbeat_interval
+        self.replica_read_after_write = args.replica_read_after_write
 
 
 class ChromaConnector:
@@ -108,6 +163,44 @@ class ChromaConnector:
     def __init__(self, settings: ChromaSettings):
         self.settings = settings
         self.client = None
+        self._http_pool = None
+        self._router = None
+        self._collections = CollectionCache(
+            max_size=settings.collection_cache_size,
+            ttl=settings.collection_cache_ttl,
+        )
+        self._embeddings = get_embedding_registry()
+        self._dimensions: Dict[tuple, int] = {}
+        # Separate from the tool executor so embedding batches can never wait behind the calls that submitted them
+        self._embedding_pool = ThreadPoolExecutor(max_workers=settings.embedding_workers, thread_name_prefix="chroma-mcp-embed")
+        self._fanout_pool = ThreadPoolExecutor(max_workers=settings.fanout_workers, thread_name_prefix="chroma-mcp-fanout")
+        # Fan-out queries still running after their call timed out; they hold fan-out workers until done
+        self._fanout_lock = threading.Lock()
+        self._fanout_abandoned = 0
+        self._fanout_timeouts = 0
+        self._payload_stats = PayloadStats(every=settings.payload_stats_every)
+        self._sessions = SessionIndex()
+        self._session_index_lock = threading.Lock()
+        # Serializes the stored-id check with the add and index update in _commit_thoughts
+        self._thought_commit_lock = threading.Lock()
+        graph_dir = settings.thought_graph_dir
+        if graph_dir is None and settings.client_type == 'persistent':
+            graph_dir = os.path.join(settings.data_dir or "./chroma_data", "thought_graphs")
+        self._graphs = ThoughtGraphStore(max_sessions=settings.thought_graph_cache_size, sidecar_dir=graph_dir)
+        self._thought_buffer = None
+        if settings.thought_write_behind:
+            self._thought_buffer = WriteBehindBuffer(
+                self._commit_thoughts,
+                max_batch=settings.thought_batch_size,
+                max_delay=settings.thought_flush_ms / 1000,
+                name="chroma-mcp-thoughts",
+            )
+        self._query_embedding_cache = EmbeddingCache(max_bytes=int(settings.query_embedding_cache_mb * 1024 * 1024))
+        self._results = ResultCache(
+            max_bytes=int(settings.result_cache_mb * 1024 * 1024),
+            ttl=settings.result_cache_ttl,
+            enabled_collections=settings.result_cache_collections,
+        )
         self._initialize_client()
 
     def _initialize_client(self):
@@ -128,17 +221,27 @@ class ChromaConnector:
                     chroma_client_auth_credentials=self.settings.custom_auth_credentials
                 )
 
+            # The first host is the primary; any others are read replicas
+            (host, port), *replicas = parse_hosts(self.settings.host, self.settings.port)
+
             # Handle SSL configuration with retry and fallback
             try:
                 self.client = chromadb.HttpClient(
-                    host=self.settings.host,
-                    port=self.settings.port if self.settings.port else None,
+                    host=host,
+                    port=port if port else None,
                     ssl=self.settings.ssl,
                     settings=settings
                 )
-                # Test the connection
-                self.client.heartbeat()
-                logger.info(f"Successfully connected to Chroma HTTP server at {self.settings.host}:{self.settings.port}")
+                # Tune the connection pool, then test the connection by opening it
+                self._configure_http_pool()
+                if replicas:
+                    self._router = ReplicaRouter(
+                        {f"{h}:{p}" if p else h: self._replica_connector(h, p, settings) for h, p in replicas},
+                        heartbeat_interval=self.settings.replica_heartbeat_interval,
+                        read_after_write=self.settings.replica_read_after_write,
+                    )
+                logger.info(f"Successfully connected to Chroma HTTP server at {host}:{port}"
+                            + (f" with {len(replicas)} read replicas" if replicas else ""))
             except ssl.SSLError as e:
                 # Log to file only - stderr breaks MCP protocol
                 logger.error(f"SSL connection failed: {str(e)}")
@@ -167,6 +270,7 @@ class ChromaConnector:
                         'x-chroma-token': self.settings.api_key
                     }
                 )
+                self._configure_http_pool()
             except ssl.SSLError as e:
                 # Log to file only - stderr breaks MCP protocol
                 logger.error(f"SSL connection failed: {str(e)}")
@@ -199,15 +303,389 @@ class ChromaConnector:
         else:
             raise ValueError(f"Unsupported client type: {self.settings.client_type}")
 
-    # Known embedding functions mapping
-    _known_embedding_functions: Dict[str, EmbeddingFunction] = {
-        "default": DefaultEmbeddingFunction,
-        "cohere": CohereEmbeddingFunction,
-        "openai": OpenAIEmbeddingFunction,
-        "jina": JinaEmbeddingFunction,
-        "voyageai": VoyageAIEmbeddingFunction,
-        "roboflow": RoboflowEmbeddingFunction,
-    }
+    def _replica_connector(self, host: str, port: Optional[str], settings: Settings) -> Callable[[], Any]:
+        """Return a function that opens a pooled client to one read replica."""
+        def connect():
+            client = chromadb.HttpClient(host=host, port=port if port else None, ssl=self.settings.ssl,
+                                         settings=settings)
+            configure_client(
+                client,
+                max_connections=self.settings.client_max_connections,
+                max_keepalive=self.settings.client_max_keepalive,
+                keepalive_expiry=self.settings.client_keepalive_expiry,
+                http2=self.settings.client_http2,
+                connect_timeout=self.settings.client_connect_timeout,
+                read_timeout=self.settings.client_read_timeout,
+                compress_min_bytes=int(self.settings.client_compress_min_kb * 1024),
+            )
+            return client
+        return connect
+
+    def _configure_http_pool(self):
+        """Apply the connection pool settings to the HTTP client and warm its connections."""
+        self._http_pool = configure_client(
+            self.client,
+            max_connections=self.settings.client_max_connections,
+            max_keepalive=self.settings.client_max_keepalive,
+            keepalive_expiry=self.settings.client_keepalive_expiry,
+            http2=self.settings.client_http2,
+            connect_timeout=self.settings.client_connect_timeout,
+            read_timeout=self.settings.client_read_timeout,
+            compress_min_bytes=int(self.settings.client_compress_min_kb * 1024),
+        )
+        warm = self.settings.client_warm_connections
+        if self.settings.client_max_connections:
+            warm = min(warm, self.settings.client_max_connections)
+        warm_connections(self.client, warm, self.settings.client_connect_timeout)
+
+    # Known embedding functions mapping, shared with the process-wide registry
+    _known_embedding_functions: Dict[str, EmbeddingFunction] = KNOWN_EMBEDDING_FUNCTIONS
+
+    def _collection_key(self, collection_name: str) -> tuple:
+        """Cache key for a collection handle on the current client."""
+        tenant = getattr(self.client, "tenant", None) or self.settings.tenant
+        database = getattr(self.client, "database", None) or self.settings.database
+        return (tenant, database, collection_name)
+
+    def _get_collection(self, collection_name: str):
+        """Return a collection handle, served from the handle cache when possible."""
+        key = self._collection_key(collection_name)
+        collection = self._collections.get(key)
+        if collection is None:
+            collection = self.client.get_collection(collection_name)
+            self._embeddings.share(collection)
+            self._collections.put(key, collection)
+        return collection
+
+    def _replica_collection(self, collection_name: str, host: str, client):
+        """Return a collection handle on a read replica, cached under the replica's host."""
+        key = (host, *self._collection_key(collection_name))
+        collection = self._collections.get(key)
+        if collection is None:
+            collection = client.get_collection(collection_name)
+            self._embeddings.share(collection)
+            self._collections.put(key, collection)
+        return collection
+
+    def _read(self, collection_name: str, read: Callable[[Any], Any]) -> Any:
+        """Run ``read(collection)`` on a read replica when there are any, otherwise on the primary."""
+        if self._router is None:
+            return read(self._get_collection(collection_name))
+        return self._router.run(
+            lambda host, client: read(self._replica_collection(collection_name, host, client)),
+            lambda: read(self._get_collection(collection_name)),
+            self._collection_key(collection_name),
+        )
+
+    def _invalidate_collection(self, collection_name: str):
+        """Drop cached handles for a collection on the primary and every replica."""
+        key = self._collection_key(collection_name)
+        self._collections.invalidate(key)
+        if self._router is not None:
+            for host in self._router.names:
+                self._collections.invalidate((host, *key))
+
+    def close(self):
+        """Release connector resources, committing any buffered thoughts first."""
+        if self._router is not None:
+            self._router.close()
+        if self._thought_buffer is not None:
+            self._thought_buffer.close()
+        self._embedding_pool.shutdown(wait=True)
+        self._fanout_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _embedding_function_for(self, collection) -> Optional[EmbeddingFunction]:
+        """Return the embedding function the connector can call directly for a collection.
+
+        Returns None when Chroma resolves the function itself (a placeholder
+        DefaultEmbeddingFunction or none at all); callers then pass raw text.
+        """
+        embedding_function = collection._embedding_function
+        if embedding_function is None or isinstance(embedding_function, DefaultEmbeddingFunction):
+            return None
+        return embedding_function
+
+    def _validate_embeddings(self, collection_name: str, collection, embeddings: EmbeddingsInput, count: int) -> np.ndarray:
+        """Decode precomputed embeddings and check them against the collection's dimension."""
+        vectors = decode_embeddings(embeddings, count)
+        key = self._collection_key(collection_name)
+        if key not in self._dimensions:
+            dimension = stored_dimension(collection)
+            if dimension is None:
+                return vectors
+            self._dimensions[key] = dimension
+        check_dimension(vectors, self._dimensions[key], collection_name)
+        return vectors
+
+    def _embed_in_batches(
+        self,
+        embedding_function: Optional[EmbeddingFunction],
+        texts: List[str],
+        batch_size: int,
+        max_parallel: int
+    ):
+        """Yield (start, end, embeddings, embed_ms) for each batch of ``texts``, in order.
+
+        Up to ``max_parallel`` batches are embedded ahead of the consumer on
+        the embedding pool. With no embedding function, embeddings are None
+        and Chroma embeds on write.
+        """
+        bounds = [(start, min(start + batch_size, len(texts))) for start in range(0, len(texts), batch_size)]
+
+        def embed(start: int, end: int):
+            embed_start = time.perf_counter()
+            embeddings = embedding_function(texts[start:end]) if embedding_function else None
+            return embeddings, (time.perf_counter() - embed_start) * 1000
+
+        pending = deque()
+        next_batch = 0
+        for start, end in bounds:
+            while next_batch < len(bounds) and len(pending) < max_parallel:
+                pending.append(self._embedding_pool.submit(embed, *bounds[next_batch]))
+                next_batch += 1
+            embeddings, embed_ms = pending.popleft().result()
+            yield start, end, embeddings, embed_ms
+
+    def _embed_queries(self, collection, query_texts: List[str]) -> Optional[List[np.ndarray]]:
+        """Embed query texts through the query-embedding cache.
+
+        Returns None when the collection's embedding function is resolved by
+        Chroma itself, in which case callers fall back to ``query_texts``.
+        """
+        embedding_function = self._embedding_function_for(collection)
+        if embedding_function is None:
+            return None
+        return self._embed_with(embedding_function, query_texts)
+
+    def _embed_with(self, embedding_function: EmbeddingFunction, query_texts: List[str]) -> List[np.ndarray]:
+        """Embed query texts with ``embedding_function`` through the query-embedding cache."""
+        if self._query_embedding_cache.max_bytes <= 0:
+            return [np.asarray(v, dtype=np.float32) for v in embed_queries(embedding_function, query_texts)]
+
+        function_key = embedding_function_key(embedding_function)
+        vectors: List[Optional[np.ndarray]] = []
+        missing = []
+        for i, text in enumerate(query_texts):
+            vector = self._query_embedding_cache.get((function_key, normalize_query_text(text)))
+            vectors.append(vector)
+            if vector is None:
+                missing.append(i)
+
+        if missing:
+            embedded = embed_queries(embedding_function, [query_texts[i] for i in missing])
+            for i, vector in zip(missing, embedded, strict=True):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._query_embedding_cache.put((function_key, normalize_query_text(query_texts[i])), vector)
+                vectors[i] = vector
+        return vectors
+
+    def _cached_read(self, collection_name: str, operation: str, params: Dict, read):
+        """Serve a read from the result cache when enabled for the collection."""
+        collection_key = self._collection_key(collection_name)
+        if not self._results.is_enabled(collection_key):
+            return read()
+        key = self._results.entry_key(collection_key, operation, params)
+        result = self._results.get(key)
+        if result is None:
+            result = read()
+            self._results.put(key, result)
+        return result
+
+    def _record_write(self, collection_name: str):
+        """Invalidate cached results after a write to a collection and pin its reads to the primary for a while."""
+        key = self._collection_key(collection_name)
+        if self._router is not None:
+            # Before the bump, so no read cached under the new generation comes from a lagging replica
+            self._router.record_write(key)
+        self._results.bump(key)
+
+    def refresh_collection(self, collection_name: str):
+        """Drop cached handles and results for a collection written by another process."""
+        self._invalidate_collection(collection_name)
+        self._dimensions.pop(self._collection_key(collection_name), None)
+        self._record_write(collection_name)
+
+    def reopen_client(self):
+        """Reconnect to the database, dropping cached handles but keeping result and embedding caches."""
+        self._initialize_client()
+        self._collections.clear()
+
+    def set_result_cache(self, collection_name: str, enabled: bool) -> str:
+        """Turn the query/get result cache on or off for a collection."""
+        self._results.set_enabled(self._collection_key(collection_name), enabled)
+        state = "enabled" if enabled else "disabled"
+        if enabled and self._results.max_bytes <= 0:
+            return f"Result cache {state} for collection '{collection_name}', but the cache has no memory budget (--result-cache-mb is 0)."
+        return f"Result cache {state} for collection '{collection_name}'."
+
+    def warm_embeddings(self, names: List[str]) -> Dict[str, float]:
+        """Load and test the named embedding functions before serving traffic."""
+        return self._embeddings.warm(names)
+
+    def _session_index(self, thoughts):
+        """Return the session index collection, creating and backfilling it on first use."""
+        try:
+            return self._get_collection(SESSION_INDEX_COLLECTION)
+        except Exception:
+            pass
+        with self._session_index_lock:
+            index = self.client.get_or_create_collection(
+                name=SESSION_INDEX_COLLECTION,
+                embedding_function=thoughts._embedding_function,
+                metadata={"description": "Per-session summaries of sequential thinking sessions"}
+            )
+            self._collections.put(self._collection_key(SESSION_INDEX_COLLECTION), index)
+            if index.count() == 0 and thoughts.count() > 0:
+                sessions = self._sessions.rebuild(index, thoughts)
+                logger.info(f"Built sequential thinking session index for {sessions} sessions")
+                self._record_write(SESSION_INDEX_COLLECTION)
+        return index
+
+    def _thoughts_collection(self):
+        """Return the sequential thinking collection, creating it on first use."""
+        try:
+            return self._get_collection(THOUGHTS_COLLECTION)
+        except Exception:
+            collection = self.client.get_or_create_collection(
+                name=THOUGHTS_COLLECTION,
+                embedding_function=self._embeddings.get("default"),
+                metadata={"description": "Sequential thinking sessions with branching and revision support"}
+            )
+            self._collections.put(self._collection_key(THOUGHTS_COLLECTION), collection)
+            return collection
+
+    def _commit_thoughts(self, thoughts: List[tuple]):
+        """Store a batch of (document_id, thought, metadata) tuples with one add and index update."""
+        collection = self._thoughts_collection()
+        # Resolve the index first so a backfill can never count these thoughts twice
+        session_index = self._session_index(collection)
+        # Keep the first of repeated ids, as separate adds would
+        unique = list({document_id: (document_id, thought, metadata)
+                       for document_id, thought, metadata in reversed(thoughts)}.values())[::-1]
+        embedding_function = self._embedding_function_for(collection)
+        # Embed here so the same vectors feed the session centroids; outside the lock, so
+        # concurrent commits only serialize on the writes
+        embeddings = None
+        if embedding_function:
+            embeddings = np.asarray(embedding_function([thought for _, thought, _ in unique]),
+                                    dtype=np.float32)
+        # Check and add under one lock, or two commits of the same thought could both pass
+        # the check and count it twice in the session index
+        with self._thought_commit_lock:
+            # Chroma ignores adds of existing ids, so resent thoughts must not reach the index
+            # or graphs
+            existing = set(collection.get(ids=[document_id for document_id, _, _ in unique],
+                                          include=[])["ids"])
+            keep = [i for i, row in enumerate(unique) if row[0] not in existing]
+            if not keep:
+                return
+            unique = [unique[i] for i in keep]
+            if embeddings is not None:
+                embeddings = embeddings[keep]
+            ids = [document_id for document_id, _, _ in unique]
+            collection.add(
+                ids=ids,
+                documents=[thought for _, thought, _ in unique],
+                metadatas=[metadata for _, _, metadata in unique],
+                embeddings=embeddings
+            )
+            self._record_write(THOUGHTS_COLLECTION)
+            if self.settings.stateless_http:
+                # Other replicas commit to the same index without this lock; recompute the
+                # touched rows from the stored thoughts instead of incrementing a row one of
+                # them may have just rewritten
+                self._sessions.rebuild(session_index, collection,
+                                       [metadata["session_id"] for _, _, metadata in unique])
+            else:
+                if embeddings is None:
+                    stored = collection.get(ids=ids, include=["embeddings"])
+                    by_id = dict(zip(stored["ids"], stored["embeddings"], strict=True))
+                    embeddings = np.stack([by_id[document_id] for document_id in ids])
+                stale = self._sessions.record_many(session_index, unique, embeddings)
+                if stale:
+                    self._sessions.rebuild(session_index, collection, stale)
+            self._record_write(SESSION_INDEX_COLLECTION)
+            self._graphs.record(unique)
+
+    def _session_graph(self, collection, session_id: str):
+        """Return the session's thought graph, checked against its thought count in the session index."""
+        entry = self._sessions.lookup(self._session_index(collection), [session_id]).get(session_id)
+
+        def load_metadata(session_id: str):
+            rows = collection.get(where={"session_id": session_id}, include=["metadatas"])
+            return zip(rows["ids"], rows["metadatas"], strict=True)
+
+        return self._graphs.get(session_id, entry["thought_count"] if entry else 0, load_metadata)
+
+    def _flush_thoughts(self, session_id: Optional[str] = None):
+        """Commit buffered thoughts so a read sees them; only when ``session_id`` (if given) has any pending.
+
+        Raises if the session's acknowledged thoughts could not be committed,
+        rather than answering from a history that silently lacks them.
+        """
+        if self._thought_buffer is None:
+            return
+        in_session = None if session_id is None else lambda item: item[2]["session_id"] == session_id
+        # Also true while a batch with the session's thoughts is being committed; flush() waits for it
+        flushed = not self._thought_buffer.pending(in_session) or self._thought_buffer.flush()
+        lost = self._thought_buffer.take_dropped(in_session)
+        if lost:
+            ids = ", ".join(document_id for document_id, _, _ in lost)
+            raise RuntimeError(f"{len(lost)} acknowledged thoughts were lost after repeated commit failures: {ids}")
+        if not flushed:
+            raise RuntimeError("Buffered thoughts could not be committed yet; they will be retried")
+
+    def _refresh_sessions(self, collection_name: str, ids: List[str]) -> Callable[[], None]:
+        """Prepare to recompute index rows for the sessions owning ``ids`` after they change.
+
+        Returns a callable to run once the change is applied; a no-op for
+        collections other than the sequential thinking one.
+        """
+        if collection_name != THOUGHTS_COLLECTION:
+            return lambda: None
+        thoughts = self._get_collection(collection_name)
+        owners = thoughts.get(ids=ids, include=["metadatas"])["metadatas"]
+        session_ids = [m.get("session_id") for m in owners if m and m.get("session_id")]
+
+        def refresh():
+            self._graphs.invalidate(session_ids)
+            self._sessions.rebuild(self._session_index(thoughts), thoughts, session_ids)
+            self._record_write(SESSION_INDEX_COLLECTION)
+
+        return refresh
+
+    def get_stats(self) -> Dict:
+        """Return cache statistics for this connector."""
+        return {
+            "collection_cache": self._collections.stats(),
+            "query_embedding_cache": self._query_embedding_cache.stats(),
+            "result_cache": self._results.stats(),
+            "response_format": self._payload_stats.stats(),
+            "thought_write_behind": self._thought_buffer.stats() if self._thought_buffer is not None else None,
+            "thought_graphs": self._graphs.stats(),
+            "http_pool": self._http_pool.stats() if self._http_pool is not None else None,
+            "read_replicas": self._router.stats() if self._router is not None else None,
+            "fanout": {
+                "workers": self.settings.fanout_workers,
+                "timeouts": self._fanout_timeouts,
+                "abandoned_running": self._fanout_abandoned,
+            },
+        }
+
+    def _format_result(self, result: Dict, response_format: ResponseFormat, nested: bool,
+                       metadata_keys: Optional[List[str]], max_chars: Optional[int],
+                       embedding_dtype: str = "float32") -> Dict:
+        """Reshape a result for the response, measuring the bytes saved on sampled responses."""
+        if ResponseFormat(response_format) == ResponseFormat.COLUMNAR:
+            return format_result(result, response_format, nested, embedding_dtype=embedding_dtype)
+        formatted = format_result(result, response_format, nested, metadata_keys, max_chars, embedding_dtype)
+        if not self._payload_stats.sample():
+            return formatted
+        original_bytes = payload_size(result)
+        formatted_bytes = payload_size(formatted)
+        self._payload_stats.record(original_bytes, formatted_bytes)
+        formatted["bytes_saved"] = original_bytes - formatted_bytes
+        return formatted
 
     def list_collections(self, limit: Optional[int] = None, offset: Optional[int] = None) -> List[str]:
         """List all collection names."""
@@ -233,11 +711,8 @@ class ChromaConnector:
     ) -> str:
         """Create a new collection."""
         try:
-            # Get embedding function
-            embedding_function = None
-            if embedding_function_name in self._known_embedding_functions:
-                embedding_function_class = self._known_embedding_functions[embedding_function_name]
-                embedding_function = embedding_function_class()
+            # Get the shared embedding function instance
+            embedding_function = self._embeddings.get(embedding_function_name)
 
             # Create configuration if HNSW parameters are provided
             configuration = None
@@ -261,17 +736,19 @@ class ChromaConnector:
                 configuration=configuration,
                 metadata=metadata
             )
+            self._collections.put(self._collection_key(collection_name), collection)
             return f"Collection '{collection_name}' created successfully."
         except Exception as e:
             raise Exception(f"Failed to create collection: {str(e)}") from e
 
-    def peek_collection(self, collection_name: str, limit: int = 5) -> Dict:
-        """Peek at documents in a collection."""
+    def peek_collection(self, collection_name: str, limit: int = 5, include_embeddings: bool = False,
+                        embedding_dtype: str = "float32") -> Dict:
+        """Peek at documents in a collection, optionally with embeddings as a binary block."""
         try:
-            collection = self.client.get_collection(collection_name)
-            results = collection.peek(limit=limit)
-            # Remove embeddings to avoid serialization issues
-            if 'embeddings' in results:
+            results = self._read(collection_name, lambda collection: collection.peek(limit=limit))
+            if include_embeddings and results.get('embeddings') is not None:
+                results['embeddings'] = encode_embeddings(results['embeddings'], embedding_dtype)
+            elif 'embeddings' in results:
                 del results['embeddings']
             return results
         except Exception as e:
@@ -280,7 +757,7 @@ class ChromaConnector:
     def get_collection_info(self, collection_name: str) -> Dict:
         """Get information about a collection."""
         try:
-            collection = self.client.get_collection(collection_name)
+            collection = self._get_collection(collection_name)
             info = {
                 'name': collection.name,
                 'id': collection.id,
@@ -294,8 +771,7 @@ class ChromaConnector:
     def get_collection_count(self, collection_name: str) -> int:
         """Get document count in a collection."""
         try:
-            collection = self.client.get_collection(collection_name)
-            return collection.count()
+            return self._read(collection_name, lambda collection: collection.count())
         except Exception as e:
             raise Exception(f"Failed to get collection count '{collection_name}': {str(e)}") from e
 
@@ -312,7 +788,7 @@ class ChromaConnector:
     ) -> str:
         """Modify a collection's name or metadata."""
         try:
-            collection = self.client.get_collection(collection_name)
+            collection = self._get_collection(collection_name)
 
             # Update configuration if HNSW parameters are provided
             if any([ef_search, num_threads, batch_size, sync_threshold, resize_factor]):
@@ -330,36 +806,106 @@ class ChromaConnector:
             if new_name or new_metadata:
                 collection.modify(name=new_name, metadata=new_metadata)
 
+            # Re-key the cached handle so the old name no longer resolves
+            self._invalidate_collection(collection_name)
+            self._collections.put(self._collection_key(collection.name), collection)
+            dimension = self._dimensions.pop(self._collection_key(collection_name), None)
+            if dimension is not None:
+                self._dimensions[self._collection_key(collection.name)] = dimension
+            self._record_write(collection_name)
+            if collection.name != collection_name:
+                self._record_write(collection.name)
+
             return f"Collection '{collection_name}' modified successfully."
         except Exception as e:
             raise Exception(f"Failed to modify collection: {str(e)}") from e
 
-    def fork_collection(self, collection_name: str, new_collection_name: str) -> str:
-        """Fork a collection."""
-        try:
-            # Get source collection
-            source_collection = self.client.get_collection(collection_name)
-
-            # Get all documents from source
-            all_docs = source_collection.get()
+    # Metadata key that marks an unfinished fork target with its source, so an
+    # interrupted fork can be resumed. It is removed once the copy completes.
+    FORK_SOURCE_KEY = "chroma_mcp_fork_source"
+
+    def _finish_fork(self, target_collection) -> None:
+        """Clear the fork marker from a completed fork target's metadata."""
+        # modify() replaces the metadata, and a None value drops the key. The distance
+        # space can't be re-sent, but the collection's configuration keeps it.
+        metadata = {
+            key: value for key, value in (target_collection.metadata or {}).items()
+            if key != "hnsw:space"
+        }
+        metadata[self.FORK_SOURCE_KEY] = None
+        target_collection.modify(metadata=metadata)
+
+    def fork_collection(
+        self,
+        collection_name: str,
+        new_collection_name: str,
+        batch_size: int = 1000,
+        progress_callback: Optional[Callable[[float, Optional[float]], None]] = None
+    ) -> str:
+        """Fork a collection, copying stored embeddings page by page.
 
-            # Create new collection with same metadata and configuration
-            target_collection = self.client.create_collection(
-                name=new_collection_name,
-                metadata=source_collection.metadata,
-                embedding_function=source_collection._embedding_function
-            )
+        Memory use is bounded by ``batch_size``. Stored vectors are copied as
+        they are, so nothing is re-embedded. If a previous fork into
+        ``new_collection_name`` was interrupted, copying resumes where it
+        stopped.
+        """
+        try:
+            source_collection = self._get_collection(collection_name)
+            batch_size = max(1, min(batch_size, self.client.get_max_batch_size()))
+            total = source_collection.count()
 
-            # Add all documents to target collection if source has data
-            if all_docs['ids']:
-                target_collection.add(
-                    ids=all_docs['ids'],
-                    documents=all_docs['documents'],
-                    metadatas=all_docs['metadatas'],
-                    embeddings=all_docs['embeddings']
+            try:
+                target_collection = self.client.get_collection(new_collection_name)
+            except NotFoundError:
+                target_collection = None
+
+            if target_collection is None:
+                # Create new collection with same metadata and embedding function, marked
+                # as a fork in progress until the copy completes
+                target_collection = self.client.create_collection(
+                    name=new_collection_name,
+                    metadata={**(source_collection.metadata or {}), self.FORK_SOURCE_KEY: collection_name},
+                    embedding_function=source_collection._embedding_function
                 )
-
-            return f"Successfully forked collection '{collection_name}' to '{new_collection_name}' with {len(all_docs['ids']) if all_docs['ids'] else 0} documents."
+                copied = 0
+            else:
+                if (target_collection.metadata or {}).get(self.FORK_SOURCE_KEY) != collection_name:
+                    raise ValueError(f"Collection '{new_collection_name}' already exists")
+                self._embeddings.share(target_collection)
+                # Pages are written in source order, so the target count is the resume offset
+                copied = target_collection.count()
+                logger.info(f"Resuming fork of '{collection_name}' into '{new_collection_name}' at {copied}/{total}")
+            self._collections.put(self._collection_key(new_collection_name), target_collection)
+            resumed_at = copied
+
+            while True:
+                page = source_collection.get(
+                    limit=batch_size,
+                    offset=copied,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                if not page["ids"]:
+                    break
+                # Upsert keeps a retried page idempotent
+                target_collection.upsert(
+                    ids=page["ids"],
+                    embeddings=page["embeddings"],
+                    documents=page["documents"],
+                    metadatas=page["metadatas"]
+                )
+                copied += len(page["ids"])
+                if progress_callback:
+                    progress_callback(copied, max(total, copied))
+
+            self._finish_fork(target_collection)
+            # The handle's local metadata still lists the cleared marker
+            self._invalidate_collection(new_collection_name)
+            self._record_write(new_collection_name)
+
+            message = f"Successfully forked collection '{collection_name}' to '{new_collection_name}' with {copied} documents."
+            if resumed_at:
+                message += f" Resumed after {resumed_at} previously copied documents."
+            return message
         except Exception as e:
             raise Exception(f"Failed to fork collection: {str(e)}") from e
 
@@ -367,6 +913,18 @@ class ChromaConnector:
         """Delete a collection."""
         try:
             self.client.delete_collection(name=collection_name)
+            self._invalidate_collection(collection_name)
+            self._dimensions.pop(self._collection_key(collection_name), None)
+            self._record_write(collection_name)
+            if collection_name == THOUGHTS_COLLECTION:
+                # The session index only describes the thoughts collection
+                try:
+                    self.client.delete_collection(name=SESSION_INDEX_COLLECTION)
+                except Exception:
+                    pass
+                self._invalidate_collection(SESSION_INDEX_COLLECTION)
+                self._record_write(SESSION_INDEX_COLLECTION)
+                self._graphs.clear()
             return f"Collection '{collection_name}' deleted successfully."
         except Exception as e:
             raise Exception(f"Failed to delete collection: {str(e)}") from e
@@ -376,25 +934,189 @@ class ChromaConnector:
         collection_name: str,
         documents: List[str],
         metadatas: Optional[List[Dict]] = None,
-        ids: Optional[List[str]] = None
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[EmbeddingsInput] = None
     ) -> str:
-        """Add documents to a collection."""
+        """Add documents to a collection, optionally with precomputed embeddings."""
         try:
-            collection = self.client.get_collection(collection_name)
+            collection = self._get_collection(collection_name)
 
             # Generate IDs if not provided
             if ids is None:
                 ids = [str(uuid.uuid4()) for _ in documents]
 
+            if embeddings is not None:
+                embeddings = self._validate_embeddings(collection_name, collection, embeddings, len(documents))
+
             collection.add(
                 documents=documents,
                 metadatas=metadatas,
-                ids=ids
+                ids=ids,
+                embeddings=embeddings
             )
+            self._record_write(collection_name)
             return f"Added {len(documents)} documents to collection '{collection_name}'."
         except Exception as e:
             raise Exception(f"Failed to add documents: {str(e)}") from e
 
+    def bulk_add_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        max_parallel: Optional[int] = None,
+        progress_callback: Optional[Callable[[float, Optional[float]], None]] = None
+    ) -> Dict:
+        """Add a large number of documents in batches with parallel embedding.
+
+        Input is split at the client's maximum batch size. Up to
+        ``max_parallel`` batches are embedded concurrently ahead of the
+        writer, while batches are committed strictly in input order.
+        """
+        added = 0
+        try:
+            if not documents:
+                raise ValueError("'documents' cannot be empty")
+            if ids is None:
+                ids = [str(uuid.uuid4()) for _ in documents]
+            if len(ids) != len(documents):
+                raise ValueError(f"Length of 'ids' ({len(ids)}) must match length of 'documents' ({len(documents)})")
+            if metadatas is not None and len(metadatas) != len(documents):
+                raise ValueError(f"Length of 'metadatas' ({len(metadatas)}) must match length of 'documents' ({len(documents)})")
+
+            collection = self._get_collection(collection_name)
+            max_batch_size = self.client.get_max_batch_size()
+            batch_size = max(1, min(batch_size or max_batch_size, max_batch_size))
+            max_parallel = max(1, max_parallel or self.settings.embedding_workers)
+            embedding_function = self._embedding_function_for(collection)
+
+            started = time.perf_counter()
+            timings = []
+            batches = self._embed_in_batches(embedding_function, documents, batch_size, max_parallel)
+            for index, (start, end, embeddings, embed_ms) in enumerate(batches):
+                write_start = time.perf_counter()
+                collection.add(
+                    ids=ids[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end] if metadatas is not None else None,
+                    embeddings=embeddings
+                )
+                added = end
+                timings.append({
+                    "batch": index,
+                    "size": end - start,
+                    "embed_ms": round(embed_ms, 1),
+                    "write_ms": round((time.perf_counter() - write_start) * 1000, 1),
+                })
+                if progress_callback:
+                    progress_callback(added, len(documents))
+
+            return {
+                "collection": collection_name,
+                "documents_added": added,
+                "batch_size": batch_size,
+                "embedded_by": "server" if embedding_function else "chroma",
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+                "batches": timings,
+            }
+        except Exception as e:
+            raise Exception(f"Failed to bulk add documents ({added} committed): {str(e)}") from e
+        finally:
+            if added:
+                self._record_write(collection_name)
+
+    # Metadata key holding the SHA-256 of a document's text, used to skip unchanged documents
+    CONTENT_HASH_KEY = "content_hash"
+
+    def upsert_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        ids: List[str],
+        metadatas: Optional[List[Dict]] = None
+    ) -> Dict:
+        """Insert or update documents, re-embedding only those whose content changed.
+
+        Each document's content hash is stored in its metadata. Existing
+        hashes are read with one batched get per client batch, so unchanged
+        documents are skipped, and documents whose only change is metadata
+        are updated without being re-embedded. Metadata is replaced, so keys
+        missing from ``metadatas`` are removed from stored documents.
+        """
+        try:
+            if not ids:
+                raise ValueError("'ids' parameter cannot be empty")
+            if len(ids) != len(documents):
+                raise ValueError(f"Length of 'ids' ({len(ids)}) must match length of 'documents' ({len(documents)})")
+            if metadatas is not None and len(metadatas) != len(documents):
+                raise ValueError(f"Length of 'metadatas' ({len(metadatas)}) must match length of 'documents' ({len(documents)})")
+
+            collection = self._get_collection(collection_name)
+            batch_size = self.client.get_max_batch_size()
+            embedding_function = self._embedding_function_for(collection)
+            counts = {"inserted": 0, "updated": 0, "metadata_only": 0, "skipped": 0}
+
+            for start in range(0, len(ids), batch_size):
+                chunk_ids = ids[start:start + batch_size]
+                existing = collection.get(ids=chunk_ids, include=["metadatas"])
+                stored = {
+                    doc_id: (existing["metadatas"][i] if existing["metadatas"] else None) or {}
+                    for i, doc_id in enumerate(existing["ids"])
+                }
+
+                changed = []
+                metadata_changed = []
+                for offset, doc_id in enumerate(chunk_ids):
+                    i = start + offset
+                    content_hash = hashlib.sha256(documents[i].encode("utf-8")).hexdigest()
+                    metadata = {**((metadatas[i] if metadatas else None) or {}), self.CONTENT_HASH_KEY: content_hash}
+                    if doc_id not in stored:
+                        counts["inserted"] += 1
+                        changed.append((doc_id, documents[i], metadata))
+                        continue
+                    # Chroma merges metadata on write; None deletes the keys the caller dropped
+                    replacement = {**{key: None for key in stored[doc_id] if key not in metadata}, **metadata}
+                    if stored[doc_id].get(self.CONTENT_HASH_KEY) != content_hash:
+                        counts["updated"] += 1
+                        changed.append((doc_id, documents[i], replacement))
+                    elif stored[doc_id] != metadata:
+                        counts["metadata_only"] += 1
+                        metadata_changed.append((doc_id, replacement))
+                    else:
+                        counts["skipped"] += 1
+
+                if changed:
+                    texts = [document for _, document, _ in changed]
+                    # Split so every embedding worker gets a share of the changed documents
+                    embed_batch = max(1, -(-len(texts) // self.settings.embedding_workers))
+                    batches = self._embed_in_batches(embedding_function, texts, embed_batch,
+                                                     self.settings.embedding_workers)
+                    for batch_start, batch_end, embeddings, _ in batches:
+                        collection.upsert(
+                            ids=[doc_id for doc_id, _, _ in changed[batch_start:batch_end]],
+                            documents=texts[batch_start:batch_end],
+                            metadatas=[metadata for _, _, metadata in changed[batch_start:batch_end]],
+                            embeddings=embeddings
+                        )
+                if metadata_changed:
+                    collection.update(
+                        ids=[doc_id for doc_id, _ in metadata_changed],
+                        metadatas=[metadata for _, metadata in metadata_changed]
+                    )
+
+            if counts["inserted"] or counts["updated"] or counts["metadata_only"]:
+                self._record_write(collection_name)
+
+            return {
+                "collection": collection_name,
+                **counts,
+                "embedded": counts["inserted"] + counts["updated"],
+            }
+        except Exception as e:
+            raise Exception(f"Failed to upsert documents: {str(e)}") from e
+
     def query_documents(
         self,
         collection_name: str,
@@ -402,21 +1124,178 @@ class ChromaConnector:
         n_results: int = 5,
         where: Optional[Dict] = None,
         where_document: Optional[Dict] = None,
-        include: List[str] = ["documents", "metadatas", "distances"]
+        include: List[str] = ["documents", "metadatas", "distances"],
+        response_format: ResponseFormat = ResponseFormat.COLUMNAR,
+        metadata_keys: Optional[List[str]] = None,
+        max_chars: Optional[int] = None,
+        embedding_dtype: str = "float32"
     ) -> Dict:
         """Query documents from a collection."""
         try:
-            collection = self.client.get_collection(collection_name)
-            results = collection.query(
-                query_texts=query_texts,
+            result = self._query(collection_name, query_texts, n_results, where, where_document, include)
+            return self._format_result(result, response_format, True, metadata_keys, max_chars, embedding_dtype)
+        except Exception as e:
+            raise Exception(f"Failed to query documents: {str(e)}") from e
+
+    def _query(
+        self,
+        collection_name: str,
+        query_texts: List[str],
+        n_results: int,
+        where: Optional[Dict],
+        where_document: Optional[Dict],
+        include: List[str],
+        query_embeddings: Optional[List[np.ndarray]] = None
+    ) -> Dict:
+        """Run one collection query through the result cache, embedding the texts unless given vectors."""
+        def query(collection):
+            embeddings = query_embeddings
+            if embeddings is None:
+                embeddings = self._embed_queries(collection, query_texts)
+            return collection.query(
+                query_texts=query_texts if embeddings is None else None,
+                query_embeddings=embeddings,
                 n_results=n_results,
                 where=where,
                 where_document=where_document,
                 include=include
             )
-            return results
+
+        def read():
+            return self._read(collection_name, query)
+
+        params = {
+            "query_texts": query_texts,
+            "n_results": n_results,
+            "where": where,
+            "where_document": where_document,
+            "include": include,
+        }
+        return self._cached_read(collection_name, "query", params, read)
+
+    def _abandon_fanout(self, still_running: List[Future]):
+        """Record a timed-out fan-out and track its uncancellable queries until they finish."""
+        def finished(_):
+            with self._fanout_lock:
+                self._fanout_abandoned -= 1
+
+        with self._fanout_lock:
+            self._fanout_timeouts += 1
+            self._fanout_abandoned += len(still_running)
+        for future in still_running:
+            future.add_done_callback(finished)
+        if still_running:
+            logger.warning(f"{len(still_running)} fan-out queries outlived their timeout and keep running")
+
+    @staticmethod
+    def _distance_space(collection) -> str:
+        """Distance function of a collection's index, defaulting to Chroma's l2."""
+        configuration = getattr(collection, "configuration_json", None) or {}
+        for index in ("hnsw", "spann"):
+            space = (configuration.get(index) or {}).get("space")
+            if space:
+                return space
+        return (collection.metadata or {}).get("hnsw:space", "l2")
+
+    def query_collections(
+        self,
+        collection_names: List[str],
+        query_texts: List[str],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+        where_document: Optional[Dict] = None,
+        include: List[str] = ["documents", "metadatas", "distances"],
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """Query several collections concurrently and merge hits into one top-k per query.
+
+        The query is embedded once and distances are merged as they are, so
+        every collection must use the same embedding function, configuration
+        and distance function. Collections that do not answer
+        within ``timeout`` seconds are listed under ``timed_out``, the merged
+        results cover the rest and ``incomplete`` is set. Queries that had
+        already started cannot be cancelled; they are listed under
+        ``still_running`` and hold a fan-out worker until they finish.
+        """
+        try:
+            collection_names = list(dict.fromkeys(collection_names))
+            if not collection_names:
+                raise ValueError("collection_names must not be empty")
+            if not query_texts:
+                raise ValueError("query_texts must not be empty")
+
+            collections = {name: self._get_collection(name) for name in collection_names}
+            # Distances are only comparable under the same embedding function and distance function
+            spaces = {name: (embedding_function_key(collection._embedding_function),
+                             self._distance_space(collection))
+                      for name, collection in collections.items()}
+            if len(set(spaces.values())) > 1:
+                detail = ", ".join(f"{name}={key[0]}/{space}" for name, (key, space) in spaces.items())
+                raise ValueError(f"Collections do not share an embedding space ({detail})")
+
+            first = collections[collection_names[0]]
+            query_embeddings = self._embed_queries(first, query_texts)
+            if query_embeddings is None and isinstance(first._embedding_function, DefaultEmbeddingFunction):
+                # Chroma would embed the text again for every collection; embed once with the shared default model
+                query_embeddings = self._embed_with(self._embeddings.get("default"), query_texts)
+            include = list(dict.fromkeys(list(include) + ["distances"]))
+            timeout = self.settings.fanout_timeout if timeout is None else timeout
+
+            start = time.perf_counter()
+            futures = {
+                self._fanout_pool.submit(self._query, name, query_texts, n_results, where, where_document,
+                                         include, query_embeddings): name
+                for name in collection_names
+            }
+            done, not_done = wait(futures, timeout=timeout)
+            still_running = [future for future in not_done if not future.cancel()]
+            if not_done:
+                self._abandon_fanout(still_running)
+
+            responses = {}
+            errors = {}
+            for future in done:
+                name = futures[future]
+                try:
+                    responses[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+            if errors and not responses:
+                raise RuntimeError("; ".join(f"{name}: {message}" for name, message in errors.items()))
+
+            fields = [field for field in ("documents", "metadatas", "embeddings") if field in include]
+            merged: Dict[str, List[List[Any]]] = {key: [] for key in ["ids", "distances", "collections", *fields]}
+            for q in range(len(query_texts)):
+                hits = []
+                # Iterate in request order so ties break deterministically
+                for name in collection_names:
+                    response = responses.get(name)
+                    if response is None:
+                        continue
+                    hits_of = zip(response["ids"][q], response["distances"][q], strict=True)
+                    for rank, (doc_id, distance) in enumerate(hits_of):
+                        hits.append((distance, name, rank, doc_id))
+                top = heapq.nsmallest(n_results, hits, key=lambda hit: hit[0])
+                merged["ids"].append([doc_id for _, _, _, doc_id in top])
+                merged["distances"].append([float(distance) for distance, _, _, _ in top])
+                merged["collections"].append([name for _, name, _, _ in top])
+                for field in fields:
+                    merged[field].append([responses[name][field][q][rank] for _, name, rank, _ in top])
+
+            if "embeddings" in merged:
+                merged["embeddings"] = [encode_embeddings(rows) for rows in merged["embeddings"]]
+
+            return {
+                **merged,
+                "searched": [name for name in collection_names if name in responses],
+                "timed_out": [futures[future] for future in not_done],
+                "still_running": [futures[future] for future in still_running],
+                "errors": errors,
+                "incomplete": bool(not_done or errors),
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
         except Exception as e:
-            raise Exception(f"Failed to query documents: {str(e)}") from e
+            raise Exception(f"Failed to query collections: {str(e)}") from e
 
     def get_documents(
         self,
@@ -426,23 +1305,83 @@ class ChromaConnector:
         where_document: Optional[Dict] = None,
         include: List[str] = ["documents", "metadatas"],
         limit: Optional[int] = None,
-        offset: Optional[int] = None
+        offset: Optional[int] = None,
+        response_format: ResponseFormat = ResponseFormat.COLUMNAR,
+        metadata_keys: Optional[List[str]] = None,
+        max_chars: Optional[int] = None,
+        embedding_dtype: str = "float32",
+        cursor: Optional[str] = None
     ) -> Dict:
-        """Get documents from a collection."""
+        """Get documents from a collection.
+
+        When ``limit`` is set without ``ids`` the response carries a
+        ``next_cursor`` token (None on the last page); pass it back as
+        ``cursor`` to continue the scan.
+        """
         try:
-            collection = self.client.get_collection(collection_name)
-            results = collection.get(
-                ids=ids,
-                where=where,
-                where_document=where_document,
-                include=include,
-                limit=limit,
-                offset=offset
-            )
-            return results
+            if ids is None and (limit is not None or cursor is not None):
+                return self._get_page(collection_name, where, where_document, include, limit, offset, cursor,
+                                      response_format, metadata_keys, max_chars, embedding_dtype)
+
+            def read():
+                return self._read(collection_name, lambda collection: collection.get(
+                    ids=ids,
+                    where=where,
+                    where_document=where_document,
+                    include=include,
+                    limit=limit,
+                    offset=offset
+                ))
+
+            params = {
+                "ids": ids,
+                "where": where,
+                "where_document": where_document,
+                "include": include,
+                "limit": limit,
+                "offset": offset,
+            }
+            result = self._cached_read(collection_name, "get", params, read)
+            return self._format_result(result, response_format, False, metadata_keys, max_chars, embedding_dtype)
         except Exception as e:
             raise Exception(f"Failed to get documents: {str(e)}") from e
 
+    def _get_page(self, collection_name: str, where: Optional[Dict], where_document: Optional[Dict],
+                  include: List[str], limit: Optional[int], offset: Optional[int], cursor: Optional[str],
+                  response_format: ResponseFormat, metadata_keys: Optional[List[str]], max_chars: Optional[int],
+                  embedding_dtype: str) -> Dict:
+        """Read one cursor page of a get, continuing after the last id the previous page returned."""
+        fingerprint = filter_fingerprint(collection_name, where, where_document)
+        last_id = None
+        if cursor is not None:
+            if offset is not None:
+                raise ValueError("Pass either 'cursor' or 'offset', not both")
+            offset, last_id = decode_cursor(cursor, fingerprint)
+        limit = limit or 100
+
+        def read(window_limit: int, window_offset: int) -> Dict:
+            def fetch():
+                return self._read(collection_name, lambda collection: collection.get(
+                    where=where,
+                    where_document=where_document,
+                    include=include,
+                    limit=window_limit,
+                    offset=window_offset
+                ))
+
+            params = {
+                "where": where,
+                "where_document": where_document,
+                "include": include,
+                "limit": window_limit,
+                "offset": window_offset,
+            }
+            return self._cached_read(collection_name, "get", params, fetch)
+
+        page, position = read_page(read, limit, offset or 0, last_id)
+        formatted = self._format_result(page, response_format, False, metadata_keys, max_chars, embedding_dtype)
+        return {**formatted, "next_cursor": encode_cursor(*position, fingerprint) if position else None}
+
     def update_documents(
         self,
         collection_name: str,
@@ -467,13 +1406,16 @@ class ChromaConnector:
             if documents and len(documents) != len(ids):
                 raise ValueError(f"Length of 'documents' ({len(documents)}) must match length of 'ids' ({len(ids)})")
 
-            collection = self.client.get_collection(collection_name)
+            collection = self._get_collection(collection_name)
+            refresh_sessions = self._refresh_sessions(collection_name, ids)
             collection.update(
                 ids=ids,
                 embeddings=embeddings,
                 metadatas=metadatas,
                 documents=documents
             )
+            self._record_write(collection_name)
+            refresh_sessions()
             return f"Updated {len(ids)} documents in collection '{collection_name}'."
         except Exception as e:
             raise Exception(f"Failed to update documents: {str(e)}") from e
@@ -484,8 +1426,11 @@ class ChromaConnector:
             if not ids:
                 raise ValueError("'ids' parameter cannot be empty")
 
-            collection = self.client.get_collection(collection_name)
+            collection = self._get_collection(collection_name)
+            refresh_sessions = self._refresh_sessions(collection_name, ids)
             collection.delete(ids=ids)
+            self._record_write(collection_name)
+            refresh_sessions()
             return f"Deleted {len(ids)} documents from collection '{collection_name}'."
         except Exception as e:
             raise Exception(f"Failed to delete documents: {str(e)}") from e
@@ -516,15 +1461,7 @@ class ChromaConnector:
             if branch_from_thought is not None and branch_id is None:
                 branch_id = str(uuid.uuid4())[:8]
 
-            # Create or get the sequential thinking collection
-            collection_name = "sequential_thinking"
-            try:
-                collection = self.client.get_collection(collection_name)
-            except:
-                collection = self.client.create_collection(
-                    name=collection_name,
-                    metadata={"description": "Sequential thinking sessions with branching and revision support"}
-                )
+            collection_name = THOUGHTS_COLLECTION
 
             # Create document ID
             doc_id = f"{session_id}_{thought_number}"
@@ -559,19 +1496,20 @@ class ChromaConnector:
             if needs_more_thoughts is not None:
                 metadata["needs_more_thoughts"] = needs_more_thoughts
 
-            # Add the thought to the collection
-            collection.add(
-                ids=[doc_id],
-                documents=[thought],
-                metadatas=[metadata]
-            )
+            # Add the thought to the collection, or queue it for the next group commit
+            if self._thought_buffer is not None:
+                self._thought_buffer.submit((doc_id, thought, metadata))
+                status = "queued"
+            else:
+                self._commit_thoughts([(doc_id, thought, metadata)])
+                status = "stored"
 
             return {
                 "session_id": session_id,
                 "document_id": doc_id,
                 "thought_number": thought_number,
                 "branch_id": branch_id,
-                "status": "stored",
+                "status": status,
                 "collection": collection_name,
                 "metadata": metadata
             }
@@ -586,75 +1524,78 @@ class ChromaConnector:
         query_text: Optional[str] = None,
         n_results: int = 5
     ) -> Dict:
-        """Find similar sequential thinking sessions."""
+        """Find similar sequential thinking sessions.
+
+        Sessions come from the session index: ranked by centroid distance
+        to ``query_text`` when given, otherwise by planned thought count.
+        Without ``query_text`` the ranking reads every matching index row,
+        since Chroma cannot order a get (see ``SessionIndex.find``). Every
+        thought of each returned session is then read, so the cost also
+        grows with the length of those sessions.
+        """
         try:
-            collection_name = "sequential_thinking"
+            self._flush_thoughts()
+            collection_name = THOUGHTS_COLLECTION
             try:
-                collection = self.client.get_collection(collection_name)
+                collection = self._get_collection(collection_name)
             except:
                 return {"sessions": [], "message": "No sequential thinking collection found"}
+            index = self._session_index(collection)
+
+            def session_entry(entry: Dict) -> Dict:
+                return {
+                    "session_id": entry["session_id"],
+                    "thoughts": [],
+                    "total_thoughts": entry.get("total_thoughts", 0),
+                    "session_type": entry.get("session_type", "unknown"),
+                    "thought_count": entry.get("thought_count", 0),
+                    "last_updated": entry.get("last_updated"),
+                    "has_branches": entry.get("has_branches", False),
+                    "has_revisions": entry.get("has_revisions", False),
+                    "summary": entry.get("summary"),
+                }
 
-            # Build where filter
-            where = {}
-            if session_type:
-                where["session_type"] = session_type
-
-            # If query_text provided, use semantic search
-            if query_text:
-                results = collection.query(
-                    query_texts=[query_text],
-                    n_results=n_results,
-                    where=where if where else None,
-                    include=["documents", "metadatas", "distances"]
-                )
-            else:
-                # Get all matching documents
-                results = collection.get(
-                    where=where if where else None,
-                    include=["documents", "metadatas"]
-                )
-
-            # Group by session and apply filters
-            sessions = {}
-            if results["ids"]:
+            def add_thoughts(sessions: Dict[str, Dict], results: Dict):
                 for i, doc_id in enumerate(results["ids"]):
                     metadata = results["metadatas"][i] if results["metadatas"] else {}
-                    session_id = metadata.get("session_id")
-                    if session_id:
-                        if session_id not in sessions:
-                            sessions[session_id] = {
-                                "session_id": session_id,
-                                "thoughts": [],
-                                "total_thoughts": metadata.get("total_thoughts", 0),
-                                "session_type": metadata.get("session_type", "unknown")
-                            }
-                        sessions[session_id]["thoughts"].append({
+                    session = sessions.get(metadata.get("session_id"))
+                    if session is not None:
+                        session["thoughts"].append({
                             "document_id": doc_id,
                             "thought_number": metadata.get("thought_number"),
                             "content": results["documents"][i] if results["documents"] else "",
                             "metadata": metadata
                         })
 
-            # Apply count filters
-            filtered_sessions = []
-            for session in sessions.values():
-                thought_count = len(session["thoughts"])
-                if min_thought_count and thought_count < min_thought_count:
-                    continue
-                if max_thought_count and thought_count > max_thought_count:
-                    continue
-                filtered_sessions.append(session)
+            if not query_text:
+                entries, total_found = self._sessions.find(index, session_type, min_thought_count,
+                                                           max_thought_count, n_results)
+                sessions = {entry["session_id"]: session_entry(entry) for entry in entries}
+                if sessions:
+                    add_thoughts(sessions, collection.get(
+                        where={"session_id": {"$in": list(sessions)}},
+                        include=["documents", "metadatas"]
+                    ))
+                return {
+                    "sessions": list(sessions.values()),
+                    "total_found": total_found
+                }
 
-            # Sort by relevance if semantic search, otherwise by total thoughts
-            if query_text and "distances" in results:
-                # Sort by best match
-                pass  # Already ordered by similarity
-            else:
-                filtered_sessions.sort(key=lambda x: x["total_thoughts"], reverse=True)
+            # One k-NN over session centroids, filters applied by Chroma
+            query_embeddings = self._embed_queries(collection, [query_text])
+            entries = self._sessions.nearest(index, query_embeddings[0] if query_embeddings else None, query_text,
+                                             session_type, min_thought_count, max_thought_count, n_results)
+            sessions = {entry["session_id"]: {**session_entry(entry), "distance": entry["distance"]}
+                        for entry in entries}
+            if sessions:
+                add_thoughts(sessions, collection.get(
+                    where={"session_id": {"$in": list(sessions)}},
+                    include=["documents", "metadatas"]
+                ))
 
             return {
-                "sessions": filtered_sessions[:n_results],
-                "total_found": len(filtered_sessions)
+                "sessions": list(sessions.values()),
+                "total_found": len(sessions)
             }
         except Exception as e:
             raise Exception(f"Failed to get similar sessions: {str(e)}") from e
@@ -665,19 +1606,28 @@ class ChromaConnector:
         include_branches: bool = True,
         sort_by_number: bool = True
     ) -> Dict:
-        """Retrieve complete thought history for a session."""
+        """Retrieve complete thought history for a session.
+
+        Without branches, the thought graph selects the main-line ids so
+        branch thoughts are never read.
+        """
         try:
-            collection_name = "sequential_thinking"
+            self._flush_thoughts(session_id)
+            collection_name = THOUGHTS_COLLECTION
             try:
-                collection = self.client.get_collection(collection_name)
+                collection = self._get_collection(collection_name)
             except:
                 return {"thoughts": [], "message": "No sequential thinking collection found"}
 
-            # Get all thoughts for the session
-            results = collection.get(
-                where={"session_id": session_id},
-                include=["documents", "metadatas"]
-            )
+            if include_branches:
+                # Get all thoughts for the session
+                results = collection.get(
+                    where={"session_id": session_id},
+                    include=["documents", "metadatas"]
+                )
+            else:
+                main_line = self._session_graph(collection, session_id).main_line()
+                results = collection.get(ids=main_line, include=["documents", "metadatas"]) if main_line else {"ids": []}
 
             if not results["ids"]:
                 return {"thoughts": [], "session_id": session_id, "message": "No thoughts found for this session"}
@@ -718,84 +1668,120 @@ class ChromaConnector:
     def get_thought_branches(
         self,
         session_id: str,
-        thought_number: Optional[int] = None
+        thought_number: Optional[int] = None,
+        include_content: bool = True
     ) -> Dict:
-        """Retrieve branches stemming from a session or specific thought."""
+        """Retrieve branches stemming from a session or specific thought.
+
+        Branch structure comes from the session's thought graph; only branch
+        thoughts are read, and only when ``include_content`` is set.
+        """
         try:
-            collection_name = "sequential_thinking"
+            self._flush_thoughts(session_id)
+            collection_name = THOUGHTS_COLLECTION
             try:
-                collection = self.client.get_collection(collection_name)
+                collection = self._get_collection(collection_name)
             except:
                 return {"branches": [], "message": "No sequential thinking collection found"}
 
-            # Get all thoughts for the session
-            where_filter = {"session_id": session_id}
-            if thought_number is not None:
-                where_filter["branch_from_thought"] = thought_number
-
-            results = collection.get(
-                where=where_filter,
-                include=["documents", "metadatas"]
-            )
-
-            # Group by branch_id
-            branches = {}
-            for i, doc_id in enumerate(results["ids"]):
-                metadata = results["metadatas"][i] if results["metadatas"] else {}
-                branch_id = metadata.get("branch_id")
-
-                if branch_id:  # Only include actual branches
-                    if branch_id not in branches:
-                        branches[branch_id] = {
-                            "branch_id": branch_id,
-                            "branch_from_thought": metadata.get("branch_from_thought"),
-                            "thoughts": []
-                        }
-
-                    branches[branch_id]["thoughts"].append({
+            graph = self._session_graph(collection, session_id)
+            branches = graph.branches(thought_number)
+
+            bodies = {}
+            branch_ids = [doc_id for branch in branches for doc_id in branch["thoughts"]]
+            if include_content and branch_ids:
+                results = collection.get(ids=branch_ids, include=["documents", "metadatas"])
+                bodies = {doc_id: (document, metadata) for doc_id, document, metadata
+                          in zip(results["ids"], results["documents"], results["metadatas"],
+                                 strict=True)}
+
+            for branch in branches:
+                thoughts = []
+                for doc_id in branch["thoughts"]:
+                    node = graph.nodes[doc_id]
+                    thought = {
                         "document_id": doc_id,
-                        "content": results["documents"][i] if results["documents"] else "",
-                        "thought_number": metadata.get("thought_number"),
-                        "timestamp": metadata.get("timestamp"),
-                        "metadata": metadata
-                    })
-
-            # Sort thoughts within each branch
-            for branch in branches.values():
-                branch["thoughts"].sort(key=lambda x: x["thought_number"] or 0)
+                        "thought_number": node.get("thought_number"),
+                        "timestamp": node.get("timestamp"),
+                    }
+                    if include_content:
+                        document, metadata = bodies.get(doc_id, ("", {}))
+                        thought["content"] = document or ""
+                        thought["metadata"] = metadata
+                    thoughts.append(thought)
+                branch["thoughts"] = thoughts
 
             return {
                 "session_id": session_id,
                 "filter_thought": thought_number,
-                "branches": list(branches.values()),
+                "branches": branches,
                 "total_branches": len(branches)
             }
         except Exception as e:
             raise Exception(f"Failed to get thought branches: {str(e)}") from e
 
+    def get_thought_graph(self, session_id: str) -> Dict:
+        """Return a session's thought structure (main line, branches, revisions) without thought bodies."""
+        try:
+            self._flush_thoughts(session_id)
+            try:
+                collection = self._get_collection(THOUGHTS_COLLECTION)
+            except:
+                return {"session_id": session_id, "main_line": [], "branches": [], "revisions": []}
+
+            graph = self._session_graph(collection, session_id)
+            return {
+                "session_id": session_id,
+                "thought_count": len(graph),
+                "main_line": [
+                    {"document_id": doc_id, "thought_number": graph.nodes[doc_id].get("thought_number")}
+                    for doc_id in graph.main_line()
+                ],
+                "branches": graph.branches(),
+                "revisions": graph.revisions()
+            }
+        except Exception as e:
+            raise Exception(f"Failed to get thought graph: {str(e)}") from e
+
     def continue_thought_chain(
         self,
         session_id: str,
         analysis_type: str = "continuation"
     ) -> Dict:
-        """Analyze the last thought and provide continuation suggestions."""
-        try:
-            # Get the thought history first
-            history = self.get_thought_history(session_id, include_branches=False)
+        """Analyze the last thought and provide continuation suggestions.
 
-            if not history["thoughts"]:
+        Reads the session's index row and its last main-line thought only.
+        """
+        try:
+            self._flush_thoughts(session_id)
+            try:
+                collection = self._get_collection(THOUGHTS_COLLECTION)
+            except:
+                return {"analysis": "No thoughts found for this session", "suggestions": []}
+            index = self._session_index(collection)
+
+            entry = self._sessions.lookup(index, [session_id]).get(session_id)
+            if entry is not None and "last_thought_id" not in entry:
+                # Row written before the last-thought pointer existed
+                self._sessions.rebuild(index, collection, [session_id])
+                self._record_write(SESSION_INDEX_COLLECTION)
+                entry = self._sessions.lookup(index, [session_id]).get(session_id)
+            last = None
+            if entry and entry["last_thought_id"]:
+                last = collection.get(ids=[entry["last_thought_id"]], include=["documents"])
+            if not last or not last["ids"]:
                 return {"analysis": "No thoughts found for this session", "suggestions": []}
 
-            # Get the last thought
-            last_thought = history["thoughts"][-1]
+            content = last["documents"][0] or ""
+            thought_count = entry["main_thought_count"]
 
             # Create analysis based on type
             analysis = {
                 "session_id": session_id,
-                "last_thought_number": last_thought["thought_number"],
-                "last_thought_content": last_thought["content"][:200] + "..." if len(last_thought["content"]) > 200 else last_thought["content"],
+                "last_thought_number": entry["last_thought_number"],
+                "last_thought_content": content[:200] + "..." if len(content) > 200 else content,
                 "analysis_type": analysis_type,
-                "total_thoughts_so_far": len(history["thoughts"]),
+                "total_thoughts_so_far": thought_count,
                 "suggestions": []
             }
 
@@ -822,7 +1808,7 @@ class ChromaConnector:
                     "Investigate a related but distinct aspect"
                 ]
 
-            analysis["recommendation"] = f"Based on {len(history['thoughts'])} thoughts in this session, consider {analysis_type} to further develop your reasoning."
+            analysis["recommendation"] = f"Based on {thought_count} thoughts in this session, consider {analysis_type} to further develop your reasoning."
 
             return analysis
         except Exception as e:
@@ -844,10 +1830,22 @@ class ChromaMCPServer(FastMCP):
             # 1. Store settings
             self.settings = settings
 
-            # 2. Initialize business logic layer
-            self.connector = ChromaConnector(settings)
+            # 2. Initialize business logic layer and the worker pool that runs it
+            if settings.readers:
+                self.connector = ProcessTopology(settings, settings.readers)
+            else:
+                self.connector = ChromaConnector(settings)
+            self.executor = ToolExecutor(
+                max_workers=settings.executor_workers,
+                queue_depth=settings.executor_queue_depth,
+                tool_limits=settings.tool_concurrency,
+            )
 
             # 3. Initialize FastMCP parent
+            if settings.stateless_http:
+                # No MCP session state and plain JSON replies, so any replica can serve any request
+                kwargs.setdefault("stateless_http", True)
+                kwargs.setdefault("json_response", True)
             super().__init__(name=name, instructions=instructions, **kwargs)
 
             # 4. Setup tools AFTER FastMCP initialization
@@ -857,8 +1855,16 @@ class ChromaMCPServer(FastMCP):
             logger.error(f"Failed to initialize ChromaMCPServer: {str(e)}")
             raise
 
+    def close(self):
+        """Release server resources."""
+        self.executor.shutdown()
+        self.connector.close()
+
     def setup_tools(self):
         """Setup all MCP tools - The Working Magic from FastMCP template."""
+        # Connector calls block on embedding and index I/O, so every tool
+        # dispatches them to the worker pool to keep the event loop responsive
+        run = self.executor.run
 
         # Test function
         async def test_mcp_response(
@@ -888,7 +1894,7 @@ class ChromaMCPServer(FastMCP):
                 List of collection names
             """
             await ctx.debug(f"Listing collections with limit={limit}, offset={offset}")
-            return self.connector.list_collections(limit, offset)
+            return await run("chroma_list_collections", self.connector.list_collections, limit, offset)
 
         # Create collection
         async def chroma_create_collection(
@@ -907,7 +1913,8 @@ class ChromaMCPServer(FastMCP):
         ) -> str:
             """Create a new Chroma collection with configurable HNSW parameters."""
             await ctx.debug(f"Creating collection: {collection_name}")
-            return self.connector.create_collection(
+            return await run(
+                "chroma_create_collection", self.connector.create_collection,
                 collection_name=collection_name,
                 embedding_function_name=embedding_function_name,
                 metadata=metadata,
@@ -925,11 +1932,14 @@ class ChromaMCPServer(FastMCP):
         async def chroma_peek_collection(
             ctx: Context,
             collection_name: Annotated[str, Field(description="Name of the collection to peek into")],
-            limit: Annotated[int, Field(default=5, description="Number of documents to peek at")] = 5
+            limit: Annotated[int, Field(default=5, description="Number of documents to peek at")] = 5,
+            include_embeddings: Annotated[bool, Field(default=False, description="Return embeddings as a base64 little-endian block {dtype, shape, data}")] = False,
+            embedding_dtype: Annotated[Literal["float32", "float16"], Field(default="float32", description="When embeddings are included they are returned as base64 little-endian blocks {dtype, shape, data} of this precision")] = "float32"
         ) -> Dict:
             """Peek at documents in a Chroma collection."""
             await ctx.debug(f"Peeking collection: {collection_name}")
-            return self.connector.peek_collection(collection_name, limit)
+            return await run("chroma_peek_collection", self.connector.peek_collection, collection_name, limit,
+                             include_embeddings, embedding_dtype)
 
         # Get collection info
         async def chroma_get_collection_info(
@@ -938,7 +1948,7 @@ class ChromaMCPServer(FastMCP):
         ) -> Dict:
             """Get information about a Chroma collection."""
             await ctx.debug(f"Getting collection info: {collection_name}")
-            return self.connector.get_collection_info(collection_name)
+            return await run("chroma_get_collection_info", self.connector.get_collection_info, collection_name)
 
         # Get collection count
         async def chroma_get_collection_count(
@@ -947,7 +1957,7 @@ class ChromaMCPServer(FastMCP):
         ) -> int:
             """Get the number of documents in a Chroma collection."""
             await ctx.debug(f"Getting collection count: {collection_name}")
-            return self.connector.get_collection_count(collection_name)
+            return await run("chroma_get_collection_count", self.connector.get_collection_count, collection_name)
 
         # Modify collection
         async def chroma_modify_collection(
@@ -963,7 +1973,8 @@ class ChromaMCPServer(FastMCP):
         ) -> str:
             """Modify a Chroma collection's name or metadata."""
             await ctx.debug(f"Modifying collection: {collection_name}")
-            return self.connector.modify_collection(
+            return await run(
+                "chroma_modify_collection", self.connector.modify_collection,
                 collection_name, new_name, new_metadata, ef_search, num_threads, batch_size, sync_threshold, resize_factor
             )
 
@@ -971,11 +1982,15 @@ class ChromaMCPServer(FastMCP):
         async def chroma_fork_collection(
             ctx: Context,
             collection_name: Annotated[str, Field(description="Name of the collection to fork")],
-            new_collection_name: Annotated[str, Field(description="Name of the new collection to create")]
+            new_collection_name: Annotated[str, Field(description="Name of the new collection to create (re-run with the same name to resume an interrupted fork)")],
+            batch_size: Annotated[int, Field(default=1000, description="Number of documents copied per batch")] = 1000
         ) -> str:
-            """Fork a Chroma collection."""
+            """Fork a Chroma collection, copying stored embeddings in batches."""
             await ctx.debug(f"Forking collection: {collection_name} -> {new_collection_name}")
-            return self.connector.fork_collection(collection_name, new_collection_name)
+            return await run(
+                "chroma_fork_collection", self.connector.fork_collection,
+                collection_name, new_collection_name, batch_size, threadsafe_progress(ctx)
+            )
 
         # Delete collection
         async def chroma_delete_collection(
@@ -984,7 +1999,7 @@ class ChromaMCPServer(FastMCP):
         ) -> str:
             """Delete a Chroma collection."""
             await ctx.debug(f"Deleting collection: {collection_name}")
-            return self.connector.delete_collection(collection_name)
+            return await run("chroma_delete_collection", self.connector.delete_collection, collection_name)
 
         # Add documents
         async def chroma_add_documents(
@@ -992,11 +2007,44 @@ class ChromaMCPServer(FastMCP):
             collection_name: Annotated[str, Field(description="Name of the collection to add documents to")],
             documents: Annotated[List[str], Field(description="List of text documents to add")],
             metadatas: Annotated[Optional[List[Dict]], Field(default=None, description="Optional list of metadata dictionaries for each document")] = None,
-            ids: Annotated[Optional[List[str]], Field(default=None, description="Optional list of IDs for the documents")] = None
+            ids: Annotated[Optional[List[str]], Field(default=None, description="Optional list of IDs for the documents")] = None,
+            embeddings: Annotated[Optional[EmbeddingsInput], Field(default=None, description="Optional precomputed embeddings, one per document, so Chroma skips embedding. Accepts a list of float lists, a list of base64 little-endian float32 strings (one per vector), or a binary block {\"dtype\": \"float32\", \"shape\": [n, d], \"data\": \"<base64>\"}")] = None
         ) -> str:
             """Add documents to a Chroma collection."""
             await ctx.debug(f"Adding {len(documents)} documents to collection: {collection_name}")
-            return self.connector.add_documents(collection_name, documents, metadatas, ids)
+            return await run("chroma_add_documents", self.connector.add_documents, collection_name, documents, metadatas, ids, embeddings)
+
+        # Bulk add documents
+        async def chroma_bulk_add_documents(
+            ctx: Context,
+            collection_name: Annotated[str, Field(description="Name of the collection to add documents to")],
+            documents: Annotated[List[str], Field(description="List of text documents to add")],
+            metadatas: Annotated[Optional[List[Dict]], Field(default=None, description="Optional list of metadata dictionaries for each document")] = None,
+            ids: Annotated[Optional[List[str]], Field(default=None, description="Optional list of IDs for the documents")] = None,
+            batch_size: Annotated[Optional[int], Field(default=None, description="Documents per batch (default and maximum: the client's max batch size)")] = None,
+            max_parallel: Annotated[Optional[int], Field(default=None, description="Maximum batches embedded concurrently")] = None
+        ) -> Dict:
+            """Add a large number of documents in batches with parallel embedding."""
+            await ctx.debug(f"Bulk adding {len(documents)} documents to collection: {collection_name}")
+            return await run(
+                "chroma_bulk_add_documents", self.connector.bulk_add_documents,
+                collection_name, documents, metadatas, ids, batch_size, max_parallel, threadsafe_progress(ctx)
+            )
+
+        # Upsert documents
+        async def chroma_upsert_documents(
+            ctx: Context,
+            collection_name: Annotated[str, Field(description="Name of the collection to upsert documents into")],
+            documents: Annotated[List[str], Field(description="List of text documents to insert or update")],
+            ids: Annotated[List[str], Field(description="List of document IDs (required, used to detect existing documents)")],
+            metadatas: Annotated[Optional[List[Dict]], Field(default=None, description="Optional list of metadata dictionaries for each document")] = None
+        ) -> Dict:
+            """Insert or update documents, skipping any whose content is unchanged."""
+            await ctx.debug(f"Upserting {len(documents)} documents into collection: {collection_name}")
+            return await run(
+                "chroma_upsert_documents", self.connector.upsert_documents,
+                collection_name, documents, ids, metadatas
+            )
 
         # Query documents
         async def chroma_query_documents(
@@ -1006,11 +2054,32 @@ class ChromaMCPServer(FastMCP):
             n_results: Annotated[int, Field(default=5, description="Number of results to return per query")] = 5,
             where: Annotated[Optional[Dict], Field(default=None, description="Optional metadata filters using Chroma's query operators")] = None,
             where_document: Annotated[Optional[Dict], Field(default=None, description="Optional document content filters")] = None,
-            include: Annotated[List[str], Field(default=["documents", "metadatas", "distances"], description="List of what to include in response")] = ["documents", "metadatas", "distances"]
+            include: Annotated[List[str], Field(default=["documents", "metadatas", "distances"], description="List of what to include in response")] = ["documents", "metadatas", "distances"],
+            format: Annotated[ResponseFormat, Field(default=ResponseFormat.COLUMNAR, description="Response shape: 'columnar' (Chroma's parallel lists), 'records' (one object per hit) or 'compact' (records without nulls, projected metadata, truncated documents)")] = ResponseFormat.COLUMNAR,
+            metadata_keys: Annotated[Optional[List[str]], Field(default=None, description="Compact format only: metadata keys to keep (default: all)")] = None,
+            max_chars: Annotated[Optional[int], Field(default=None, description="Compact format only: truncate documents to this many characters")] = None,
+            embedding_dtype: Annotated[Literal["float32", "float16"], Field(default="float32", description="When embeddings are included they are returned as base64 little-endian blocks {dtype, shape, data} of this precision")] = "float32"
         ) -> Dict:
             """Query documents from a Chroma collection with advanced filtering."""
             await ctx.debug(f"Querying collection: {collection_name}")
-            return self.connector.query_documents(collection_name, query_texts, n_results, where, where_document, include)
+            return await run("chroma_query_documents", self.connector.query_documents, collection_name, query_texts,
+                             n_results, where, where_document, include, format, metadata_keys, max_chars, embedding_dtype)
+
+        # Query several collections at once
+        async def chroma_query_collections(
+            ctx: Context,
+            collection_names: Annotated[List[str], Field(description="Collections to search; all must use the same embedding function")],
+            query_texts: Annotated[List[str], Field(description="List of query texts to search for")],
+            n_results: Annotated[int, Field(default=5, description="Number of merged results to return per query across all collections")] = 5,
+            where: Annotated[Optional[Dict], Field(default=None, description="Optional metadata filters applied in every collection")] = None,
+            where_document: Annotated[Optional[Dict], Field(default=None, description="Optional document content filters applied in every collection")] = None,
+            include: Annotated[List[str], Field(default=["documents", "metadatas", "distances"], description="List of what to include in response")] = ["documents", "metadatas", "distances"],
+            timeout: Annotated[Optional[float], Field(default=None, description="Overall timeout in seconds; collections that miss it are reported under 'timed_out' and the result is marked 'incomplete'")] = None
+        ) -> Dict:
+            """Search several Chroma collections concurrently and merge the hits by distance."""
+            await ctx.debug(f"Querying {len(collection_names)} collections")
+            return await run("chroma_query_collections", self.connector.query_collections,
+                             collection_names, query_texts, n_results, where, where_document, include, timeout)
 
         # Get documents
         async def chroma_get_documents(
@@ -1020,12 +2089,19 @@ class ChromaMCPServer(FastMCP):
             where: Annotated[Optional[Dict], Field(default=None, description="Optional metadata filters using Chroma's query operators")] = None,
             where_document: Annotated[Optional[Dict], Field(default=None, description="Optional document content filters")] = None,
             include: Annotated[List[str], Field(default=["documents", "metadatas"], description="List of what to include in response")] = ["documents", "metadatas"],
-            limit: Annotated[Optional[int], Field(default=None, description="Optional maximum number of documents to return")] = None,
-            offset: Annotated[Optional[int], Field(default=None, description="Optional number of documents to skip before returning results")] = None
+            limit: Annotated[Optional[int], Field(default=None, description="Optional maximum number of documents to return; also the page size for cursor paging (a 'next_cursor' is returned when set)")] = None,
+            offset: Annotated[Optional[int], Field(default=None, description="Optional number of documents to skip before returning results")] = None,
+            format: Annotated[ResponseFormat, Field(default=ResponseFormat.COLUMNAR, description="Response shape: 'columnar' (Chroma's parallel lists), 'records' (one object per hit) or 'compact' (records without nulls, projected metadata, truncated documents)")] = ResponseFormat.COLUMNAR,
+            metadata_keys: Annotated[Optional[List[str]], Field(default=None, description="Compact format only: metadata keys to keep (default: all)")] = None,
+            max_chars: Annotated[Optional[int], Field(default=None, description="Compact format only: truncate documents to this many characters")] = None,
+            embedding_dtype: Annotated[Literal["float32", "float16"], Field(default="float32", description="When embeddings are included they are returned as base64 little-endian blocks {dtype, shape, data} of this precision")] = "float32",
+            cursor: Annotated[Optional[str], Field(default=None, description="Opaque 'next_cursor' from the previous page; continues a scan without skipping or repeating rows. Use with the same filters and without 'offset'")] = None
         ) -> Dict:
             """Get documents from a Chroma collection with optional filtering."""
             await ctx.debug(f"Getting documents from collection: {collection_name}")
-            return self.connector.get_documents(collection_name, ids, where, where_document, include, limit, offset)
+            return await run("chroma_get_documents", self.connector.get_documents, collection_name, ids, where,
+                             where_document, include, limit, offset, format, metadata_keys, max_chars, embedding_dtype,
+                             cursor)
 
         # Update documents
         async def chroma_update_documents(
@@ -1038,7 +2114,7 @@ class ChromaMCPServer(FastMCP):
         ) -> str:
             """Update documents in a Chroma collection."""
             await ctx.debug(f"Updating {len(ids)} documents in collection: {collection_name}")
-            return self.connector.update_documents(collection_name, ids, embeddings, metadatas, documents)
+            return await run("chroma_update_documents", self.connector.update_documents, collection_name, ids, embeddings, metadatas, documents)
 
         # Delete documents
         async def chroma_delete_documents(
@@ -1048,7 +2124,7 @@ class ChromaMCPServer(FastMCP):
         ) -> str:
             """Delete documents from a Chroma collection."""
             await ctx.debug(f"Deleting {len(ids)} documents from collection: {collection_name}")
-            return self.connector.delete_documents(collection_name, ids)
+            return await run("chroma_delete_documents", self.connector.delete_documents, collection_name, ids)
 
         # Sequential thinking
         async def chroma_sequential_thinking(
@@ -1068,7 +2144,8 @@ class ChromaMCPServer(FastMCP):
         ) -> Dict:
             """Store and process a sequential thought in ChromaDB."""
             await ctx.debug(f"Storing sequential thought #{thought_number}")
-            return self.connector.sequential_thinking(
+            return await run(
+                "chroma_sequential_thinking", self.connector.sequential_thinking,
                 thought, thought_number, total_thoughts, next_thought_needed, session_id,
                 is_revision, revises_thought, branch_from_thought, branch_id,
                 session_summary, key_thoughts, needs_more_thoughts
@@ -1085,7 +2162,7 @@ class ChromaMCPServer(FastMCP):
         ) -> Dict:
             """Find similar sequential thinking sessions based on metadata and content."""
             await ctx.debug("Finding similar sessions")
-            return self.connector.get_similar_sessions(session_type, min_thought_count, max_thought_count, query_text, n_results)
+            return await run("chroma_get_similar_sessions", self.connector.get_similar_sessions, session_type, min_thought_count, max_thought_count, query_text, n_results)
 
         # Get thought history
         async def chroma_get_thought_history(
@@ -1096,17 +2173,28 @@ class ChromaMCPServer(FastMCP):
         ) -> Dict:
             """Retrieve the complete thought history for a sequential thinking session."""
             await ctx.debug(f"Getting thought history for session: {session_id}")
-            return self.connector.get_thought_history(session_id, include_branches, sort_by_number)
+            return await run("chroma_get_thought_history", self.connector.get_thought_history, session_id, include_branches, sort_by_number)
 
         # Get thought branches
         async def chroma_get_thought_branches(
             ctx: Context,
             session_id: Annotated[str, Field(description="The session identifier to search for branches")],
-            thought_number: Annotated[Optional[int], Field(default=None, description="Optional specific thought number to find branches from")] = None
+            thought_number: Annotated[Optional[int], Field(default=None, description="Optional specific thought number to find branches from")] = None,
+            include_content: Annotated[bool, Field(default=True, description="Include thought text and metadata; set false to return branch structure only without reading thought bodies")] = True
         ) -> Dict:
             """Retrieve all branches that stem from a specific thought or session."""
             await ctx.debug(f"Getting thought branches for session: {session_id}")
-            return self.connector.get_thought_branches(session_id, thought_number)
+            return await run("chroma_get_thought_branches", self.connector.get_thought_branches, session_id, thought_number,
+                             include_content)
+
+        # Get thought graph
+        async def chroma_get_thought_graph(
+            ctx: Context,
+            session_id: Annotated[str, Field(description="The session identifier to describe")]
+        ) -> Dict:
+            """Return the main line, branches and revisions of a sequential thinking session."""
+            await ctx.debug(f"Getting thought graph for session: {session_id}")
+            return await run("chroma_get_thought_graph", self.connector.get_thought_graph, session_id)
 
         # Continue thought chain
         async def chroma_continue_thought_chain(
@@ -1116,7 +2204,30 @@ class ChromaMCPServer(FastMCP):
         ) -> Dict:
             """Analyze the last thought in a session and provide continuation suggestions."""
             await ctx.debug(f"Analyzing thought chain for session: {session_id}")
-            return self.connector.continue_thought_chain(session_id, analysis_type)
+            return await run("chroma_continue_thought_chain", self.connector.continue_thought_chain, session_id, analysis_type)
+
+        # Configure result cache
+        async def chroma_set_result_cache(
+            ctx: Context,
+            collection_name: Annotated[str, Field(description="Name of the collection to configure")],
+            enabled: Annotated[bool, Field(description="Whether query/get results for this collection should be cached")]
+        ) -> str:
+            """Turn the query/get result cache on or off for a collection."""
+            await ctx.debug(f"Setting result cache for {collection_name}: {enabled}")
+            return await run("chroma_set_result_cache", self.connector.set_result_cache, collection_name, enabled)
+
+        # Server statistics
+        async def chroma_get_server_stats(
+            ctx: Context
+        ) -> Dict:
+            """Report worker pool utilization and cache hit/miss counters."""
+            await ctx.debug("Getting server stats")
+            connector_stats = await run("chroma_get_server_stats", self.connector.get_stats)
+            return {
+                "executor": self.executor.stats(),
+                **connector_stats,
+                "logging": logpipeline.stats(),
+            }
 
         # Register all tools with FastMCP
         self.tool(description="Test function to verify MCP responses are working")(test_mcp_response)
@@ -1129,7 +2240,10 @@ class ChromaMCPServer(FastMCP):
         self.tool(description="Fork a Chroma collection")(chroma_fork_collection)
         self.tool(description="Delete a Chroma collection")(chroma_delete_collection)
         self.tool(description="Add documents to a Chroma collection")(chroma_add_documents)
+        self.tool(description="Add a large number of documents in batches with parallel embedding and progress reporting")(chroma_bulk_add_documents)
+        self.tool(description="Insert or update documents, re-embedding only those whose content changed")(chroma_upsert_documents)
         self.tool(description="Query documents from a Chroma collection with advanced filtering")(chroma_query_documents)
+        self.tool(description="Search several Chroma collections at once and merge results into a global top-k")(chroma_query_collections)
         self.tool(description="Get documents from a Chroma collection with optional filtering")(chroma_get_documents)
         self.tool(description="Update documents in a Chroma collection")(chroma_update_documents)
         self.tool(description="Delete documents from a Chroma collection")(chroma_delete_documents)
@@ -1137,7 +2251,10 @@ class ChromaMCPServer(FastMCP):
         self.tool(description="Find similar sequential thinking sessions based on metadata and content")(chroma_get_similar_sessions)
         self.tool(description="Retrieve the complete thought history for a sequential thinking session")(chroma_get_thought_history)
         self.tool(description="Retrieve all branches that stem from a specific thought or session")(chroma_get_thought_branches)
+        self.tool(description="Show a thinking session's structure (main line, branches, revisions) without thought text")(chroma_get_thought_graph)
         self.tool(description="Analyze the last thought in a session and provide continuation suggestions")(chroma_continue_thought_chain)
+        self.tool(description="Turn the query/get result cache on or off for a collection")(chroma_set_result_cache)
+        self.tool(description="Report worker pool utilization and cache hit/miss counters")(chroma_get_server_stats)
 
 
 def create_parser():
@@ -1156,6 +2273,105 @@ def create_parser():
                        type=int,
                        default=int(os.getenv('MCP_HTTP_PORT', '3000')),
                        help='Port for HTTP/SSE transport (default: 3000)')
+    parser.add_argument('--stateless-http',
+                       nargs='?',
+                       const=True,
+                       type=lambda x: x.lower() in ['true', 'yes', '1', 't', 'y'],
+                       default=os.getenv('MCP_STATELESS_HTTP', 'false').lower() in ['true', 'yes', '1', 't', 'y'],
+                       help='Serve streamable-http without MCP sessions, answering with JSON instead of SSE, '
+                            'so requests can be load balanced across replicas; session index rows are then '
+                            'recomputed from stored thoughts on every commit (default: false)')
+
+    # Tool execution configuration
+    parser.add_argument('--executor-workers',
+                       type=int,
+                       default=int(os.getenv('MCP_EXECUTOR_WORKERS')) if os.getenv('MCP_EXECUTOR_WORKERS') else None,
+                       help='Worker threads for blocking Chroma calls (default: min(32, cpu_count + 4))')
+    parser.add_argument('--executor-queue-depth',
+                       type=int,
+                       default=int(os.getenv('MCP_EXECUTOR_QUEUE_DEPTH', '128')),
+                       help='Maximum tool calls waiting for a worker before new calls are rejected (default: 128)')
+    parser.add_argument('--tool-concurrency',
+                       type=parse_tool_limits,
+                       default=parse_tool_limits(os.getenv('MCP_TOOL_CONCURRENCY')),
+                       help='Per-tool concurrency caps, e.g. "chroma_add_documents=2,chroma_fork_collection=1"')
+
+    # Cache configuration
+    parser.add_argument('--collection-cache-size',
+                       type=int,
+                       default=int(os.getenv('MCP_COLLECTION_CACHE_SIZE', '128')),
+                       help='Maximum number of cached collection handles, 0 disables the cache (default: 128)')
+    parser.add_argument('--collection-cache-ttl',
+                       type=float,
+                       default=float(os.getenv('MCP_COLLECTION_CACHE_TTL', '60')),
+                       help='Seconds before a cached collection handle is re-fetched, to pick up changes made outside the server (default: 60)')
+
+    parser.add_argument('--result-cache-mb',
+                       type=float,
+                       default=float(os.getenv('MCP_RESULT_CACHE_MB', '64')),
+                       help='Memory budget in MB for cached query/get results, 0 disables the cache (default: 64)')
+    parser.add_argument('--result-cache-ttl',
+                       type=float,
+                       default=float(os.getenv('MCP_RESULT_CACHE_TTL', '300')),
+                       help='Seconds a cached result may be served, bounding staleness from writes made outside the server (default: 300)')
+    parser.add_argument('--result-cache-collections',
+                       default=os.getenv('MCP_RESULT_CACHE_COLLECTIONS'),
+                       help='Comma separated collections whose query/get results are cached, "*" for all (default: none)')
+    parser.add_argument('--payload-stats-every',
+                       type=int,
+                       default=int(os.getenv('MCP_PAYLOAD_STATS_EVERY', '100')),
+                       help='Measure the bytes saved by records/compact responses on one response in N, 0 disables (default: 100)')
+
+    # Embedding configuration
+    parser.add_argument('--embedding-workers',
+                       type=int,
+                       default=int(os.getenv('MCP_EMBEDDING_WORKERS', '4')),
+                       help='Threads used to embed batches in parallel during bulk loads (default: 4)')
+    parser.add_argument('--fanout-workers',
+                       type=int,
+                       default=int(os.getenv('MCP_FANOUT_WORKERS', '8')),
+                       help='Threads used to search collections concurrently in chroma_query_collections (default: 8)')
+    parser.add_argument('--fanout-timeout',
+                       type=float,
+                       default=float(os.getenv('MCP_FANOUT_TIMEOUT', '30')),
+                       help='Default overall timeout in seconds for chroma_query_collections (default: 30)')
+    parser.add_argument('--thought-write-behind',
+                       type=lambda x: x.lower() in ['true', 'yes', '1', 't', 'y'],
+                       default=os.getenv('MCP_THOUGHT_WRITE_BEHIND', 'false').lower() in ['true', 'yes', '1', 't', 'y'],
+                       help='Acknowledge chroma_sequential_thinking writes immediately and group-commit them in the background (default: false)')
+    parser.add_argument('--thought-batch-size',
+                       type=int,
+                       default=int(os.getenv('MCP_THOUGHT_BATCH_SIZE', '64')),
+                       help='Buffered thoughts that trigger a group commit (default: 64)')
+    parser.add_argument('--thought-flush-ms',
+                       type=float,
+                       default=float(os.getenv('MCP_THOUGHT_FLUSH_MS', '50')),
+                       help='Longest a buffered thought waits before being committed, in ms (default: 50)')
+    parser.add_argument('--thought-graph-cache-size',
+                       type=int,
+                       default=int(os.getenv('MCP_THOUGHT_GRAPH_CACHE_SIZE', '256')),
+                       help='Sessions whose thought graph is kept in memory (default: 256)')
+    parser.add_argument('--thought-graph-dir',
+                       default=os.getenv('MCP_THOUGHT_GRAPH_DIR'),
+                       help='Directory for persisted thought graph sidecars (default: <data-dir>/thought_graphs for persistent clients, none otherwise)')
+    parser.add_argument('--log-queue-size',
+                       type=int,
+                       default=int(os.getenv('MCP_LOG_QUEUE_SIZE', '10000')),
+                       help='Log records waiting to be written before new records are dropped (default: 10000)')
+    parser.add_argument('--log-sample',
+                       type=logpipeline.parse_sample_rates,
+                       default=logpipeline.parse_sample_rates(os.getenv('MCP_LOG_SAMPLE')),
+                       help='Fraction of each structured log event to keep, e.g. "tool_call=0.1,*=1" (default: keep all)')
+    parser.add_argument('--query-embedding-cache-mb',
+                       type=float,
+                       default=float(os.getenv('MCP_QUERY_EMBEDDING_CACHE_MB', '16')),
+                       help='Memory budget in MB for cached query embeddings, 0 disables the cache (default: 16)')
+    parser.add_argument('--warm-embeddings',
+                       nargs='?',
+                       const='default',
+                       default=os.getenv('MCP_WARM_EMBEDDINGS'),
+                       help='Load and test these embedding functions before accepting traffic, '
+                            'comma separated (default when given without a value: "default")')
 
     # Chroma client configuration
     parser.add_argument('--client-type',
@@ -1165,9 +2381,30 @@ def create_parser():
     parser.add_argument('--data-dir',
                        default=os.getenv('CHROMA_DATA_DIR'),
                        help='Directory for persistent client data (only used with persistent client)')
+    parser.add_argument('--readers',
+                       type=int,
+                       default=int(os.getenv('MCP_READERS', '0')),
+                       help='Reader processes serving queries and gets, with one writer process for all writes '
+                            '(persistent client only; default: 0, everything in this process)')
+    parser.add_argument('--reader-max-staleness',
+                       type=float,
+                       default=float(os.getenv('MCP_READER_MAX_STALENESS', '1')),
+                       help='Seconds a reader process may answer queries from its vector indexes after the '
+                            'writer changed them before it reopens its client; each reader reopens at most '
+                            'once per this window (default: 1, 0 reopens before every such query)')
     parser.add_argument('--host',
-                       help='Chroma host (required for http client)',
+                       help='Chroma host (required for http client); "primary,replica1,replica2:8001" sends '
+                            'queries, gets, counts and peeks to healthy read replicas and everything else to the primary',
                        default=os.getenv('CHROMA_HOST'))
+    parser.add_argument('--replica-heartbeat-interval',
+                       type=float,
+                       default=float(os.getenv('CHROMA_REPLICA_HEARTBEAT_INTERVAL', '5')),
+                       help='Seconds between read replica health checks, each given as long to answer (default: 5)')
+    parser.add_argument('--replica-read-after-write',
+                       type=float,
+                       default=float(os.getenv('CHROMA_REPLICA_READ_AFTER_WRITE', '5')),
+                       help='Seconds after this server writes a collection during which its reads go to the primary, '
+                            'so they are not served by a lagging replica (default: 5; 0 disables)')
     parser.add_argument('--port',
                        help='Chroma port (optional for http client)',
                        default=os.getenv('CHROMA_PORT'))
@@ -1187,6 +2424,39 @@ def create_parser():
                        help='Use SSL (optional for http client)',
                        type=lambda x: x.lower() in ['true', 'yes', '1', 't', 'y'],
                        default=os.getenv('CHROMA_SSL', 'true').lower() in ['true', 'yes', '1', 't', 'y'])
+    parser.add_argument('--client-max-connections',
+                       type=int,
+                       default=int(os.getenv('CHROMA_CLIENT_MAX_CONNECTIONS')) if os.getenv('CHROMA_CLIENT_MAX_CONNECTIONS') else None,
+                       help='Most open connections to the Chroma server (http/cloud clients; default: 100)')
+    parser.add_argument('--client-max-keepalive',
+                       type=int,
+                       default=int(os.getenv('CHROMA_CLIENT_MAX_KEEPALIVE')) if os.getenv('CHROMA_CLIENT_MAX_KEEPALIVE') else None,
+                       help='Idle connections kept open for reuse (http/cloud clients; default: 20)')
+    parser.add_argument('--client-keepalive-expiry',
+                       type=float,
+                       default=float(os.getenv('CHROMA_CLIENT_KEEPALIVE_EXPIRY', '40')),
+                       help='Seconds an idle connection is kept open (http/cloud clients; default: 40)')
+    parser.add_argument('--client-http2',
+                       type=lambda x: x.lower() in ['true', 'yes', '1', 't', 'y'],
+                       default=os.getenv('CHROMA_CLIENT_HTTP2', 'false').lower() in ['true', 'yes', '1', 't', 'y'],
+                       help='Use HTTP/2 to the Chroma server, requires httpx[http2] (default: false)')
+    parser.add_argument('--client-connect-timeout',
+                       type=float,
+                       default=float(os.getenv('CHROMA_CLIENT_CONNECT_TIMEOUT', '10')),
+                       help='Seconds to wait for a connection to the Chroma server (default: 10)')
+    parser.add_argument('--client-read-timeout',
+                       type=float,
+                       default=float(os.getenv('CHROMA_CLIENT_READ_TIMEOUT')) if os.getenv('CHROMA_CLIENT_READ_TIMEOUT') else None,
+                       help='Seconds to wait for a Chroma server response (default: no limit)')
+    parser.add_argument('--client-compress-min-kb',
+                       type=float,
+                       default=float(os.getenv('CHROMA_CLIENT_COMPRESS_MIN_KB', '0')),
+                       help='Gzip request bodies of at least this many KB; the server or a proxy must accept '
+                            'compressed requests (default: 0, disabled)')
+    parser.add_argument('--client-warm-connections',
+                       type=int,
+                       default=int(os.getenv('CHROMA_CLIENT_WARM_CONNECTIONS', '1')),
+                       help='Connections opened with a heartbeat at startup (default: 1)')
     parser.add_argument('--dotenv-path',
                        help='Path to .env file',
                        default=os.getenv('CHROMA_DOTENV_PATH', '.chroma_env'))
@@ -1205,6 +2475,14 @@ def main():
         args = parser.parse_args()
 
     # Validate required arguments based on client type
+    if args.readers and args.client_type != 'persistent':
+        parser.error("--readers is only supported with the persistent client")
+    if args.stateless_http:
+        if args.transport != 'streamable-http':
+            parser.error("--stateless-http requires --transport streamable-http")
+        if args.thought_write_behind:
+            parser.error("--stateless-http cannot be combined with --thought-write-behind: buffered thoughts "
+                         "are only visible on the replica that accepted them")
     if args.client_type == 'http':
         if not args.host:
             parser.error("Host must be provided via --host flag or CHROMA_HOST environment variable when using HTTP client")
@@ -1216,13 +2494,21 @@ def main():
         if not args.api_key:
             parser.error("API key must be provided via --api-key flag or CHROMA_API_KEY environment variable when using cloud client")
 
+    logpipeline.install(package_logger, str(log_file), queue_size=args.log_queue_size)
+    logpipeline.configure_sampling(args.log_sample)
+
     # Create settings object
     settings = ChromaSettings(args)
 
     # Initialize and run the server following FastMCP template
+    server = None
     try:
         server = ChromaMCPServer(settings)
         logger.info("Successfully initialized ChromaMCPServer")
+
+        if settings.warm_embeddings:
+            timings = server.connector.warm_embeddings(settings.warm_embeddings)
+            logger.info(f"Embedding functions ready: {timings}")
         logger.info(f"Starting MCP server with transport: {args.transport}")
 
         # Handle different transports
@@ -1262,6 +2548,9 @@ def main():
     except Exception as e:
         logger.error(f"Failed to initialize or run server: {str(e)}")
         raise
+    finally:
+        if server is not None:
+            server.close()
 
 
 if __name__ == "__main__":
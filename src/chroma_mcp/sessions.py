@@ -0,0 +1,274 @@
+"""Per-session summary index for sequential thinking."""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+THOUGHTS_COLLECTION = "sequential_thinking"
+SESSION_INDEX_COLLECTION = "sequential_thinking_sessions"
+
+# Characters of the first thought kept as a session's summary until one is provided
+SUMMARY_CHARS = 500
+
+# Rows read per page when rebuilding the index from stored thoughts
+REBUILD_PAGE_SIZE = 1000
+
+# Index metadata key: number of thought vectors averaged into the session centroid
+CENTROID_COUNT_KEY = "centroid_count"
+
+
+def apply_thought(entry: Optional[Dict[str, Any]], metadata: Dict[str, Any],
+                  document_id: str) -> Dict[str, Any]:
+    """Fold one stored thought's metadata into a session index entry.
+
+    Besides totals over every thought, the entry points at the latest
+    main-line (non-branch) thought, ordered by thought number then time.
+    """
+    timestamp = metadata.get("timestamp", 0)
+    thought_number = metadata.get("thought_number") or 0
+    if entry is None:
+        entry = {
+            "session_id": metadata["session_id"],
+            "session_type": metadata.get("session_type", "unknown"),
+            "thought_count": 0,
+            "main_thought_count": 0,
+            "total_thoughts": 0,
+            "last_thought_id": "",
+            "last_thought_number": 0,
+            "last_thought_timestamp": 0,
+            "first_timestamp": timestamp,
+            "last_updated": timestamp,
+            "has_branches": False,
+            "has_revisions": False,
+        }
+    else:
+        entry = dict(entry)
+    entry["thought_count"] += 1
+    entry["total_thoughts"] = max(entry["total_thoughts"], metadata.get("total_thoughts") or 0)
+    if not metadata.get("branch_id"):
+        entry["main_thought_count"] += 1
+        last = (entry["last_thought_number"], entry["last_thought_timestamp"])
+        if (thought_number, timestamp) >= last:
+            entry["last_thought_id"] = document_id
+            entry["last_thought_number"] = thought_number
+            entry["last_thought_timestamp"] = timestamp
+    entry["first_timestamp"] = min(entry["first_timestamp"], timestamp)
+    entry["last_updated"] = max(entry["last_updated"], timestamp)
+    entry["has_branches"] = entry["has_branches"] or bool(metadata.get("branch_id"))
+    entry["has_revisions"] = entry["has_revisions"] or bool(metadata.get("is_revision"))
+    return entry
+
+
+def update_centroids(centroids: np.ndarray, counts: np.ndarray, vectors: np.ndarray,
+                     groups: np.ndarray) -> np.ndarray:
+    """Fold ``vectors`` into running means.
+
+    ``centroids[g]`` is the mean of ``counts[g]`` vectors so far and
+    ``groups[i]`` is the centroid row ``vectors[i]`` belongs to.
+    """
+    sums = centroids.astype(np.float64) * counts[:, None]
+    np.add.at(sums, groups, vectors)
+    totals = counts + np.bincount(groups, minlength=len(counts))
+    return (sums / np.maximum(totals, 1)[:, None]).astype(np.float32)
+
+
+def _where(session_type: Optional[str], min_thought_count: Optional[int],
+           max_thought_count: Optional[int]) -> Optional[Dict[str, Any]]:
+    conditions = []
+    if session_type:
+        conditions.append({"session_type": session_type})
+    if min_thought_count:
+        conditions.append({"thought_count": {"$gte": min_thought_count}})
+    if max_thought_count:
+        conditions.append({"thought_count": {"$lte": max_thought_count}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class SessionIndex:
+    """Maintains one summary row per sequential thinking session.
+
+    Each row is keyed by session id and carries the thought count, last
+    update, branch/revision flags, a pointer to the last main-line thought
+    and a summary document. A row's embedding is the centroid of the
+    session's thought embeddings, so sessions can be ranked with one k-NN. Rows are updated
+    as thoughts are stored, so listing and filtering sessions reads the
+    index instead of every thought.
+    """
+
+    def __init__(self):
+        # Serializes read-modify-write of index rows within this process
+        self._lock = threading.Lock()
+
+    def record_many(self, index, thoughts: List[Tuple[str, str, Dict[str, Any]]],
+                    embeddings: np.ndarray) -> List[str]:
+        """Update session rows for a batch of stored (document_id, thought, metadata) tuples.
+
+        ``embeddings`` are the stored thoughts' vectors, folded into each
+        session's centroid. Reads all affected rows in one get and writes
+        them back in at most three calls: new sessions, summary changes, and
+        the rest. Returns ids of sessions whose row predates centroids and
+        must be rebuilt instead.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            session_ids = list(dict.fromkeys(metadata["session_id"] for _, _, metadata in thoughts))
+            current = index.get(ids=session_ids, include=["metadatas", "embeddings"])
+            entries = dict(zip(current["ids"], current["metadatas"], strict=True))
+            stored = dict(zip(current["ids"], current["embeddings"], strict=True))
+            stale = [s for s, entry in entries.items() if CENTROID_COUNT_KEY not in entry]
+            session_ids = [s for s in session_ids if s not in stale]
+            existing = set(entries)
+
+            position = {session_id: i for i, session_id in enumerate(session_ids)}
+            rows = [i for i, (_, _, metadata) in enumerate(thoughts)
+                    if metadata["session_id"] in position]
+            if not rows:
+                return stale
+            groups = np.array([position[thoughts[i][2]["session_id"]] for i in rows])
+            counts = np.array([entries[s][CENTROID_COUNT_KEY] if s in existing else 0
+                               for s in session_ids])
+            centroids = np.stack([
+                np.asarray(stored[s], dtype=np.float32) if s in existing
+                else np.zeros(embeddings.shape[1], np.float32)
+                for s in session_ids
+            ])
+            centroids = update_centroids(centroids, counts, embeddings[rows], groups)
+            added = np.bincount(groups, minlength=len(session_ids))
+
+            summaries: Dict[str, str] = {}
+            for i in rows:
+                document_id, thought, metadata = thoughts[i]
+                session_id = metadata["session_id"]
+                if session_id not in entries:
+                    summaries[session_id] = thought[:SUMMARY_CHARS]
+                entries[session_id] = apply_thought(entries.get(session_id), metadata, document_id)
+                if metadata.get("session_summary") is not None:
+                    summaries[session_id] = metadata["session_summary"]
+            for session_id, count in zip(session_ids, counts + added, strict=True):
+                entries[session_id][CENTROID_COUNT_KEY] = int(count)
+
+            def select(ids: List[str]) -> Dict[str, Any]:
+                return {"ids": ids, "metadatas": [entries[s] for s in ids],
+                        "embeddings": centroids[[position[s] for s in ids]]}
+
+            created = [s for s in session_ids if s not in existing]
+            if created:
+                index.add(documents=[summaries[s] for s in created], **select(created))
+            resummarized = [s for s in session_ids if s in existing and s in summaries]
+            if resummarized:
+                index.update(documents=[summaries[s] for s in resummarized], **select(resummarized))
+            unchanged = [s for s in session_ids if s in existing and s not in summaries]
+            if unchanged:
+                index.update(**select(unchanged))
+            return stale
+
+    def rebuild(self, index, thoughts, session_ids: Optional[Iterable[str]] = None) -> int:
+        """Recompute index rows and centroids from stored thoughts.
+
+        Covers every session, or just ``session_ids`` when given.
+
+        Returns the number of sessions written.
+        """
+        where = None
+        if session_ids is not None:
+            session_ids = list(set(session_ids))
+            if not session_ids:
+                return 0
+            where = {"session_id": {"$in": session_ids}}
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        summaries: Dict[str, Tuple[int, str]] = {}
+        sums: Dict[str, np.ndarray] = {}
+        offset = 0
+        while True:
+            page = thoughts.get(where=where, include=["documents", "metadatas", "embeddings"],
+                                limit=REBUILD_PAGE_SIZE, offset=offset)
+            rows = zip(page["ids"], page["documents"], page["metadatas"], page["embeddings"],
+                       strict=True)
+            for document_id, document, metadata, embedding in rows:
+                session_id = metadata.get("session_id")
+                if not session_id:
+                    continue
+                entries[session_id] = apply_thought(entries.get(session_id), metadata, document_id)
+                sums[session_id] = sums.get(session_id, 0) + np.asarray(embedding, dtype=np.float64)
+                timestamp = metadata.get("timestamp", 0)
+                if metadata.get("session_summary"):
+                    # A provided summary outranks any first-thought excerpt
+                    summaries[session_id] = (float("inf"), metadata["session_summary"])
+                elif session_id not in summaries or timestamp < summaries[session_id][0]:
+                    summaries[session_id] = (timestamp, (document or "")[:SUMMARY_CHARS])
+            if len(page["ids"]) < REBUILD_PAGE_SIZE:
+                break
+            offset += REBUILD_PAGE_SIZE
+
+        for entry in entries.values():
+            entry[CENTROID_COUNT_KEY] = entry["thought_count"]
+
+        with self._lock:
+            if session_ids is not None:
+                missing = [s for s in session_ids if s not in entries]
+                if missing:
+                    index.delete(ids=missing)
+            if entries:
+                ids = list(entries)
+                index.upsert(
+                    ids=ids,
+                    metadatas=[entries[s] for s in ids],
+                    documents=[summaries[s][1] for s in ids],
+                    embeddings=np.stack(
+                        [sums[s] / entries[s]["thought_count"] for s in ids]
+                    ).astype(np.float32)
+                )
+        return len(entries)
+
+    def nearest(self, index, query_embedding: Optional[np.ndarray], query_text: str,
+                session_type: Optional[str] = None, min_thought_count: Optional[int] = None,
+                max_thought_count: Optional[int] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Rank sessions by distance from the query to their centroid, filtering in the k-NN."""
+        results = index.query(
+            query_embeddings=[query_embedding] if query_embedding is not None else None,
+            query_texts=[query_text] if query_embedding is None else None,
+            n_results=limit,
+            where=_where(session_type, min_thought_count, max_thought_count),
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            {**metadata, "summary": document, "distance": float(distance)}
+            for document, metadata, distance in zip(results["documents"][0],
+                                                    results["metadatas"][0],
+                                                    results["distances"][0], strict=True)
+        ]
+
+    def find(self, index, session_type: Optional[str] = None,
+             min_thought_count: Optional[int] = None, max_thought_count: Optional[int] = None,
+             limit: int = 5) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the sessions with the most planned thoughts matching the filters, and their count.
+
+        Chroma's get has no ORDER BY, so ranking by ``total_thoughts`` reads
+        the index metadata of every matching session and sorts it here: this
+        is O(matching sessions), not O(sessions returned). It never reads
+        thoughts, and summaries are fetched only for the returned rows.
+        """
+        matches = index.get(where=_where(session_type, min_thought_count, max_thought_count),
+                            include=["metadatas"])
+        entries = sorted(matches["metadatas"], key=lambda e: e.get("total_thoughts", 0),
+                         reverse=True)[:limit]
+        return self._with_summaries(index, entries), len(matches["ids"])
+
+    def lookup(self, index, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return index entries (with summaries) for the given sessions."""
+        if not session_ids:
+            return {}
+        rows = index.get(ids=list(dict.fromkeys(session_ids)), include=["documents", "metadatas"])
+        return {
+            session_id: {**metadata, "summary": document}
+            for session_id, document, metadata in zip(rows["ids"], rows["documents"],
+                                                      rows["metadatas"], strict=True)
+        }
+
+    def _with_summaries(self, index, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        found = self.lookup(index, [entry["session_id"] for entry in entries])
+        return [found.get(entry["session_id"], entry) for entry in entries]
@@ -43,6 +43,7 @@ from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import httpx
 
+from chroma_mcp.serialization import dumps_text
 from chroma_mcp.server_original import (
     chroma_list_collections,
     chroma_create_collection,
@@ -329,7 +330,7 @@ def create_app() -> FastAPI:
                     "content": [
                         {
                             "type": "text",
-                            "text": json.dumps(result, indent=2) if isinstance(result, (dict, list)) else str(result)
+                            "text": dumps_text(result) if isinstance(result, (dict, list)) else str(result)
                         }
                     ]
                 },
@@ -0,0 +1,261 @@
+"""Single-writer, multi-reader process topology for the persistent client.
+
+A persistent Chroma client must not be written from several processes, so
+one writer process owns every write while reader processes, each with its
+own client, serve reads in parallel. After each write the writer bumps a
+shared generation counter for every collection it touched. Before serving
+a call, a reader drops its caches for the collections the call reads whose
+generation moved. Metadata reads see the writer's commits through the
+shared database, but a client keeps vector indexes in memory, so a reader
+reopens its client before a query on a collection written since it opened.
+Reopening reloads every index, so a reader reopens at most once per
+``reader_max_staleness`` seconds; in between, queries are answered from its
+current indexes and may miss writes made less than that long ago.
+"""
+
+import inspect
+import logging
+import multiprocessing
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sessions import SESSION_INDEX_COLLECTION, THOUGHTS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# Connector methods served by reader processes. Sequential thinking reads stay
+# on the writer: they may backfill the session index and flush buffered thoughts.
+READ_METHODS = frozenset({
+    "list_collections",
+    "peek_collection",
+    "get_collection_info",
+    "get_collection_count",
+    "query_documents",
+    "query_collections",
+    "get_documents",
+})
+
+# Reads served from a collection's vector index, which only a reopened client sees updated
+INDEX_READ_METHODS = frozenset({"query_documents", "query_collections"})
+
+# Writer methods after which readers must refresh the collections they wrote
+MUTATING_METHODS = frozenset({
+    "create_collection",
+    "modify_collection",
+    "fork_collection",
+    "delete_collection",
+    "add_documents",
+    "bulk_add_documents",
+    "upsert_documents",
+    "update_documents",
+    "delete_documents",
+    "sequential_thinking",
+})
+
+# Collection generations live in this many slots, by hash of the collection name.
+# Names sharing a slot only cost each other an extra refresh.
+GENERATION_SLOTS = 1024
+
+# State of a worker process, set by _init_worker
+_settings = None
+_role: Optional[str] = None
+_generation = None
+_generations = None
+_opened: List[int] = []
+_opened_at = 0.0
+_seen: Dict[str, int] = {}
+_connector = None
+_refreshes = 0
+_invalidations = 0
+_stale_reads = 0
+_cache_version = 0
+
+
+def _slot(collection_name: str) -> int:
+    return zlib.crc32(collection_name.encode("utf-8")) % GENERATION_SLOTS
+
+
+def _collection_names(method: str, args: tuple, kwargs: Dict[str, Any]) -> List[str]:
+    """Names of the collections a connector call reads or writes."""
+    from .server import ChromaConnector
+
+    try:
+        signature = inspect.signature(getattr(ChromaConnector, method))
+        arguments = signature.bind(None, *args, **kwargs).arguments
+    except (AttributeError, TypeError):
+        return []
+    names = list(arguments.get("collection_names") or [])
+    names += [arguments[key] for key in ("collection_name", "new_name", "new_collection_name")
+              if arguments.get(key)]
+    if method == "sequential_thinking" or THOUGHTS_COLLECTION in names:
+        # Thought writes also update the session index
+        names += [THOUGHTS_COLLECTION, SESSION_INDEX_COLLECTION]
+    return list(dict.fromkeys(names))
+
+
+def _open_connector():
+    from .server import ChromaConnector
+    return ChromaConnector(_settings)
+
+
+def _init_worker(settings, role: str, generation, generations):
+    global _settings, _role, _generation, _generations, _opened, _opened_at, _connector
+    _settings, _role, _generation, _generations = settings, role, generation, generations
+    _opened = generations[:]
+    _opened_at = time.monotonic()
+    _connector = _open_connector()
+    if settings.warm_embeddings:
+        _connector.warm_embeddings(settings.warm_embeddings)
+
+
+def _reopen():
+    """Reopen the client so index reads see the writer's commits.
+
+    Caches of collections the writer has not changed are kept.
+    """
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    global _opened, _opened_at, _refreshes, _invalidations
+    # Snapshot first, so a write landing during the reopen triggers another one
+    previous, _opened = _opened, _generations[:]
+    _opened_at = time.monotonic()
+    SharedSystemClient.clear_system_cache()
+    _connector.reopen_client()
+    _refreshes += 1
+    # Queries inside the staleness window cached results from the old indexes under the
+    # new generation; drop them for every collection written since the last open
+    for name in _seen:
+        slot = _slot(name)
+        if _opened[slot] != previous[slot]:
+            _connector.refresh_collection(name)
+            _invalidations += 1
+
+
+def _sync_reader(method: str, args: tuple, kwargs: Dict[str, Any],
+                 cache_settings: Optional[Tuple[int, Dict[str, bool]]]):
+    """Bring the reader's caches and client up to date for the collections a call reads."""
+    global _cache_version, _invalidations, _stale_reads
+    if cache_settings is not None and cache_settings[0] > _cache_version:
+        _cache_version, overrides = cache_settings
+        for name, enabled in overrides.items():
+            _connector.set_result_cache(name, enabled)
+
+    names = _collection_names(method, args, kwargs)
+    slots = [_slot(name) for name in names]
+    if method in INDEX_READ_METHODS and any(_generations[slot] != _opened[slot] for slot in slots):
+        if time.monotonic() - _opened_at >= _settings.reader_max_staleness:
+            _reopen()
+        else:
+            _stale_reads += 1
+    for name, slot in zip(names, slots, strict=True):
+        generation = _generations[slot]
+        if _seen.setdefault(name, generation) != generation:
+            _connector.refresh_collection(name)
+            _seen[name] = generation
+            _invalidations += 1
+
+
+def _call(method: str, args: tuple, kwargs: Dict[str, Any],
+          cache_settings: Optional[Tuple[int, Dict[str, bool]]] = None) -> Any:
+    if _role == "reader":
+        _sync_reader(method, args, kwargs, cache_settings)
+    try:
+        return getattr(_connector, method)(*args, **kwargs)
+    finally:
+        if _role == "writer" and method in MUTATING_METHODS:
+            # Bumped even if the write failed part way, since some of it may be committed
+            with _generation.get_lock():
+                _generation.value += 1
+            with _generations.get_lock():
+                for slot in {_slot(name) for name in _collection_names(method, args, kwargs)}:
+                    _generations[slot] += 1
+
+
+def _worker_stats() -> Dict[str, Any]:
+    return {"refreshes": _refreshes, "invalidations": _invalidations,
+            "stale_index_reads": _stale_reads,
+            "result_cache_hits": _connector.get_stats()["result_cache"]["hits"]}
+
+
+def _close_worker():
+    _connector.close()
+
+
+class ProcessTopology:
+    """Connector stand-in that forwards calls to a writer process or a pool of reader processes.
+
+    Methods in ``READ_METHODS`` go to the readers and everything else to the
+    writer. Arguments and results are pickled between processes; callable
+    arguments such as progress callbacks cannot cross and are dropped.
+    """
+
+    def __init__(self, settings, readers: int):
+        context = multiprocessing.get_context("spawn")
+        self.readers = readers
+        self.generation = context.Value("Q", 0)
+        self.generations = context.Array("Q", GENERATION_SLOTS)
+        self._writer = ProcessPoolExecutor(
+            max_workers=1, mp_context=context, initializer=_init_worker,
+            initargs=(settings, "writer", self.generation, self.generations),
+        )
+        # Let the writer create or migrate the database before readers open it
+        self._writer.submit(_worker_stats).result()
+        self._readers = ProcessPoolExecutor(
+            max_workers=readers, mp_context=context, initializer=_init_worker,
+            initargs=(settings, "reader", self.generation, self.generations),
+        )
+        self._calls = {"writer": 0, "reader": 0}
+        # Result cache switches, sent with every reader call so each reader applies the latest
+        self._cache_lock = threading.Lock()
+        self._cache_settings: Tuple[int, Dict[str, bool]] = (0, {})
+        logger.info(f"Started writer process and {readers} reader processes")
+
+    def _forward(self, method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        role = "reader" if method in READ_METHODS else "writer"
+        args = tuple(None if callable(arg) else arg for arg in args)
+        kwargs = {k: None if callable(v) else v for k, v in kwargs.items()}
+        self._calls[role] += 1
+        if role == "reader":
+            return self._readers.submit(_call, method, args, kwargs, self._cache_settings).result()
+        return self._writer.submit(_call, method, args, kwargs).result()
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return self._forward(method, args, kwargs)
+
+        call.__name__ = method
+        return call
+
+    def set_result_cache(self, collection_name: str, enabled: bool) -> str:
+        """Switch result caching on the writer and, from their next call, on every reader."""
+        message = self._forward("set_result_cache", (collection_name, enabled), {})
+        with self._cache_lock:
+            version, overrides = self._cache_settings
+            self._cache_settings = (version + 1, {**overrides, collection_name: enabled})
+        return message
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer connector stats plus routing and generation counters."""
+        stats = self._forward("get_stats", (), {})
+        stats["topology"] = {
+            "readers": self.readers,
+            "generation": self.generation.value,
+            "writer_calls": self._calls["writer"],
+            "reader_calls": self._calls["reader"],
+        }
+        return stats
+
+    def close(self):
+        """Commit the writer's buffered work and stop every worker process."""
+        try:
+            self._writer.submit(_close_worker).result()
+        except Exception as e:
+            logger.error(f"Failed to close writer connector: {str(e)}")
+        self._readers.shutdown(wait=True, cancel_futures=True)
+        self._writer.shutdown(wait=True)
@@ -0,0 +1,177 @@
+"""Write-behind buffer that group-commits small writes from a background thread."""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Queues items and hands them to ``commit`` in batches.
+
+    A batch is committed once ``max_batch`` items are waiting or the oldest
+    has waited ``max_delay`` seconds. ``flush`` commits everything queued so
+    far from the calling thread and returns only after any batch already
+    being committed has finished, so callers can read their own writes.
+    A batch that keeps failing is dropped after ``max_attempts`` tries and
+    kept for ``take_dropped``, so readers can be told what was lost. Only the
+    last ``max_dropped`` dropped items are kept for readers that never ask.
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[List[Any]], None],
+        max_batch: int = 64,
+        max_delay: float = 0.05,
+        max_attempts: int = 3,
+        max_dropped: int = 1024,
+        name: str = "chroma-mcp-write-behind",
+    ):
+        self._commit = commit
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._pending: List[Any] = []
+        # The batch being committed, still unreadable until its commit returns
+        self._in_flight: List[Any] = []
+        self._dropped: deque = deque(maxlen=max(1, max_dropped))
+        self._oldest: Optional[float] = None
+        self._attempts = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Held while a batch is taken and committed, so flush() waits for in-flight batches
+        self._commit_lock = threading.Lock()
+        self.batches = 0
+        self.committed = 0
+        self.failures = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any):
+        """Queue ``item`` for the next group commit."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(item)
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def pending(self, predicate: Optional[Callable[[Any], bool]] = None) -> bool:
+        """Whether a queued or in-flight item (matching ``predicate``, if given) is uncommitted."""
+        with self._cond:
+            waiting = self._pending + self._in_flight
+            if predicate is None:
+                return bool(waiting)
+            return any(predicate(item) for item in waiting)
+
+    def take_dropped(self, predicate: Optional[Callable[[Any], bool]] = None) -> List[Any]:
+        """Remove and return dropped items (matching ``predicate``, if given)."""
+        with self._cond:
+            taken: List[Any] = []
+            kept: deque = deque(maxlen=self._dropped.maxlen)
+            for item in self._dropped:
+                (taken if predicate is None or predicate(item) else kept).append(item)
+            self._dropped = kept
+            return taken
+
+    def flush(self) -> bool:
+        """Commit every queued item now. Returns False if the commit failed."""
+        with self._commit_lock:
+            ok = True
+            while True:
+                batch = self._take(self.max_batch)
+                if not batch:
+                    return ok
+                ok = self._commit_batch(batch) and ok
+                if not ok:
+                    return False
+
+    def close(self):
+        """Stop the background thread after committing everything queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        if not self.flush():
+            logger.error(f"Dropping {len(self._pending)} buffered writes that could not be "
+                         "committed on shutdown")
+
+    def _take(self, count: int) -> List[Any]:
+        with self._cond:
+            batch = self._pending[:count]
+            del self._pending[:count]
+            self._oldest = time.monotonic() if self._pending else None
+            return batch
+
+    def _ready(self) -> bool:
+        return (len(self._pending) >= self.max_batch
+                or time.monotonic() - self._oldest >= self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._pending or not self._ready()):
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, self._oldest + self.max_delay - time.monotonic())
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+            with self._commit_lock:
+                batch = self._take(self.max_batch)
+                if batch and not self._commit_batch(batch):
+                    # Back off so a failing backend is not hammered
+                    time.sleep(self.max_delay)
+
+    def _commit_batch(self, batch: List[Any]) -> bool:
+        with self._cond:
+            self._in_flight = batch
+        try:
+            self._commit(batch)
+        except Exception as e:
+            self.failures += 1
+            self._attempts += 1
+            with self._cond:
+                self._in_flight = []
+                if self._attempts >= self.max_attempts:
+                    self.dropped += len(batch)
+                    self._dropped.extend(batch)
+                    self._attempts = 0
+                    logger.error(f"Dropping {len(batch)} buffered writes after "
+                                 f"{self.max_attempts} failed commits: {str(e)}")
+                else:
+                    logger.warning(
+                        f"Group commit of {len(batch)} writes failed, will retry: {str(e)}"
+                    )
+                    self._pending[:0] = batch
+                    self._oldest = time.monotonic()
+            return False
+        with self._cond:
+            self._in_flight = []
+        self._attempts = 0
+        self.batches += 1
+        self.committed += len(batch)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and commit counters."""
+        with self._cond:
+            queued = len(self._pending)
+            unread = len(self._dropped)
+        return {
+            "pending": queued,
+            "max_batch": self.max_batch,
+            "max_delay_ms": round(self.max_delay * 1000, 1),
+            "batches": self.batches,
+            "committed": self.committed,
+            "avg_batch_size": round(self.committed / self.batches, 2) if self.batches else 0.0,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "dropped_unread": unread,
+        }
@@ -0,0 +1,64 @@
+"""Shared fixtures for connector unit tests.
+
+The default ONNX embedding model needs a network download, so connector
+tests use a small deterministic hash embedding instead.
+"""
+
+import hashlib
+from typing import List
+
+import numpy as np
+import pytest
+from chromadb.api import EmbeddingFunction
+from chromadb.utils.embedding_functions import register_embedding_function
+
+from chroma_mcp.server import ChromaConnector, ChromaSettings, create_parser
+
+
+@register_embedding_function
+class HashEmbeddingFunction(EmbeddingFunction):
+    """Deterministic 32-dimensional embedding derived from a SHA-256 digest."""
+
+    calls = 0
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input: List[str]):
+        HashEmbeddingFunction.calls += 1
+        vectors = []
+        for text in input:
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            vectors.append(np.frombuffer(digest, dtype=np.uint8).astype(np.float32) / 255.0)
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "hash"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashEmbeddingFunction()
+
+
+def make_settings(*extra_args: str) -> ChromaSettings:
+    args = create_parser().parse_args(["--client-type", "ephemeral", *extra_args])
+    return ChromaSettings(args)
+
+
+def _reset(connector: ChromaConnector):
+    for name in connector.list_collections():
+        connector.client.delete_collection(name)
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    monkeypatch.setitem(ChromaConnector._known_embedding_functions, "hash", HashEmbeddingFunction)
+    conn = ChromaConnector(make_settings())
+    _reset(conn)
+    yield conn
+    _reset(conn)
+    conn.close()
@@ -0,0 +1,102 @@
+"""Tests for connector caches."""
+
+import time
+
+import numpy as np
+import pytest
+from conftest import HashEmbeddingFunction
+
+from chroma_mcp.cache import CollectionCache, EmbeddingCache, ResultCache
+
+
+def test_collection_cache_lru_and_ttl():
+    cache = CollectionCache(max_size=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_connector_reuses_collection_handles(connector):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.add_documents("docs", ["alpha", "beta"], ids=["1", "2"])
+    assert connector.get_collection_count("docs") == 2
+
+    stats = connector.get_stats()["collection_cache"]
+    assert stats["hits"] >= 2
+    assert stats["misses"] == 0
+
+
+def test_connector_cache_follows_rename_and_delete(connector):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.modify_collection("docs", new_name="renamed")
+    assert connector.get_collection_count("renamed") == 0
+
+    with pytest.raises(Exception, match="docs"):
+        connector.get_collection_count("docs")
+
+    connector.delete_collection("renamed")
+    with pytest.raises(Exception, match="renamed"):
+        connector.get_collection_count("renamed")
+
+
+def test_embedding_cache_respects_memory_budget():
+    cache = EmbeddingCache(max_bytes=3 * (16 + EmbeddingCache.ENTRY_OVERHEAD + 20))
+    for i in range(5):
+        cache.put(("fn", f"q{i}"), np.zeros(4, dtype=np.float32))
+    stats = cache.stats()
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert stats["evictions"] >= 2
+    assert cache.get(("fn", "q4")) is not None
+    assert cache.get(("fn", "q0")) is None
+
+
+def test_repeat_queries_skip_embedding(connector):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.add_documents("docs", ["alpha", "beta", "gamma"], ids=["1", "2", "3"])
+
+    first = connector.query_documents("docs", ["alpha"], n_results=1)
+    calls = HashEmbeddingFunction.calls
+    second = connector.query_documents("docs", ["  alpha "], n_results=1)
+
+    assert HashEmbeddingFunction.calls == calls
+    assert first["ids"] == second["ids"] == [["1"]]
+    assert connector.get_stats()["query_embedding_cache"]["hits"] == 1
+
+
+def test_result_cache_is_opt_in_and_invalidated_by_writes(connector):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.add_documents("docs", ["alpha", "beta"], ids=["1", "2"])
+
+    connector.get_documents("docs", ids=["1"])
+    assert connector.get_stats()["result_cache"]["entries"] == 0
+
+    connector.set_result_cache("docs", True)
+    first = connector.get_documents("docs", ids=["1"])
+    assert connector.get_documents("docs", ids=["1"]) is first
+    assert connector.get_stats()["result_cache"]["hits"] == 1
+
+    connector.update_documents("docs", ids=["1"], documents=["alpha prime"])
+    refreshed = connector.get_documents("docs", ids=["1"])
+    assert refreshed["documents"] == ["alpha prime"]
+
+
+def test_result_cache_evicts_over_budget():
+    cache = ResultCache(max_bytes=2000, enabled_collections=["*"])
+    collection_key = (None, None, "docs")
+    for i in range(20):
+        key = cache.entry_key(collection_key, "get", {"ids": [str(i)]})
+        cache.put(key, {"documents": ["x" * 200]})
+    stats = cache.stats()
+    assert stats["bytes"] <= 2000
+    assert stats["evictions"] > 0
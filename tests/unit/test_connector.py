@@ -0,0 +1,386 @@
+"""Tests for ChromaConnector document operations."""
+
+import base64
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from chromadb.api.shared_system_client import SharedSystemClient
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from conftest import HashEmbeddingFunction, make_settings
+
+from chroma_mcp import topology as reader_topology
+from chroma_mcp.topology import ProcessTopology
+from chroma_mcp.topology import _worker_stats as worker_stats
+
+
+def _seed(connector, name="source", count=25):
+    connector.create_collection(name, embedding_function_name="hash", metadata={"team": "search"})
+    documents = [f"document number {i}" for i in range(count)]
+    connector.add_documents(name, documents, ids=[f"id-{i:03d}" for i in range(count)])
+    return documents
+
+
+def test_fork_copies_stored_embeddings_in_batches(connector):
+    _seed(connector)
+    progress = []
+    calls = HashEmbeddingFunction.calls
+
+    message = connector.fork_collection(
+        "source", "copy", batch_size=10,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    assert "with 25 documents" in message
+    assert HashEmbeddingFunction.calls == calls
+    assert progress == [(10, 25), (20, 25), (25, 25)]
+
+    source = connector.client.get_collection("source").get(include=["embeddings"])
+    target = connector.client.get_collection("copy")
+    copied = target.get(ids=source["ids"], include=["embeddings"])
+    np.testing.assert_allclose(copied["embeddings"], source["embeddings"])
+    assert target.metadata == {"team": "search"}
+    assert connector.get_collection_info("copy")["metadata"] == {"team": "search"}
+
+
+def test_fork_resumes_interrupted_copy(connector):
+    _seed(connector)
+    source = connector.client.get_collection("source")
+    first_page = source.get(limit=10, offset=0, include=["embeddings", "documents", "metadatas"])
+    partial = connector.client.create_collection(
+        "copy", metadata={"team": "search", "chroma_mcp_fork_source": "source"}
+    )
+    partial.add(ids=first_page["ids"], embeddings=first_page["embeddings"],
+                documents=first_page["documents"])
+
+    message = connector.fork_collection("source", "copy", batch_size=10)
+
+    assert "Resumed after 10" in message
+    assert connector.client.get_collection("copy").count() == 25
+    assert connector.client.get_collection("copy").metadata == {"team": "search"}
+
+
+def test_fork_refuses_to_overwrite_existing_collection(connector):
+    _seed(connector)
+    connector.create_collection("copy", embedding_function_name="hash")
+    with pytest.raises(Exception, match="already exists"):
+        connector.fork_collection("source", "copy")
+    assert sorted(connector.list_collections()) == ["copy", "source"]
+    assert connector.client.get_collection("copy").count() == 0
+
+
+def test_bulk_add_batches_in_order_with_parallel_embedding(connector):
+    connector.create_collection("bulk", embedding_function_name="hash")
+    documents = [f"bulk document {i}" for i in range(10)]
+    ids = [f"b{i}" for i in range(10)]
+    progress = []
+
+    result = connector.bulk_add_documents(
+        "bulk", documents, ids=ids, batch_size=4, max_parallel=3,
+        progress_callback=lambda done, total: progress.append(done),
+    )
+
+    assert result["documents_added"] == 10
+    assert [batch["size"] for batch in result["batches"]] == [4, 4, 2]
+    assert result["embedded_by"] == "server"
+    assert progress == [4, 8, 10]
+
+    stored = connector.client.get_collection("bulk").get(ids=ids,
+                                                         include=["embeddings", "documents"])
+    expected = HashEmbeddingFunction()(stored["documents"])
+    np.testing.assert_allclose(stored["embeddings"], np.array(expected))
+
+
+def test_bulk_add_validates_lengths(connector):
+    connector.create_collection("bulk", embedding_function_name="hash")
+    with pytest.raises(Exception, match="must match"):
+        connector.bulk_add_documents("bulk", ["a", "b"], ids=["only-one"])
+
+
+def test_upsert_skips_unchanged_documents(connector):
+    connector.create_collection("knowledge", embedding_function_name="hash")
+    first = connector.upsert_documents("knowledge", ["one", "two"], ids=["1", "2"],
+                                       metadatas=[{"v": 1}, {"v": 1}])
+    assert (first["inserted"], first["updated"], first["skipped"]) == (2, 0, 0)
+
+    calls = HashEmbeddingFunction.calls
+    second = connector.upsert_documents("knowledge", ["one", "two changed", "three"],
+                                        ids=["1", "2", "3"],
+                                        metadatas=[{"v": 1}, {"v": 1}, {"v": 1}])
+    assert (second["inserted"], second["updated"], second["skipped"]) == (1, 1, 1)
+    assert second["embedded"] == 2
+    # The two changed documents are split across the embedding workers
+    assert HashEmbeddingFunction.calls == calls + 2
+
+    third = connector.upsert_documents("knowledge", ["one"], ids=["1"], metadatas=[{"v": 2}])
+    assert third["metadata_only"] == 1
+    assert third["embedded"] == 0
+
+    stored = connector.client.get_collection("knowledge").get(ids=["1", "2"],
+                                                              include=["documents", "metadatas"])
+    assert stored["documents"] == ["one", "two changed"]
+    assert stored["metadatas"][0]["v"] == 2
+    assert "content_hash" in stored["metadatas"][0]
+
+
+def test_upsert_replaces_metadata_so_resyncs_are_skipped(connector):
+    connector.create_collection("knowledge", embedding_function_name="hash")
+    connector.upsert_documents("knowledge", ["one", "two"], ids=["1", "2"],
+                               metadatas=[{"v": 1, "draft": True}, {"v": 1, "draft": True}])
+
+    changed = connector.upsert_documents("knowledge", ["one", "two changed"], ids=["1", "2"],
+                                         metadatas=[{"v": 1}, {"v": 1}])
+    assert (changed["metadata_only"], changed["updated"]) == (1, 1)
+    stored = connector.client.get_collection("knowledge").get(ids=["1", "2"], include=["metadatas"])
+    assert [sorted(metadata) for metadata in stored["metadatas"]] == [["content_hash", "v"]] * 2
+
+    resync = connector.upsert_documents("knowledge", ["one", "two changed"], ids=["1", "2"],
+                                        metadatas=[{"v": 1}, {"v": 1}])
+    assert resync["skipped"] == 2
+
+
+def test_add_documents_with_precomputed_embeddings_skips_embedding(connector):
+    connector.create_collection("vectors", embedding_function_name="hash")
+    vectors = np.random.default_rng(0).random((3, 32), dtype=np.float32)
+    calls = HashEmbeddingFunction.calls
+
+    connector.add_documents("vectors", ["a", "b"], ids=["a", "b"], embeddings=vectors[:2].tolist())
+    encoded = base64.b64encode(vectors[2:].astype("<f4").tobytes()).decode()
+    connector.add_documents("vectors", ["c"], ids=["c"],
+                            embeddings={"dtype": "float32", "shape": [1, 32], "data": encoded})
+
+    assert HashEmbeddingFunction.calls == calls
+    stored = connector.client.get_collection("vectors").get(ids=["a", "b", "c"],
+                                                            include=["embeddings"])
+    np.testing.assert_allclose(stored["embeddings"], vectors)
+
+
+def test_add_documents_rejects_mismatched_embedding_dimension(connector):
+    _seed(connector, count=2)
+    with pytest.raises(Exception, match="dimension 8 does not match"):
+        connector.add_documents("source", ["x"], ids=["x"], embeddings=[[0.1] * 8])
+
+
+def test_query_collections_merges_top_k_across_collections(connector):
+    connector.create_collection("alpha", embedding_function_name="hash")
+    connector.create_collection("beta", embedding_function_name="hash")
+    connector.add_documents("alpha", ["red apple", "green pear"], ids=["a1", "a2"])
+    connector.add_documents("beta", ["red apple", "blue sky"], ids=["b1", "b2"])
+    calls = HashEmbeddingFunction.calls
+
+    result = connector.query_collections(["alpha", "beta"], ["red apple"], n_results=3)
+
+    assert HashEmbeddingFunction.calls == calls + 1
+    assert sorted(result["ids"][0][:2]) == ["a1", "b1"]
+    assert len(result["ids"][0]) == 3
+    assert result["distances"][0] == sorted(result["distances"][0])
+    assert set(result["collections"][0][:2]) == {"alpha", "beta"}
+    assert result["documents"][0][0] == "red apple"
+    assert result["timed_out"] == [] and result["errors"] == {}
+    assert not result["incomplete"]
+
+
+def test_query_collections_embeds_once_for_chroma_resolved_functions(connector, monkeypatch):
+    for name in ("alpha", "beta"):
+        connector.create_collection(name, embedding_function_name="hash")
+        connector.add_documents(name, ["red apple"], ids=[f"{name}-1"])
+        connector._get_collection(name)._embedding_function = DefaultEmbeddingFunction()
+    monkeypatch.setattr(connector._embeddings, "get", lambda name: HashEmbeddingFunction())
+    calls = HashEmbeddingFunction.calls
+
+    result = connector.query_collections(["alpha", "beta"], ["red apple"], n_results=2)
+
+    assert HashEmbeddingFunction.calls == calls + 1
+    assert sorted(result["ids"][0]) == ["alpha-1", "beta-1"]
+
+
+def test_query_collections_reports_queries_that_outlive_the_timeout(connector, monkeypatch):
+    for name in ("alpha", "beta"):
+        connector.create_collection(name, embedding_function_name="hash")
+        connector.add_documents(name, ["red apple"], ids=[f"{name}-1"])
+    release = threading.Event()
+    query = connector._query
+
+    def slow_query(name, *args):
+        if name == "beta":
+            release.wait(5)
+        return query(name, *args)
+
+    monkeypatch.setattr(connector, "_query", slow_query)
+    result = connector.query_collections(["alpha", "beta"], ["red apple"], timeout=0.2)
+
+    assert result["incomplete"]
+    assert result["searched"] == ["alpha"]
+    assert result["timed_out"] == result["still_running"] == ["beta"]
+    assert connector.get_stats()["fanout"]["abandoned_running"] == 1
+    release.set()
+    for _ in range(50):
+        if connector.get_stats()["fanout"]["abandoned_running"] == 0:
+            break
+        time.sleep(0.05)
+    assert connector.get_stats()["fanout"] == {"workers": connector.settings.fanout_workers,
+                                               "timeouts": 1, "abandoned_running": 0}
+
+
+def test_query_collections_requires_shared_embedding_space(connector):
+    connector.create_collection("alpha", embedding_function_name="hash")
+    connector.client.create_collection("other")
+    with pytest.raises(Exception, match="do not share an embedding space"):
+        connector.query_collections(["alpha", "other"], ["anything"])
+
+
+def test_query_collections_rejects_mixed_distance_spaces(connector):
+    connector.create_collection("alpha", embedding_function_name="hash",
+                                metadata={"hnsw:space": "cosine"})
+    connector.create_collection("beta", embedding_function_name="hash",
+                                metadata={"hnsw:space": "l2"})
+    with pytest.raises(Exception,
+                       match=r"do not share an embedding space.*alpha=hash/cosine.*beta=hash/l2"):
+        connector.query_collections(["alpha", "beta"], ["anything"])
+
+
+def test_cursor_pages_do_not_skip_or_repeat_during_writes(connector):
+    _seed(connector, count=25)
+    seen = []
+
+    page = connector.get_documents("source", limit=10)
+    seen += page["ids"]
+    # Rows deleted before the cursor and rows appended mid-scan
+    connector.delete_documents("source", ids=["id-001", "id-002"])
+    connector.add_documents("source", ["late arrival"], ids=["id-999"])
+    while page["next_cursor"]:
+        page = connector.get_documents("source", limit=10, cursor=page["next_cursor"])
+        seen += page["ids"]
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == {f"id-{i:03d}" for i in range(25)} | {"id-999"}
+
+
+def test_cursor_rejects_a_lost_position_instead_of_skipping(connector):
+    _seed(connector, count=60)
+    page = connector.get_documents("source", limit=40)
+    # More deletions before the cursor than the overlap window re-reads
+    connector.delete_documents("source", ids=[f"id-{i:03d}" for i in range(35)])
+    with pytest.raises(Exception, match="Cursor position lost"):
+        connector.get_documents("source", limit=10, cursor=page["next_cursor"])
+
+
+def test_cursor_is_bound_to_its_filters(connector):
+    _seed(connector, count=5)
+    page = connector.get_documents("source", limit=2)
+    with pytest.raises(Exception, match="different collection or filter"):
+        connector.get_documents("source", limit=2, where={"team": "x"}, cursor=page["next_cursor"])
+
+
+def test_reader_processes_see_writer_commits(tmp_path):
+    settings = make_settings("--client-type", "persistent", "--data-dir", str(tmp_path))
+    topology = ProcessTopology(settings, readers=2)
+    try:
+        topology.create_collection("docs")
+        topology.add_documents("docs", ["a", "b"], ids=["a", "b"],
+                               embeddings=[[0.1, 0.2], [0.2, 0.1]])
+        assert topology.get_collection_count("docs") == 2
+
+        topology.delete_documents("docs", ids=["a"])
+        assert topology.get_documents("docs")["ids"] == ["b"]
+
+        stats = topology.get_stats()["topology"]
+        assert stats["generation"] == 3
+        assert (stats["writer_calls"], stats["reader_calls"]) == (4, 2)
+    finally:
+        topology.close()
+
+
+def test_readers_refresh_only_collections_that_were_written(tmp_path):
+    settings = make_settings("--client-type", "persistent", "--data-dir", str(tmp_path),
+                             "--result-cache-mb", "8")
+    topology = ProcessTopology(settings, readers=1)
+
+    def reader_stats():
+        return topology._readers.submit(worker_stats).result()
+    try:
+        for name in ("docs", "other"):
+            topology.create_collection(name)
+            topology.add_documents(name, ["a"], ids=["a"], embeddings=[[1.0, 0.0]])
+        topology.set_result_cache("docs", True)
+
+        # The switch reaches the reader, which serves the repeated get from its cache
+        assert topology.get_documents("docs")["ids"] == ["a"]
+        assert topology.get_documents("docs")["ids"] == ["a"]
+        baseline = reader_stats()
+        assert baseline["result_cache_hits"] == 1
+
+        # A write to another collection leaves this reader's client and caches alone
+        topology.add_documents("other", ["b"], ids=["b"], embeddings=[[0.0, 1.0]])
+        assert topology.get_documents("docs")["ids"] == ["a"]
+        assert reader_stats() == {**baseline, "result_cache_hits": 2}
+
+        topology.add_documents("docs", ["b"], ids=["b"], embeddings=[[0.0, 1.0]])
+        assert topology.get_documents("docs")["ids"] == ["a", "b"]
+        stats = reader_stats()
+        assert (stats["refreshes"], stats["invalidations"]) == (baseline["refreshes"],
+                                                                baseline["invalidations"] + 1)
+    finally:
+        topology.close()
+
+
+def test_reader_reopens_at_most_once_per_staleness_window(monkeypatch):
+    reopened = []
+    generations = [0] * reader_topology.GENERATION_SLOTS
+    connector = SimpleNamespace(reopen_client=lambda: reopened.append(True),
+                                refresh_collection=lambda name: None)
+    monkeypatch.setattr(reader_topology, "_settings", make_settings("--reader-max-staleness", "60"))
+    monkeypatch.setattr(reader_topology, "_connector", connector)
+    monkeypatch.setattr(reader_topology, "_generations", generations)
+    monkeypatch.setattr(reader_topology, "_opened", generations[:])
+    monkeypatch.setattr(reader_topology, "_opened_at", time.monotonic() - 120)
+    monkeypatch.setattr(reader_topology, "_seen", {})
+    monkeypatch.setattr(reader_topology, "_stale_reads", 0)
+    monkeypatch.setattr(reader_topology, "_refreshes", 0)
+
+    def write_then_query():
+        generations[reader_topology._slot("docs")] += 1
+        reader_topology._sync_reader("query_documents", ("docs", ["q"]), {}, None)
+
+    write_then_query()
+    write_then_query()
+    # The second query falls inside the window opened by the first reopen
+    assert (len(reopened), reader_topology._stale_reads) == (1, 1)
+
+    monkeypatch.setattr(reader_topology, "_opened_at", time.monotonic() - 61)
+    write_then_query()
+    assert (len(reopened), reader_topology._stale_reads) == (2, 1)
+
+
+def test_reader_drops_results_cached_from_a_stale_index(connector, monkeypatch):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.add_documents("docs", ["a"], ids=["a"])
+    connector.set_result_cache("docs", True)
+    # An in-process client cannot actually go stale; keep it and count reopens instead
+    reopened = []
+    monkeypatch.setattr(connector, "reopen_client", lambda: reopened.append(True))
+    monkeypatch.setattr(SharedSystemClient, "clear_system_cache", lambda: None)
+    generations = [0] * reader_topology.GENERATION_SLOTS
+    monkeypatch.setattr(reader_topology, "_settings", make_settings("--reader-max-staleness", "60"))
+    monkeypatch.setattr(reader_topology, "_connector", connector)
+    monkeypatch.setattr(reader_topology, "_generations", generations)
+    monkeypatch.setattr(reader_topology, "_opened", generations[:])
+    monkeypatch.setattr(reader_topology, "_opened_at", time.monotonic())
+    monkeypatch.setattr(reader_topology, "_seen", {})
+
+    def query():
+        reader_topology._sync_reader("query_documents", ("docs", ["a"]), {}, None)
+        return sorted(connector.query_documents("docs", ["a"])["ids"][0])
+
+    assert query() == ["a"]
+    # The writer commits "b"; inside the window this reader answers from its old index
+    generations[reader_topology._slot("docs")] += 1
+    assert query() == ["a"]
+    connector.client.get_collection("docs").add(ids=["b"], documents=["b"])
+
+    # After the window the reader reopens, and the result cached while stale is not served
+    monkeypatch.setattr(reader_topology, "_opened_at", time.monotonic() - 61)
+    assert query() == ["a", "b"]
+    assert len(reopened) == 1
@@ -0,0 +1,35 @@
+"""Tests for the shared embedding function registry."""
+
+import pytest
+from conftest import HashEmbeddingFunction
+
+from chroma_mcp.embeddings import EmbeddingFunctionRegistry
+
+
+def test_registry_builds_each_function_once():
+    registry = EmbeddingFunctionRegistry({"hash": HashEmbeddingFunction})
+    first = registry.get("hash")
+    assert registry.get("hash") is first
+    assert registry.get("unknown") is None
+
+
+def test_registry_warm_embeds_once_and_rejects_unknown_names():
+    registry = EmbeddingFunctionRegistry({"hash": HashEmbeddingFunction})
+    before = HashEmbeddingFunction.calls
+    timings = registry.warm(["hash"])
+    assert set(timings) == {"hash"}
+    assert HashEmbeddingFunction.calls == before + 1
+
+    with pytest.raises(ValueError):
+        registry.warm(["missing"])
+
+
+def test_collections_share_one_embedding_function(connector):
+    connector.create_collection("first", embedding_function_name="hash")
+    connector.create_collection("second", embedding_function_name="hash")
+    connector._collections.clear()
+
+    first = connector._get_collection("first")
+    second = connector._get_collection("second")
+    assert first._embedding_function is second._embedding_function
+    assert first._embedding_function is connector._embeddings.get("hash")
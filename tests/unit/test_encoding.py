@@ -0,0 +1,122 @@
+"""Tests for embedding wire formats and response formats."""
+
+import base64
+
+import numpy as np
+import pytest
+
+from chroma_mcp import client as client_module
+from chroma_mcp.client import ChromaMCP
+from chroma_mcp.encoding import ResponseFormat, decode_embeddings, format_result
+
+
+def test_decode_embeddings_accepts_every_wire_format():
+    vectors = np.arange(6, dtype=np.float32).reshape(2, 3)
+    block = base64.b64encode(vectors.astype("<f4").tobytes()).decode()
+    per_vector = [base64.b64encode(v.astype("<f4").tobytes()).decode() for v in vectors]
+    half = base64.b64encode(vectors.astype("<f2").tobytes()).decode()
+
+    for value in (vectors.tolist(), block, per_vector,
+                  {"dtype": "float32", "shape": [2, 3], "data": block},
+                  {"dtype": "float16", "shape": [2, 3], "data": half}):
+        np.testing.assert_array_equal(decode_embeddings(value, 2), vectors)
+
+
+def test_decode_embeddings_rejects_bad_input():
+    with pytest.raises(ValueError, match="must match number of documents"):
+        decode_embeddings([[1.0, 2.0]], 2)
+    with pytest.raises(ValueError, match="same dimension"):
+        decode_embeddings([[1.0, 2.0], [1.0]], 2)
+    with pytest.raises(ValueError, match="NaN"):
+        decode_embeddings([[float("nan")]], 1)
+    with pytest.raises(ValueError, match="Invalid base64"):
+        decode_embeddings(["not base64!"], 1)
+
+
+def test_store_looks_up_the_stored_dimension_once(monkeypatch):
+    lookups = []
+    monkeypatch.setattr(client_module, "stored_dimension",
+                        lambda collection: lookups.append(collection.name))
+    mcp = ChromaMCP(client_type="ephemeral")
+
+    mcp.store({"collection_name": "vectors", "documents": ["a"], "ids": ["a"],
+               "embeddings": [[1.0, 0.0]]})
+    mcp.store({"collection_name": "vectors", "documents": ["b"], "ids": ["b"],
+               "embeddings": [[0.0, 1.0]]})
+    with pytest.raises(ValueError, match="dimension"):
+        mcp.store({"collection_name": "vectors", "documents": ["c"], "ids": ["c"],
+                   "embeddings": [[1.0, 0.0, 0.0]]})
+
+    assert lookups == ["vectors"]
+    mcp.client.delete_collection("vectors")
+
+
+QUERY_RESULT = {
+    "ids": [["a", "b"]],
+    "documents": [["a long document body", None]],
+    "metadatas": [[{"source": "x", "page": 1}, {"source": "y", "page": 2}]],
+    "distances": [[0.1, 0.2]],
+    "embeddings": None,
+    "uris": None,
+    "data": None,
+    "included": ["documents", "metadatas", "distances"],
+}
+
+
+def test_records_format_pivots_columns():
+    formatted = format_result(QUERY_RESULT, ResponseFormat.RECORDS, nested=True)
+    assert formatted["results"] == [[
+        {"id": "a", "document": "a long document body", "metadata": {"source": "x", "page": 1},
+         "distance": 0.1},
+        {"id": "b", "document": None, "metadata": {"source": "y", "page": 2}, "distance": 0.2},
+    ]]
+
+
+def test_compact_format_drops_nulls_projects_and_truncates():
+    formatted = format_result(QUERY_RESULT, "compact", nested=True, metadata_keys=["source"],
+                              max_chars=6)
+    assert formatted["results"] == [[
+        {"id": "a", "document": "a long…", "metadata": {"source": "x"}, "distance": 0.1},
+        {"id": "b", "metadata": {"source": "y"}, "distance": 0.2},
+    ]]
+
+
+def test_get_documents_reports_bytes_saved(connector):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.add_documents("docs", ["x" * 200, "y" * 200], ids=["1", "2"],
+                            metadatas=[{"a": 1, "b": 2}] * 2)
+
+    result = connector.get_documents("docs", response_format="compact", metadata_keys=["a"],
+                                     max_chars=10)
+
+    assert [record["document"] for record in result["results"]] == ["x" * 10 + "…", "y" * 10 + "…"]
+    assert result["bytes_saved"] > 300
+    assert connector.get_stats()["response_format"]["bytes_saved"] == result["bytes_saved"]
+
+    # Only one response in --payload-stats-every (default 100) pays for measuring
+    again = connector.get_documents("docs", response_format="compact", metadata_keys=["a"],
+                                    max_chars=10)
+    assert "bytes_saved" not in again
+    stats = connector.get_stats()["response_format"]
+    assert (stats["formatted_responses"], stats["responses"]) == (2, 1)
+
+
+def test_embeddings_are_returned_as_binary_blocks(connector):
+    connector.create_collection("vectors", embedding_function_name="hash")
+    vectors = np.random.default_rng(1).random((2, 32), dtype=np.float32)
+    connector.add_documents("vectors", ["a", "b"], ids=["a", "b"], embeddings=vectors.tolist())
+
+    got = connector.get_documents("vectors", ids=["a", "b"], include=["embeddings"])
+    assert got["embeddings"]["shape"] == [2, 32]
+    np.testing.assert_array_equal(decode_embeddings(got["embeddings"], 2), vectors)
+
+    half = connector.peek_collection("vectors", include_embeddings=True, embedding_dtype="float16")
+    np.testing.assert_allclose(decode_embeddings(half["embeddings"], 2), vectors, atol=1e-3)
+
+    records = connector.get_documents("vectors", ids=["a"], include=["embeddings"],
+                                      response_format="records")
+    np.testing.assert_array_equal(decode_embeddings([records["results"][0]["embedding"]], 1),
+                                  vectors[:1])
+
+    queried = connector.query_documents("vectors", ["a"], n_results=2, include=["embeddings"])
+    assert len(queried["embeddings"]) == 1 and queried["embeddings"][0]["shape"] == [2, 32]
@@ -0,0 +1,88 @@
+"""Tests for the bounded tool executor."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from chroma_mcp.executor import ServerBusyError, ToolExecutor, parse_tool_limits
+
+
+def test_parse_tool_limits():
+    assert parse_tool_limits(None) == {}
+    assert parse_tool_limits("chroma_add_documents=2, chroma_fork_collection=1") == {
+        "chroma_add_documents": 2,
+        "chroma_fork_collection": 1,
+    }
+    with pytest.raises(ValueError):
+        parse_tool_limits("chroma_add_documents")
+    with pytest.raises(ValueError):
+        parse_tool_limits("chroma_add_documents=0")
+
+
+def test_calls_run_off_the_event_loop_in_parallel():
+    executor = ToolExecutor(max_workers=4)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def blocking():
+            threads.append(threading.get_ident())
+            time.sleep(0.2)
+            return "ok"
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *[executor.run("chroma_query_documents", blocking) for _ in range(4)]
+        )
+        elapsed = time.monotonic() - start
+        return loop_thread, threads, results, elapsed
+
+    loop_thread, threads, results, elapsed = asyncio.run(main())
+    executor.shutdown()
+
+    assert results == ["ok"] * 4
+    assert loop_thread not in threads
+    assert elapsed < 0.6
+
+
+def test_tool_limit_caps_concurrency():
+    executor = ToolExecutor(max_workers=4, tool_limits={"chroma_add_documents": 1})
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def write():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*[executor.run("chroma_add_documents", write) for _ in range(4)])
+
+    asyncio.run(main())
+    executor.shutdown()
+    assert max(peak) == 1
+
+
+def test_full_queue_rejects_new_calls():
+    executor = ToolExecutor(max_workers=1, queue_depth=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(executor.run("chroma_add_documents", release.wait))
+        second = asyncio.ensure_future(executor.run("chroma_add_documents", release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServerBusyError):
+            await executor.run("chroma_query_documents", lambda: None)
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
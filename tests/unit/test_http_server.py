@@ -0,0 +1,96 @@
+"""Tests for the HTTP gateway's JSON-RPC batches and the streamable-http transport modes."""
+
+import pytest
+from conftest import HashEmbeddingFunction, make_settings
+from fastapi.testclient import TestClient
+
+from chroma_mcp import http_server
+from chroma_mcp.server import ChromaConnector, ChromaMCPServer
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setitem(ChromaConnector._known_embedding_functions, "hash", HashEmbeddingFunction)
+    server = http_server.init_server(make_settings(), batch_concurrency=2, max_batch_size=10)
+    for name in server.connector.list_collections():
+        server.connector.client.delete_collection(name)
+    yield TestClient(http_server.app)
+    for name in server.connector.list_collections():
+        server.connector.client.delete_collection(name)
+    server.close()
+    http_server._server = None
+
+
+def _call(method, req_id=None, **params):
+    body = {"jsonrpc": "2.0", "method": method, "params": params}
+    if req_id is not None:
+        body["id"] = req_id
+    return body
+
+
+def test_batch_runs_in_order_and_reads_see_earlier_writes(gateway):
+    batch = [
+        _call("chroma_create_collection", 1, collection_name="docs",
+              embedding_function_name="hash"),
+        _call("chroma_add_documents", 2, collection_name="docs", documents=["a", "b"],
+              ids=["a", "b"]),
+        _call("chroma_get_collection_count", 3, collection_name="docs"),
+        _call("chroma_get_documents", "four", collection_name="docs", ids=["b"]),
+        _call("chroma_list_collections", 5),
+    ]
+
+    responses = gateway.post("/", json=batch).json()
+
+    assert [r["id"] for r in responses] == [1, 2, 3, "four", 5]
+    assert "error" not in responses[1]
+    assert responses[2]["result"] == 2
+    assert responses[3]["result"]["documents"] == ["b"]
+    assert responses[4]["result"] == ["docs"]
+
+
+def test_batch_errors_are_per_request_and_notifications_are_silent(gateway):
+    batch = [
+        _call("chroma_list_collections", 1),
+        _call("chroma_list_collections"),
+        _call("no_such_tool", 2),
+        {"jsonrpc": "1.0", "method": "chroma_list_collections", "id": 3},
+        7,
+        _call("chroma_get_collection_count", 4, collection_name="missing"),
+    ]
+
+    responses = gateway.post("/", json=batch).json()
+
+    assert [r["id"] for r in responses] == [1, 2, 3, None, 4]
+    codes = [r.get("error", {}).get("code") for r in responses]
+    assert codes == [None, -32601, -32600, -32600, -32603]
+
+
+def test_empty_oversized_and_notification_only_batches(gateway):
+    assert gateway.post("/", json=[]).json()["error"]["code"] == -32600
+    oversized = [_call("chroma_list_collections", n) for n in range(11)]
+    assert gateway.post("/", json=oversized).json()["error"]["code"] == -32600
+    assert gateway.post("/", json=[_call("chroma_list_collections")]).status_code == 204
+    single = gateway.post("/", json=_call("chroma_list_collections", 9)).json()
+    assert single == {"jsonrpc": "2.0", "result": [], "id": 9}
+
+
+@pytest.mark.parametrize("stateless", [False, True])
+def test_stateless_http_serves_calls_without_a_session(stateless):
+    server = ChromaMCPServer(make_settings(*(["--stateless-http"] if stateless else [])))
+    call = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "chroma_get_collection_count",
+                       "arguments": {"collection_name": "missing"}}}
+    try:
+        with TestClient(server.streamable_http_app(), base_url="http://localhost:8000") as client:
+            response = client.post("/mcp", json=call,
+                                   headers={"Accept": "application/json, text/event-stream"})
+    finally:
+        server.close()
+
+    if not stateless:
+        assert response.status_code == 400
+        return
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "mcp-session-id" not in response.headers
+    assert response.json()["result"]["isError"]
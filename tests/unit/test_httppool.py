@@ -0,0 +1,104 @@
+"""Tests for the pooled HTTP client transport."""
+
+import gzip
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from chroma_mcp.httppool import configure_client, warm_connections
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"nanosecond heartbeat": 1})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        _Handler.received.append((self.headers.get("Content-Encoding"), json.loads(body)))
+        self._reply({})
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubClient:
+    """Just enough of a Chroma HttpClient: a server API holding an httpx session."""
+
+    def __init__(self, url):
+        self.url = url
+        self._server = SimpleNamespace(_session=httpx.Client(headers={"x-chroma-token": "secret"}),
+                                       _settings=SimpleNamespace(chroma_server_ssl_verify=None))
+
+    def heartbeat(self):
+        response = self._server._session.get(f"{self.url}/api/v2/heartbeat")
+        return response.json()["nanosecond heartbeat"]
+
+
+@pytest.fixture
+def chroma_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _Handler.received = []
+    client = _StubClient(f"http://127.0.0.1:{server.server_address[1]}")
+    yield client
+    client._server._session.close()
+    server.shutdown()
+
+
+def test_warm_up_opens_every_connection(chroma_stub):
+    pool = configure_client(chroma_stub, max_connections=8, max_keepalive=8, keepalive_expiry=30,
+                            connect_timeout=5, read_timeout=5)
+
+    warm_connections(chroma_stub, 3, timeout=5)
+
+    assert pool.stats() == {"connections": 3, "idle": 3, "active": 0, "requests": 3,
+                            "compressed_requests": 0, "compressed_bytes_saved": 0}
+    assert chroma_stub._server._session.headers["x-chroma-token"] == "secret"
+
+
+def test_large_request_bodies_are_gzipped(chroma_stub):
+    pool = configure_client(chroma_stub, compress_min_bytes=1024)
+    session = chroma_stub._server._session
+    documents = {"documents": ["the same document text"] * 200}
+
+    session.post(f"{chroma_stub.url}/api/v2/add", json=documents)
+    session.post(f"{chroma_stub.url}/api/v2/add", json={"documents": ["small"]})
+
+    assert _Handler.received == [("gzip", documents), (None, {"documents": ["small"]})]
+    stats = pool.stats()
+    assert stats["compressed_requests"] == 1 and stats["compressed_bytes_saved"] > 0
+
+
+def test_clients_without_a_replaceable_session_keep_the_stock_pool(caplog):
+    heartbeats = []
+    client = SimpleNamespace(_server=SimpleNamespace(), heartbeat=lambda: heartbeats.append(1))
+
+    assert configure_client(client, max_connections=8) is None
+    assert "stock connection pool" in caplog.text
+    warm_connections(client, 3)
+    assert heartbeats == [1]
+
+
+def test_http2_requires_h2(chroma_stub, monkeypatch):
+    monkeypatch.setitem(sys.modules, "h2", None)
+    with pytest.raises(ValueError, match="h2"):
+        configure_client(chroma_stub, http2=True)
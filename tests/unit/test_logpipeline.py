@@ -0,0 +1,96 @@
+"""Tests for the queued structured logging pipeline."""
+
+import io
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from chroma_mcp import logpipeline
+from chroma_mcp.logpipeline import (
+    EventSampler,
+    JsonLineFormatter,
+    LogPipeline,
+    parse_sample_rates,
+    summarize,
+)
+
+
+def test_summaries_cap_payload_size():
+    params = {"collection_name": "docs", "documents": ["x" * 10_000] * 500, "ids": ["a", "b"],
+              "where": {"topic": "y" * 300}, "embeddings": np.zeros((3, 384))}
+
+    summary = summarize(params)
+
+    assert summary["collection_name"] == "docs"
+    assert summary["documents"] == {"items": 500}
+    assert summary["ids"] == ["a", "b"]
+    assert summary["where"]["topic"].endswith("…(+100 chars)")
+    assert summary["embeddings"] == {"shape": [3, 384], "dtype": "float64"}
+
+
+def test_sampler_keeps_every_nth_event():
+    sampler = EventSampler(parse_sample_rates("tool_call=0.25,noise=0"))
+
+    kept = [sampler.keep("tool_call") for _ in range(8)]
+
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert not sampler.keep("noise") and sampler.keep("other")
+    assert sampler.stats()["events"]["tool_call"] == {"seen": 8, "kept": 2}
+    with pytest.raises(ValueError):
+        parse_sample_rates("tool_call=2")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    pipeline = LogPipeline(logging.NullHandler(), queue_size=2)
+    test_logger = logging.getLogger("chroma_mcp.tests.dropping")
+    test_logger.addHandler(pipeline.handler)
+    try:
+        for n in range(5):
+            test_logger.warning("record %d", n)
+    finally:
+        test_logger.removeHandler(pipeline.handler)
+
+    assert pipeline.stats() == {"queued": 2, "queue_size": 2, "dropped": 3}
+
+
+def test_stop_writes_out_a_full_queue():
+    stream = io.StringIO()
+    pipeline = LogPipeline(logging.StreamHandler(stream), queue_size=2)
+    test_logger = logging.getLogger("chroma_mcp.tests.stopping")
+    test_logger.addHandler(pipeline.handler)
+    try:
+        for n in range(2):
+            test_logger.warning("record %d", n)
+    finally:
+        test_logger.removeHandler(pipeline.handler)
+
+    pipeline.start()
+    pipeline.stop()
+    assert stream.getvalue().splitlines() == ["record 0", "record 1"]
+    assert pipeline.stats()["queued"] == 0
+
+
+def test_events_are_written_as_json_lines(monkeypatch):
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(JsonLineFormatter())
+    pipeline = LogPipeline(target)
+    test_logger = logging.getLogger("chroma_mcp.tests.json")
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(pipeline.handler)
+    monkeypatch.setattr(logpipeline, "_sampler", EventSampler({"rpc_call": 0.5}))
+    pipeline.start()
+    try:
+        for n in range(4):
+            logpipeline.log_event(test_logger, "rpc_call", method="chroma_add_documents", id=n,
+                                  params={"documents": ["doc"] * 100})
+    finally:
+        pipeline.stop()
+        test_logger.removeHandler(pipeline.handler)
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["id"] for r in records] == [0, 2]
+    assert records[0]["event"] == "rpc_call" and records[0]["level"] == "INFO"
+    assert records[0]["params"] == {"documents": {"items": 100}}
@@ -0,0 +1,149 @@
+"""Tests for read routing across Chroma read replicas."""
+
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from chromadb.errors import NotFoundError
+
+from chroma_mcp import routing
+from chroma_mcp.routing import ReplicaRouter, heartbeat, parse_hosts
+
+
+class _FakeReplica:
+    def __init__(self):
+        self.up = True
+
+    def heartbeat(self):
+        if not self.up:
+            raise httpx.ConnectError("connection refused")
+        return 1
+
+
+@pytest.fixture
+def replicas():
+    clients = {"r1": _FakeReplica(), "r2": _FakeReplica()}
+    router = ReplicaRouter({name: (lambda c=client: c) for name, client in clients.items()},
+                           heartbeat_interval=3600)
+    yield router, clients
+    router.close()
+
+
+def test_parse_hosts_splits_primary_and_replicas():
+    assert parse_hosts("primary, replica-1:8001,replica-2", "8000") == [
+        ("primary", "8000"), ("replica-1", "8001"), ("replica-2", "8000")]
+    assert parse_hosts("https://chroma.example.com:443", None) == [
+        ("https://chroma.example.com:443", None)
+    ]
+    with pytest.raises(ValueError):
+        parse_hosts(" , ", "8000")
+
+
+def test_parse_hosts_accepts_ipv6_addresses():
+    assert parse_hosts("[::1]:8001,[fe80::2],fe80::3", "8000") == [
+        ("[::1]", "8001"), ("[fe80::2]", "8000"), ("[fe80::3]", "8000")]
+    with pytest.raises(ValueError):
+        parse_hosts("[::1]8001", "8000")
+
+
+def test_heartbeat_passes_its_timeout_to_http_clients():
+    requests = []
+
+    class _Server:
+        def _make_request(self, method, path, **kwargs):
+            requests.append((method, path, kwargs))
+            return {"nanosecond heartbeat": 1}
+
+    class _Client:
+        _server = _Server()
+
+    heartbeat(_Client(), 2.5)
+    assert requests == [("get", "/heartbeat", {"timeout": 2.5})]
+
+
+def test_heartbeat_falls_back_to_the_public_call(caplog, monkeypatch):
+    monkeypatch.setattr(routing, "_warned_untimed_heartbeat", False)
+    client = SimpleNamespace(_server=SimpleNamespace(), heartbeat=lambda: 1)
+
+    assert heartbeat(client, 2.5) == 1
+    assert "own timeout" in caplog.text
+
+
+def test_reads_go_to_least_outstanding_replica(replicas):
+    router, _ = replicas
+    served = []
+
+    def nested(name, client):
+        # While this read is in flight the other replica is less loaded
+        served.append(name)
+        return router.run(lambda inner, c: served.append(inner), lambda: served.append("primary"))
+
+    router.run(nested, lambda: served.append("primary"))
+    router.run(lambda name, c: served.append(name), lambda: served.append("primary"))
+
+    assert served[0] != served[1]
+    assert "primary" not in served
+    assert [r["outstanding"] for r in router.stats()["replicas"]] == [0, 0]
+
+
+def test_failed_replica_falls_back_and_recovers_on_heartbeat(replicas):
+    router, clients = replicas
+
+    def read(name, client):
+        if name == "r1":
+            raise httpx.ConnectError("connection reset")
+        return name
+
+    results = {router.run(read, lambda: "primary") for _ in range(4)}
+    assert results == {"primary", "r2"}
+    assert [r["healthy"] for r in router.stats()["replicas"]] == [False, True]
+
+    clients["r2"].up = False
+    router.check()
+    assert router.run(read, lambda: "primary") == "primary"
+
+    clients["r2"].up = True
+    router.check()
+    assert {router.run(lambda name, c: name, lambda: "primary") for _ in range(4)} == {"r1", "r2"}
+
+
+def test_missing_collection_on_replica_reads_the_primary(replicas):
+    router, _ = replicas
+
+    def read(name, client):
+        raise NotFoundError("Collection docs does not exist")
+
+    assert router.run(read, lambda: "primary") == "primary"
+    assert all(r["healthy"] for r in router.stats()["replicas"])
+
+
+def test_reads_after_a_write_go_to_the_primary(replicas):
+    router, _ = replicas
+    router.read_after_write = 0.2
+    router.record_write("docs")
+
+    assert router.run(lambda name, c: name, lambda: "primary", "docs") == "primary"
+    assert router.run(lambda name, c: name, lambda: "primary", "other") != "primary"
+    time.sleep(0.25)
+    assert router.run(lambda name, c: name, lambda: "primary", "docs") != "primary"
+    assert router.stats()["primary_reads_after_write"] == 1
+
+
+def test_connector_routes_reads_to_replicas(connector):
+    connector.create_collection("docs", embedding_function_name="hash")
+    connector.add_documents("docs", ["alpha", "beta"], ids=["a", "b"])
+    # The ephemeral client doubles as a replica holding the same data
+    connector._router = ReplicaRouter({"replica": lambda: connector.client},
+                                      heartbeat_interval=3600)
+
+    assert connector.get_collection_count("docs") == 2
+    assert connector.get_documents("docs", ids=["b"])["documents"] == ["beta"]
+    assert connector.query_documents("docs", ["alpha"], n_results=1)["ids"] == [["a"]]
+
+    # Reads just after a write skip replicas, which may not have caught up yet
+    connector.add_documents("docs", ["gamma"], ids=["c"])
+    assert connector.get_collection_count("docs") == 3
+    stats = connector.get_stats()["read_replicas"]
+    assert stats["replicas"][0]["requests"] == 3
+    assert stats["primary_reads_after_write"] == 1
@@ -0,0 +1,58 @@
+"""Tests for HTTP response serialization."""
+
+import json
+
+import numpy as np
+import pytest
+from starlette.responses import StreamingResponse
+
+from chroma_mcp import serialization
+from chroma_mcp.serialization import ResponseSerializer, dumps_text
+
+ENCODERS = ["json"] + (["orjson"] if serialization.orjson is not None else [])
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_numpy_values_encode_compactly(encoder):
+    value = {"embeddings": np.arange(4, dtype=np.float32).reshape(2, 2),
+             "distance": np.float32(0.5), "ids": ["a", "é"], "big": 2 ** 70}
+
+    data = ResponseSerializer(encoder).dumps(value)
+
+    assert json.loads(data) == {"embeddings": [[0.0, 1.0], [2.0, 3.0]], "distance": 0.5,
+                                "ids": ["a", "é"], "big": 2 ** 70}
+    assert b" " not in data
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_large_responses_are_streamed_in_chunks(encoder):
+    serializer = ResponseSerializer(encoder, stream_threshold=1024, chunk_size=256)
+    value = {"documents": [f"document {n}" for n in range(500)]}
+
+    chunks = list(serializer.iter_encode(value))
+    assert len(chunks) > 1 and json.loads(b"".join(chunks)) == value
+    assert isinstance(serializer.response(value), StreamingResponse)
+
+    small = serializer.response({"result": 1})
+    assert not isinstance(small, StreamingResponse) and small.body == b'{"result":1}'
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_streamed_chunks_stay_near_chunk_size(encoder):
+    serializer = ResponseSerializer(encoder, chunk_size=4096)
+    value = {"ids": [[f"id-{n}" for n in range(20000)]],
+             "embeddings": np.ones((500, 64), dtype=np.float32),
+             "distances": [[0.5] * 20000], 7: None, "big": 2 ** 70}
+
+    chunks = list(serializer.iter_encode(value))
+
+    assert b"".join(chunks) == serializer.dumps(value)
+    assert max(len(chunk) for chunk in chunks) < 3 * 4096
+
+
+def test_encoder_selection(monkeypatch):
+    assert dumps_text([1, 2]) == "[1,2]"
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert ResponseSerializer("auto").encoder == "json"
+    with pytest.raises(ValueError, match="orjson is not installed"):
+        ResponseSerializer("orjson")
@@ -0,0 +1,329 @@
+"""Tests for the sequential thinking session index."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+from conftest import HashEmbeddingFunction, make_settings
+
+from chroma_mcp.graph import ThoughtGraphStore
+from chroma_mcp.server import ChromaConnector
+from chroma_mcp.sessions import (
+    SESSION_INDEX_COLLECTION,
+    THOUGHTS_COLLECTION,
+    apply_thought,
+    update_centroids,
+)
+from chroma_mcp.writebehind import WriteBehindBuffer
+
+
+@pytest.fixture
+def thinking(connector):
+    connector.create_collection(THOUGHTS_COLLECTION, embedding_function_name="hash")
+    return connector
+
+
+def _think(connector, session_id, count, **extra):
+    for n in range(1, count + 1):
+        connector.sequential_thinking(f"{session_id} thought {n}", n, count, n < count,
+                                      session_id=session_id, **extra)
+
+
+def test_apply_thought_accumulates_flags():
+    metadata = {"session_id": "s", "thought_number": 1, "total_thoughts": 3, "timestamp": 10}
+    entry = apply_thought(None, metadata, "s_1")
+    entry = apply_thought(entry, {"session_id": "s", "thought_number": 2, "total_thoughts": 4,
+                                  "timestamp": 20, "branch_id": "b"}, "s_2_branch_b")
+    assert entry["thought_count"] == 2
+    assert (entry["main_thought_count"], entry["last_thought_id"]) == (1, "s_1")
+    assert entry["total_thoughts"] == 4
+    assert (entry["first_timestamp"], entry["last_updated"]) == (10, 20)
+    assert entry["has_branches"] and not entry["has_revisions"]
+
+
+def test_sessions_are_listed_from_the_index(thinking):
+    _think(thinking, "short", 2)
+    _think(thinking, "long", 5)
+    thinking.sequential_thinking("a revision", 2, 5, True, session_id="long", is_revision=True,
+                                 revises_thought=2)
+
+    result = thinking.get_similar_sessions(min_thought_count=3)
+
+    assert result["total_found"] == 1
+    session = result["sessions"][0]
+    assert session["session_id"] == "long"
+    assert session["thought_count"] == 6
+    assert session["has_revisions"] and not session["has_branches"]
+    assert session["summary"] == "long thought 1"
+    assert len(session["thoughts"]) == 6
+
+
+def test_index_is_backfilled_and_follows_deletes(thinking):
+    _think(thinking, "alpha", 3)
+    thinking.client.delete_collection(SESSION_INDEX_COLLECTION)
+    thinking._collections.clear()
+
+    assert thinking.get_similar_sessions()["sessions"][0]["thought_count"] == 3
+
+    thinking.delete_documents(THOUGHTS_COLLECTION, ids=["alpha_3"])
+    assert thinking.get_similar_sessions()["sessions"][0]["thought_count"] == 2
+
+    thinking.delete_documents(THOUGHTS_COLLECTION, ids=["alpha_1", "alpha_2"])
+    assert thinking.get_similar_sessions()["total_found"] == 0
+
+
+def test_resent_thoughts_are_not_counted_twice(thinking):
+    _think(thinking, "alpha", 2)
+    thinking.sequential_thinking("alpha thought 2", 2, 2, False, session_id="alpha")
+
+    session = thinking.get_similar_sessions()["sessions"][0]
+    assert session["thought_count"] == 2
+    assert thinking.get_similar_sessions(min_thought_count=3)["total_found"] == 0
+
+
+def test_concurrent_commits_of_one_thought_count_it_once(thinking, monkeypatch):
+    embedding_function = HashEmbeddingFunction()
+    # Both commits embed before either checks which ids are already stored
+    both_embedded = threading.Barrier(2, timeout=5)
+
+    def embed(documents):
+        vectors = embedding_function(documents)
+        both_embedded.wait()
+        return vectors
+
+    monkeypatch.setattr(thinking, "_embedding_function_for", lambda collection: embed)
+    thought = ("alpha_thought_1", "alpha thought 1",
+               {"session_id": "alpha", "thought_number": 1, "total_thoughts": 1,
+                "next_thought_needed": False, "timestamp": 1,
+                "session_type": "sequential_thinking"})
+    threads = [threading.Thread(target=thinking._commit_thoughts, args=([thought],))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert thinking.client.get_collection(THOUGHTS_COLLECTION).count() == 1
+    assert thinking.get_similar_sessions()["sessions"][0]["thought_count"] == 1
+
+
+def test_stateless_commits_keep_thoughts_committed_by_other_replicas(thinking):
+    thinking.settings.stateless_http = True
+    _think(thinking, "alpha", 1)
+    # Another replica stores a thought; its index update is overwritten by a concurrent one
+    embedding = HashEmbeddingFunction()(["alpha thought 2"])
+    thinking.client.get_collection(THOUGHTS_COLLECTION).add(
+        ids=["alpha_thought_2"], documents=["alpha thought 2"], embeddings=embedding,
+        metadatas=[{"session_id": "alpha", "thought_number": 2, "total_thoughts": 3,
+                    "next_thought_needed": True, "timestamp": 2,
+                    "session_type": "sequential_thinking"}])
+
+    thinking.sequential_thinking("alpha thought 3", 3, 3, False, session_id="alpha")
+
+    assert thinking.get_similar_sessions()["sessions"][0]["thought_count"] == 3
+
+
+def test_semantic_search_filters_on_full_session_counts(thinking):
+    _think(thinking, "alpha", 4)
+    _think(thinking, "beta", 1)
+
+    result = thinking.get_similar_sessions(query_text="alpha thought 2", n_results=3,
+                                           min_thought_count=2)
+
+    assert [s["session_id"] for s in result["sessions"]] == ["alpha"]
+    assert result["sessions"][0]["thought_count"] == 4
+
+
+def test_continue_thought_chain_reads_last_main_line_thought(thinking):
+    _think(thinking, "alpha", 3)
+    thinking.sequential_thinking("side path", 4, 4, False, session_id="alpha",
+                                 branch_from_thought=2, branch_id="side")
+
+    analysis = thinking.continue_thought_chain("alpha")
+
+    history = thinking.get_thought_history("alpha", include_branches=False)
+    assert analysis["last_thought_number"] == history["thoughts"][-1]["thought_number"] == 3
+    assert analysis["last_thought_content"] == "alpha thought 3"
+    assert analysis["total_thoughts_so_far"] == len(history["thoughts"]) == 3
+    assert thinking.continue_thought_chain("missing")["suggestions"] == []
+
+
+@pytest.fixture
+def buffered(monkeypatch):
+    monkeypatch.setitem(ChromaConnector._known_embedding_functions, "hash", HashEmbeddingFunction)
+    conn = ChromaConnector(make_settings("--thought-write-behind", "true",
+                                         "--thought-batch-size", "4",
+                                         "--thought-flush-ms", "60000"))
+    for name in conn.list_collections():
+        conn.client.delete_collection(name)
+    conn.create_collection(THOUGHTS_COLLECTION, embedding_function_name="hash")
+    yield conn
+    conn.close()
+    for name in conn.list_collections():
+        conn.client.delete_collection(name)
+
+
+def test_write_behind_group_commits_and_reads_own_writes(buffered):
+    calls = HashEmbeddingFunction.calls
+    acks = [buffered.sequential_thinking(f"thought {n}", n, 3, n < 3, session_id="s")
+            for n in (1, 2, 3)]
+
+    assert [ack["status"] for ack in acks] == ["queued"] * 3
+    assert buffered.client.get_collection(THOUGHTS_COLLECTION).count() == 0
+
+    history = buffered.get_thought_history("s")
+    assert [t["document_id"] for t in history["thoughts"]] == [ack["document_id"] for ack in acks]
+    # One embedding call for the whole batch; the session row reuses those vectors
+    assert HashEmbeddingFunction.calls == calls + 1
+    assert buffered.get_stats()["thought_write_behind"]["batches"] == 1
+
+
+def test_flush_waits_for_a_batch_already_being_committed():
+    started, release = threading.Event(), threading.Event()
+    committed = []
+
+    def commit(batch):
+        started.set()
+        release.wait(5)
+        committed.extend(batch)
+
+    buffer = WriteBehindBuffer(commit, max_batch=1, max_delay=60)
+    buffer.submit("a")
+    assert started.wait(5)
+    # Taken off the queue but not committed: still pending, and flush() waits for it
+    assert buffer.pending(lambda item: item == "a")
+    threading.Timer(0.1, release.set).start()
+    assert buffer.flush()
+    assert committed == ["a"] and not buffer.pending()
+    buffer.close()
+
+
+def test_dropped_items_are_capped_and_taken_per_predicate():
+    def fail(batch):
+        raise RuntimeError("backend down")
+
+    buffer = WriteBehindBuffer(fail, max_batch=10, max_delay=60, max_attempts=1, max_dropped=3)
+    for item in ["a1", "b1", "a2", "b2"]:
+        buffer.submit(item)
+        assert not buffer.flush()
+
+    assert buffer.stats()["dropped"] == 4
+    assert buffer.stats()["dropped_unread"] == 3
+    assert buffer.take_dropped(lambda item: item.startswith("a")) == ["a2"]
+    assert buffer.take_dropped() == ["b1", "b2"]
+    assert buffer.stats()["dropped_unread"] == 0
+    buffer.close()
+
+
+def test_reads_report_thoughts_lost_to_failed_commits(buffered, monkeypatch):
+    def fail(batch):
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(buffered._thought_buffer, "_commit", fail)
+    ack = buffered.sequential_thinking("thought 1", 1, 2, True, session_id="s")
+
+    for _ in range(buffered._thought_buffer.max_attempts - 1):
+        with pytest.raises(Exception, match="could not be committed yet"):
+            buffered.get_thought_history("s")
+    lost = f"lost after repeated commit failures: {ack['document_id']}"
+    with pytest.raises(Exception, match=lost):
+        buffered.get_thought_history("s")
+    assert buffered.get_stats()["thought_write_behind"]["dropped"] == 1
+
+
+def test_write_behind_commits_on_batch_size_and_close(buffered):
+    for n in range(1, 5):
+        buffered.sequential_thinking(f"thought {n}", n, 5, True, session_id="s")
+    thoughts = buffered.client.get_collection(THOUGHTS_COLLECTION)
+    deadline = time.monotonic() + 5
+    while thoughts.count() < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert thoughts.count() == 4
+
+    buffered.sequential_thinking("thought 5", 5, 5, False, session_id="s")
+    buffered.close()
+    assert thoughts.count() == 5
+
+
+def test_thought_graph_answers_branch_queries(thinking, tmp_path):
+    thinking._graphs = ThoughtGraphStore(max_sessions=4, sidecar_dir=str(tmp_path))
+    _think(thinking, "alpha", 3)
+    thinking.sequential_thinking("side a", 3, 4, True, session_id="alpha",
+                                 branch_from_thought=2, branch_id="a")
+    thinking.sequential_thinking("side b", 2, 4, True, session_id="alpha",
+                                 branch_from_thought=1, branch_id="b")
+    thinking.sequential_thinking("rethink", 2, 3, True, session_id="alpha",
+                                 is_revision=True, revises_thought=2)
+
+    graph = thinking.get_thought_graph("alpha")
+    assert graph["thought_count"] == 6
+    assert [b["branch_id"] for b in graph["branches"]] == ["a", "b"]
+    assert graph["revisions"][0]["revises_thought"] == 2
+    assert list(tmp_path.glob("*.jsonl"))
+
+    # Structure-only branch queries never read thought bodies
+    structure = thinking.get_thought_branches("alpha", thought_number=2, include_content=False)
+    assert structure["branches"] == [{"branch_id": "a", "branch_from_thought": 2,
+                                      "thoughts": [structure["branches"][0]["thoughts"][0]]}]
+    assert "content" not in structure["branches"][0]["thoughts"][0]
+    with_content = thinking.get_thought_branches("alpha", thought_number=2)
+    assert with_content["branches"][0]["thoughts"][0]["content"] == "side a"
+
+    # New thoughts extend the cached graph; a fresh store reloads it from the sidecar
+    thinking.sequential_thinking("side a2", 4, 4, False, session_id="alpha",
+                                 branch_from_thought=2, branch_id="a")
+    thinking._graphs = ThoughtGraphStore(max_sessions=4, sidecar_dir=str(tmp_path))
+    main_line = thinking.get_thought_history("alpha", include_branches=False)["thoughts"]
+    assert [t["content"] for t in main_line] == ["alpha thought 1", "alpha thought 2", "rethink",
+                                                 "alpha thought 3"]
+    assert thinking._graphs.stats()["sidecar_loads"] == 1
+    branches = thinking.get_thought_branches("alpha", thought_number=2)["branches"]
+    assert len(branches[0]["thoughts"]) == 2
+
+
+def test_thought_graph_sidecar_appends_and_compacts_on_load(tmp_path):
+    store = ThoughtGraphStore(sidecar_dir=str(tmp_path))
+    store.get("s", None, lambda session_id: [("t1", {"thought_number": 1})])
+    (path,) = tmp_path.glob("*.jsonl")
+    snapshot = path.read_text()
+
+    store.record([("t2", "body", {"session_id": "s", "thought_number": 2}),
+                  ("t1", "body", {"session_id": "s", "thought_number": 1, "is_revision": True})])
+    # Recorded nodes are appended after the untouched snapshot
+    assert path.read_text().startswith(snapshot)
+    assert len(path.read_text().splitlines()) == 4
+
+    with open(path, "a") as f:
+        f.write('{"id": "t3", "no')
+    graph = ThoughtGraphStore(sidecar_dir=str(tmp_path)).get("s", 2, lambda session_id: [])
+    assert graph.nodes == {"t1": {"thought_number": 1, "is_revision": True},
+                           "t2": {"thought_number": 2}}
+    # Superseded and torn lines are compacted away
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_update_centroids_is_a_running_mean():
+    vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+    centroids = update_centroids(np.zeros((2, 3), np.float32), np.array([0, 0]), vectors[:3],
+                                 np.array([0, 0, 1]))
+    centroids = update_centroids(centroids, np.array([2, 1]), vectors[3:], np.array([1]))
+    np.testing.assert_allclose(centroids, [vectors[:2].mean(axis=0), vectors[2:].mean(axis=0)])
+
+
+def test_similar_sessions_ranks_session_centroids(thinking):
+    _think(thinking, "alpha", 3)
+    _think(thinking, "beta", 3)
+    thinking.sequential_thinking("beta thought 1", 4, 4, False, session_id="beta")
+
+    stored = thinking.client.get_collection(THOUGHTS_COLLECTION).get(where={"session_id": "beta"},
+                                                                      include=["embeddings"])
+    index = thinking.client.get_collection(SESSION_INDEX_COLLECTION).get(ids=["beta"],
+                                                                         include=["embeddings"])
+    np.testing.assert_allclose(index["embeddings"][0], np.mean(stored["embeddings"], axis=0),
+                               rtol=1e-5)
+
+    result = thinking.get_similar_sessions(query_text="beta thought 1", n_results=2)
+    assert [s["session_id"] for s in result["sessions"]] == ["beta", "alpha"]
+    assert result["sessions"][0]["distance"] < result["sessions"][1]["distance"]
+    assert len(result["sessions"][0]["thoughts"]) == 4